@@ -0,0 +1,63 @@
+"""
+Benchmark Dial's bucket queue against the binary heap Dijkstra.
+
+Usage: python bench/bench_dijkstra.py [n_nodes] [avg_degree] [max_weight]
+"""
+
+import sys
+from time import time
+
+import numpy as np
+import staticgraph as sg
+
+def random_wdigraph(n_nodes, avg_degree, max_weight):
+    """
+    Return a random WDiGraph with integer weights in [1, max_weight].
+    """
+
+    us = np.random.randint(0, n_nodes, n_nodes * avg_degree)
+    vs = np.random.randint(0, n_nodes, n_nodes * avg_degree)
+
+    # make expects simple graphs, drop self loops and repeated pairs
+    keys = np.unique(us[us != vs].astype(np.int64) * n_nodes + vs[us != vs])
+    us, vs = keys // n_nodes, keys % n_nodes
+    n_edges = keys.shape[0]
+    ws = np.random.randint(1, max_weight + 1, n_edges).astype(np.float64)
+
+    edges = lambda: ((int(u), int(v), float(w)) for u, v, w in zip(us, vs, ws))
+    deg = sg.wdigraph.make_deg(n_nodes, edges())
+    return sg.wdigraph.make(n_nodes, n_edges, edges(), deg)
+
+def best_of(func, repeat = 3):
+    """
+    Return the best wall clock time of repeated calls to func.
+    """
+
+    best = float("inf")
+    for _ in xrange(repeat):
+        start = time()
+        func()
+        best = min(best, time() - start)
+    return best
+
+def main():
+    """
+    Time both algorithms from a few random sources.
+    """
+
+    n_nodes    = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    avg_degree = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    max_weight = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    G = random_wdigraph(n_nodes, avg_degree, max_weight)
+    print "nodes %d edges %d max weight %d" % (G.n_nodes, G.n_edges,
+                                               max_weight)
+
+    for s in np.random.randint(0, n_nodes, 3):
+        heap = best_of(lambda: sg.dijkstra.dijkstra_all(G, s, True, False))
+        dial = best_of(lambda: sg.dijkstra.dijkstra_all(G, s, True, True))
+        print "source %8d heap %.3fs dial %.3fs speedup %.2fx" % \
+              (s, heap, dial, heap / dial)
+
+if __name__ == "__main__":
+    main()
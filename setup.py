@@ -22,6 +22,35 @@ ext_modules = [
     Extension("staticgraph.components",
               ["staticgraph/components.pyx"],
               include_dirs=[get_include()]),
+    Extension("staticgraph.bfs",
+              ["staticgraph/bfs.pyx"],
+              include_dirs=[get_include()],
+              extra_compile_args=["-fopenmp"],
+              extra_link_args=["-fopenmp"]),
+    Extension("staticgraph.dfs",
+              ["staticgraph/dfs.pyx"],
+              include_dirs=[get_include()]),
+    Extension("staticgraph.dag",
+              ["staticgraph/dag.pyx"],
+              include_dirs=[get_include()]),
+    Extension("staticgraph.contraction",
+              ["staticgraph/contraction.pyx"],
+              include_dirs=[get_include()]),
+    Extension("staticgraph.sssp",
+              ["staticgraph/sssp.pyx"],
+              include_dirs=[get_include()],
+              extra_compile_args=["-fopenmp"],
+              extra_link_args=["-fopenmp"]),
+    Extension("staticgraph.hll",
+              ["staticgraph/hll.pyx"],
+              include_dirs=[get_include()],
+              extra_compile_args=["-fopenmp"],
+              extra_link_args=["-fopenmp"]),
+    Extension("staticgraph.brandes",
+              ["staticgraph/brandes.pyx"],
+              include_dirs=[get_include()],
+              extra_compile_args=["-fopenmp"],
+              extra_link_args=["-fopenmp"]),
 ]
 
 packages = ["staticgraph"]
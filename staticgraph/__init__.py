@@ -5,18 +5,35 @@ Memory efficient graph library for Python.
 from staticgraph import digraph
 from staticgraph import links
 from staticgraph import components
+from staticgraph import bfs
+from staticgraph import dfs
+from staticgraph import dag
 from staticgraph import graph
 from staticgraph import wgraph
+from staticgraph import sssp
 from staticgraph import dijkstra
+from staticgraph import bellman_ford
+from staticgraph import ksp
+from staticgraph import hll
+from staticgraph import brandes
+from staticgraph import executor
+from staticgraph import anf
 from staticgraph import wdigraph
+from staticgraph import alt
+from staticgraph import oracle
+from staticgraph import contraction
+from staticgraph import ch
 from staticgraph import graph_operations
 from staticgraph import digraph_operations
 from staticgraph import graph_traversal
 from staticgraph import digraph_traversal
 from staticgraph import graph_shortest_paths
+from staticgraph import apsp
 from staticgraph import dijkstra
 from staticgraph import graph_distance_measures
 from staticgraph import graph_centrality
+from staticgraph import digraph_centrality
 from staticgraph import digraph_distance_measures
 from staticgraph import exceptions
+from staticgraph import context
 
@@ -0,0 +1,219 @@
+"""
+Landmark (ALT) index for repeated point to point shortest path queries.
+"""
+
+__all__ = ["Landmarks", "select", "build", "save", "load", "alt_search"]
+
+from os import mkdir
+from os.path import join, exists
+
+import numpy as np
+import staticgraph.sssp as sssp
+from staticgraph.context import prepare
+from staticgraph.exceptions import StaticGraphNodeAbsentException
+
+class Landmarks(object):
+    """
+    Distances between a few landmarks and all nodes of a weighted graph.
+
+    Both tables have one row per node so that the bounds of a node are
+    read from a single cache line. For undirected graphs they are the
+    same array.
+
+    landmarks - uint32 array of the landmark nodes
+    forward   - forward[v, i] is the distance from landmarks[i] to v
+    backward  - backward[v, i] is the distance from v to landmarks[i]
+    """
+
+    def __init__(self, landmarks, forward, backward):
+
+        self.landmarks = landmarks
+        self.forward   = forward
+        self.backward  = backward
+
+    @property
+    def nbytes(self):
+        """
+        Return total size of internal arrays in bytes.
+        """
+
+        nbytes  = self.landmarks.nbytes
+        nbytes += self.forward.nbytes
+        if self.backward is not self.forward:
+            nbytes += self.backward.nbytes
+        return nbytes
+
+    @property
+    def n_landmarks(self):
+        """
+        Return # landmarks.
+        """
+
+        return self.landmarks.shape[0]
+
+def _distances(G, s, directed, reverse):
+    """
+    Return the distances from s, or to s if reverse.
+    """
+
+    sources = np.array([s], dtype=np.uint32)
+    _, dist, _ = sssp.dijkstra(G, sources, directed, reverse)
+    return dist
+
+def select(G, n_landmarks, directed = False):
+    """
+    Returns landmarks chosen by farthest selection.
+
+    The search starts from the node of largest degree. Each following
+    landmark is the node farthest from its nearest landmark, only nodes
+    connected to a landmark in either direction are considered.
+
+    Parameters
+    ----------
+    G           : A weighted staticgraph.
+    n_landmarks : Number of landmarks wanted.
+
+    Returns
+    -------
+    landmarks : A numpy uint32 array of at most n_landmarks nodes.
+    """
+
+    unreached = (2 ** 64) - 1
+    indptr = G.s_indptr if directed else G.n_indptr
+    start = int(np.argmax(np.diff(indptr)))
+
+    nearest = np.minimum(_distances(G, start, directed, False),
+                         _distances(G, start, directed, True))
+    landmarks = []
+    while len(landmarks) < n_landmarks:
+        candidates = np.where(nearest == unreached, -1.0, nearest)
+        l = int(np.argmax(candidates))
+        if candidates[l] <= 0:
+            break
+        landmarks.append(l)
+        nearest = np.minimum(nearest, _distances(G, l, directed, False))
+        nearest = np.minimum(nearest, _distances(G, l, directed, True))
+
+    return np.array(landmarks, dtype=np.uint32)
+
+def build(G, n_landmarks = 16, directed = False, landmarks = None):
+    """
+    Returns the landmark distance tables of G.
+
+    Parameters
+    ----------
+    G           : A weighted staticgraph.
+    n_landmarks : Number of landmarks, used if landmarks is None.
+    landmarks   : Optional sequence of landmark nodes, picked by select
+                  if None.
+
+    Returns
+    -------
+    L : A Landmarks instance.
+
+    Notes
+    ------
+
+    directed must be set to True for directed graphs.
+    Costs one Dijkstra run per landmark, two for directed graphs.
+    """
+
+    if landmarks is None:
+        landmarks = select(G, n_landmarks, directed)
+    landmarks = np.asarray(landmarks, dtype=np.uint32)
+    if landmarks.size and landmarks.max() >= G.order():
+        raise StaticGraphNodeAbsentException("landmark absent in graph!!")
+
+    k = landmarks.shape[0]
+    forward = np.empty((G.order(), k), dtype=np.float64)
+    for i, l in enumerate(landmarks):
+        forward[:, i] = _distances(G, l, directed, False)
+
+    if not directed:
+        return Landmarks(landmarks, forward, forward)
+
+    backward = np.empty((G.order(), k), dtype=np.float64)
+    for i, l in enumerate(landmarks):
+        backward[:, i] = _distances(G, l, directed, True)
+
+    return Landmarks(landmarks, forward, backward)
+
+def save(store, L):
+    """
+    Save the landmark tables to disk, next to a graph.
+
+    store - the directory where the graph is stored
+    L     - the landmark tables
+    """
+
+    # Create the directory
+    if not exists(store):
+        mkdir(store)
+
+    # define save shortcut
+    do_save = lambda fname, arr : np.save(join(store, fname), arr)
+
+    # Make the arrays
+    do_save("landmarks.npy", L.landmarks)
+    do_save("landmark_forward.npy", L.forward)
+    if L.backward is not L.forward:
+        do_save("landmark_backward.npy", L.backward)
+
+def load(store):
+    """
+    Load the landmark tables from disk.
+
+    The tables are memory mapped, so processes sharing a store share them.
+
+    store - directory where the graph is stored
+    """
+
+    # define load shortcut
+    do_load = lambda fname : np.load(join(store, fname), "r")
+
+    # Make the arrays
+    landmarks = do_load("landmarks.npy")
+    forward   = do_load("landmark_forward.npy")
+    backward  = forward
+    if exists(join(store, "landmark_backward.npy")):
+        backward = do_load("landmark_backward.npy")
+
+    return Landmarks(landmarks, forward, backward)
+
+def alt_search(G, L, s, t, directed = False, ctx = None):
+    """
+    Returns a shortest path from source node s to target node t for a
+    weighted staticgraph G using A* with landmark lower bounds.
+
+    Parameters
+    ----------
+    G   : A weighted staticgraph.
+    L   : Landmarks of G, from build or load.
+    s   : Source node.
+    t   : Target node
+    ctx : Optional TraversalContext reused across queries.
+
+    Returns
+    -------
+    nodes : A numpy uint32 array with the path from s to t.
+
+    distance : The distance from s to t.
+
+    Notes
+    ------
+
+    returns (None, None) if target is unreachable from source.
+    directed keyword must be set to True for directed graphs.
+    The bounds come from the triangle inequality, e.g. for a landmark l
+    d(s, t) >= d(l, t) - d(l, s), so the search settles the nodes
+    around the shortest path instead of a whole ball around s.
+    """
+
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
+
+    ctx = prepare(G, ctx)
+    path, dist, _ = sssp.astar(G, s, t, directed, L.forward, L.backward, ctx)
+    return path, dist
@@ -0,0 +1,127 @@
+"""
+Approximate distance statistics from the HyperANF neighbourhood function.
+"""
+
+__all__ = ["neighbourhood_function", "distance_distribution",
+           "effective_diameter", "average_distance", "harmonic_centrality"]
+
+import numpy as np
+import staticgraph.hll as hll
+
+def neighbourhood_function(G, log2m = 6, seed = 0, max_dist = None,
+                           reverse = False, threads = 1):
+    """
+    Returns the approximate neighbourhood function of G.
+
+    Parameters
+    ----------
+    G        : A Graph or DiGraph.
+    log2m    : Optional parameter, log2 of # one byte registers per node.
+               The relative standard error is about 1.04 / sqrt(2 ** log2m).
+    seed     : Optional parameter, seed of the hash function.
+    max_dist : Optional parameter, largest distance considered.
+    reverse  : Optional parameter, follow the edges of a DiGraph
+               backwards.
+    threads  : Optional parameter, number of threads to use.
+
+    Returns
+    -------
+    nf       : A numpy float64 array, nf[t] is the estimated number of
+               pairs (x, y) with d(x, y) <= t, for t up to the largest
+               distance found.
+
+    harmonic : A numpy float64 array, harmonic[x] is the estimated sum of
+               1 / d(x, y) over the nodes y reachable from x.
+
+    Notes
+    ------
+
+    Every node keeps a HyperLogLog counter of the nodes within distance
+    t, so the memory is 2 ** log2m bytes per node and copy. The counters
+    of radius t + 1 are unions of the counters of the neighbours, each
+    distance costs one sequential pass over the index arrays.
+    With reverse set the balls hold the nodes reaching x, and harmonic
+    estimates the harmonic centrality of the nodes.
+    """
+
+    if max_dist is None:
+        max_dist = (2 ** 32) - 1
+
+    return hll.hyperanf(G, log2m, seed, max_dist, reverse, threads)
+
+def distance_distribution(nf):
+    """
+    Returns the estimated number of pairs at each distance.
+
+    Parameters
+    ----------
+    nf : A neighbourhood function, as from neighbourhood_function.
+
+    Returns
+    -------
+    dd : A numpy float64 array, dd[t] is the estimated number of pairs
+         (x, y) with d(x, y) = t, dd[0] being the number of nodes.
+    """
+
+    return np.concatenate(([nf[0]], np.diff(nf)))
+
+def effective_diameter(nf, alpha = 0.9):
+    """
+    Returns the estimated effective diameter.
+
+    Parameters
+    ----------
+    nf    : A neighbourhood function, as from neighbourhood_function.
+    alpha : Optional parameter, fraction of the reachable pairs.
+
+    Returns
+    -------
+    d : The distance within which alpha of the reachable pairs lie,
+        interpolated linearly between integer distances.
+    """
+
+    target = alpha * nf[-1]
+    t = int(np.searchsorted(nf, target))
+    if t == 0:
+        return 0.0
+    return t - 1 + (target - nf[t - 1]) / (nf[t] - nf[t - 1])
+
+def average_distance(nf):
+    """
+    Returns the estimated average distance between reachable pairs.
+
+    Parameters
+    ----------
+    nf : A neighbourhood function, as from neighbourhood_function.
+
+    Returns
+    -------
+    d : The average of d(x, y) over the pairs x != y with y reachable
+        from x, None if there are no such pairs.
+    """
+
+    dd = distance_distribution(nf)[1:]
+    if dd.sum() <= 0:
+        return None
+    return float(np.dot(np.arange(1, dd.size + 1), dd) / dd.sum())
+
+def harmonic_centrality(G, log2m = 6, seed = 0, threads = 1):
+    """
+    Returns the estimated harmonic centrality of every node of G.
+
+    Parameters
+    ----------
+    G       : A Graph or DiGraph.
+    log2m   : Optional parameter, as for neighbourhood_function.
+    seed    : Optional parameter, seed of the hash function.
+    threads : Optional parameter, number of threads to use.
+
+    Returns
+    -------
+    harmonic : A numpy float64 array, harmonic[x] is the estimated sum of
+               1 / d(y, x) over the nodes y != x which reach x.
+    """
+
+    _, harmonic = hll.hyperanf(G, log2m, seed, (2 ** 32) - 1, True,
+                               threads)
+    return harmonic
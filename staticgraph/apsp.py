@@ -0,0 +1,208 @@
+"""
+All pairs shortest paths for unweighted and weighted graphs.
+"""
+
+__all__ = ["all_pairs_shortest_paths", "floyd_warshall"]
+
+from os import mkdir
+from os.path import join, exists
+from functools import partial
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+import staticgraph.bfs as bfs
+import staticgraph.sssp as sssp
+import staticgraph.executor as executor
+
+def _matrix(store, fname, dtype, n_nodes):
+    """
+    Return an n_nodes x n_nodes matrix, memory mapped in store if given.
+    """
+
+    if store is None:
+        return np.empty((n_nodes, n_nodes), dtype=dtype)
+
+    # Create the directory
+    if not exists(store):
+        mkdir(store)
+
+    return np.lib.format.open_memmap(join(store, fname), mode="w+",
+                                     dtype=dtype, shape=(n_nodes, n_nodes))
+
+def _relax(dist, pred, ib, jb, kb):
+    """
+    Relax the tile dist[ib, jb] over the intermediate nodes in kb.
+    """
+
+    tile = dist[ib, jb]
+    cand = np.empty_like(tile)
+    if pred is not None:
+        ptile = pred[ib, jb]
+        mask = np.empty(tile.shape, dtype=bool)
+
+    for k in xrange(kb.start, kb.stop):
+        np.add(dist[ib, k][:, None], dist[k, jb][None, :], out=cand)
+        if pred is None:
+            np.minimum(tile, cand, out=tile)
+            continue
+        np.less(cand, tile, out=mask)
+        np.copyto(tile, cand, where=mask)
+        np.copyto(ptile, pred[k, jb][None, :], where=mask)
+
+def _rows(method, directed, predecessors, G, sources):
+    """
+    Return the rows of dist and pred for a chunk of sources.
+    """
+
+    n_nodes = G.order()
+    dtype = np.uint32 if method == "bfs" else np.float64
+    dist = np.empty((len(sources), n_nodes), dtype=dtype)
+    pred = None
+    if predecessors:
+        pred = np.empty((len(sources), n_nodes), dtype=np.uint32)
+
+    if method == "dijkstra":
+        sssp.rows(G, sources, directed, dist, pred)
+    elif pred is None:
+        bfs.ms_distances(G, sources, dist)
+    else:
+        bfs.rows(G, sources, dist, pred)
+    return dist, pred
+
+def floyd_warshall(dist, pred = None, block = 256, threads = 1):
+    """
+    Run a blocked Floyd-Warshall over a weighted distance matrix in place.
+
+    Parameters
+    ----------
+    dist    : A float64 n x n matrix with the edge weights, 0 on the
+              diagonal and (2 ** 64) - 1 for missing edges.
+    pred    : Optional uint32 n x n matrix, pred[i, j] is i for the edges
+              and (2 ** 32) - 1 elsewhere.
+    block   : Side of the tiles.
+    threads : Number of threads relaxing tiles at once.
+
+    Notes
+    ------
+
+    For every block of intermediate nodes the diagonal tile is relaxed
+    first, then the tiles in its row and column and finally all others.
+    Each step only touches a few tiles with vectorized min-plus updates,
+    tiles of the last two steps are independent and relaxed in parallel.
+    """
+
+    n = dist.shape[0]
+    blocks = [slice(b, min(b + block, n)) for b in xrange(0, n, block)]
+    pool = ThreadPool(threads) if threads > 1 else None
+    run = lambda tasks: pool.map(lambda t: _relax(dist, pred, *t), tasks) \
+                        if pool else [_relax(dist, pred, *t) for t in tasks]
+
+    try:
+        for kb in blocks:
+            _relax(dist, pred, kb, kb, kb)
+            run([(kb, jb, kb) for jb in blocks if jb != kb] +
+                [(ib, kb, kb) for ib in blocks if ib != kb])
+            run([(ib, jb, kb) for ib in blocks if ib != kb
+                              for jb in blocks if jb != kb])
+    finally:
+        if pool:
+            pool.close()
+
+    return dist, pred
+
+def all_pairs_shortest_paths(G, directed = False, store = None,
+                             predecessors = False, method = None,
+                             threads = 1, block = 256, workers = 1,
+                             processes = False):
+    """
+    Returns the shortest path distances between all pairs of nodes of G.
+
+    Parameters
+    ----------
+    G            : A staticgraph, weighted or not.
+    store        : Optional directory, the matrices are memory mapped to
+                   dist.npy and pred.npy in it.
+    predecessors : Optional parameter, also return the predecessors.
+    method       : "bfs" for unweighted graphs, "dijkstra" or "floyd" for
+                   weighted graphs, picked from the density if None.
+    threads      : Number of threads, each computing whole rows.
+    block        : Side of the tiles of Floyd-Warshall.
+    workers      : # workers sharing the rows, see executor. Each fills
+                   its chunk of rows with one thread.
+    processes    : Use processes instead of threads for the workers.
+
+    Returns
+    -------
+    dist : A n x n matrix, dist[i, j] is the distance from i to j.
+           uint32 with (2 ** 32) - 1 for unreachable pairs if G is
+           unweighted, float64 with (2 ** 64) - 1 otherwise.
+
+    pred : A n x n uint32 matrix, pred[i, j] is the node before j on a
+           shortest path from i, (2 ** 32) - 1 for i and unreachable j.
+           None unless predecessors is True.
+
+    Notes
+    ------
+
+    directed must be set to True for weighted directed graphs.
+    Sparse graphs run one compiled BFS or Dijkstra per source row,
+    unweighted graphs without predecessors use the bit parallel BFS.
+    Weighted graphs with at least 0.4 * n * n arcs, counting both
+    directions of undirected edges, use Floyd-Warshall. Below that
+    density Dijkstra rows were measured faster.
+    """
+
+    n_nodes = G.order()
+    weighted = hasattr(G, "weights") or hasattr(G, "s_weights")
+    if method is None:
+        if not weighted:
+            method = "bfs"
+        elif sssp._forward(G, directed)[1].size >= 0.4 * n_nodes ** 2:
+            method = "floyd"
+        else:
+            method = "dijkstra"
+    if method not in (("dijkstra", "floyd") if weighted else ("bfs",)):
+        raise ValueError("Invalid method for this graph: %s" % method)
+
+    sources = np.arange(n_nodes, dtype=np.uint32)
+    pred = None
+    if predecessors:
+        pred = _matrix(store, "pred.npy", np.uint32, n_nodes)
+
+    if workers > 1 and method != "floyd":
+        dtype = np.uint32 if method == "bfs" else np.float64
+        dist = _matrix(store, "dist.npy", dtype, n_nodes)
+        func = partial(_rows, method, directed, predecessors)
+        start = 0
+        for d, p in executor.run(G, func, sources, workers, processes, 64):
+            dist[start:start + d.shape[0]] = d
+            if pred is not None:
+                pred[start:start + d.shape[0]] = p
+            start += d.shape[0]
+        return dist, pred
+
+    if method == "bfs":
+        dist = _matrix(store, "dist.npy", np.uint32, n_nodes)
+        if pred is None:
+            bfs.ms_distances(G, sources, dist, threads)
+        else:
+            bfs.rows(G, sources, dist, pred, threads)
+        return dist, pred
+
+    dist = _matrix(store, "dist.npy", np.float64, n_nodes)
+    if method == "dijkstra":
+        sssp.rows(G, sources, directed, dist, pred, threads)
+        return dist, pred
+
+    # Start from the edges, the lightest of parallel edges wins
+    indptr, indices, weights = sssp._forward(G, directed)
+    tails = np.repeat(sources, np.diff(indptr).astype(np.int64))
+    dist.fill((2 ** 64) - 1)
+    np.minimum.at(dist, (tails, indices), weights)
+    dist[sources, sources] = 0
+    if pred is not None:
+        pred.fill((2 ** 32) - 1)
+        pred[tails, indices] = tails
+        pred[sources, sources] = (2 ** 32) - 1
+
+    return floyd_warshall(dist, pred, block, threads)
@@ -0,0 +1,148 @@
+"""
+Module implementing the Bellman-Ford algorithm for weighted graphs with
+negative weights
+"""
+
+from numpy import uint32, array, arange, repeat, diff, empty, flatnonzero
+from numpy import minimum
+from staticgraph.exceptions import StaticGraphNodeAbsentException
+from staticgraph.exceptions import StaticGraphNegativeCycleException
+import staticgraph.sssp as sssp
+
+def _sweeps(G, sources, directed):
+    """
+    Run synchronous Bellman-Ford rounds, vectorized over the edges.
+
+    Only the edges leaving nodes improved in the previous round are
+    relaxed. Once n_nodes edges were relaxed since the last look, the
+    predecessor graph is searched for a cycle, which is negative.
+    Returns dist, pred and a negative cycle or None, as sssp.spfa does.
+    """
+
+    indptr, indices, weights = sssp._forward(G, directed)
+    n_nodes = G.order()
+    tails = repeat(arange(n_nodes, dtype = uint32), diff(indptr).astype("i8"))
+
+    dist = empty(n_nodes, dtype = "f8")
+    dist.fill((2 ** 64) - 1)
+    pred = empty(n_nodes, dtype = uint32)
+    pred.fill((2 ** 32) - 1)
+    dist[sources] = 0
+    changed = dist == 0
+    relaxed = 0
+
+    for _ in xrange(n_nodes):
+        active = flatnonzero(changed[tails])
+        if active.size == 0:
+            return dist, pred, None
+
+        heads = indices[active]
+        cand = dist[tails[active]] + weights[active]
+        new = dist.copy()
+        minimum.at(new, heads, cand)
+
+        # Any edge attaining the new minimum becomes the predecessor
+        changed = new < dist
+        win = changed[heads] & (cand == new[heads])
+        pred[heads[win]] = tails[active[win]]
+        dist = new
+
+        relaxed += active.size
+        if relaxed >= n_nodes:
+            relaxed = 0
+            cycle = sssp.pred_cycle(pred)
+            if cycle is not None:
+                return dist, pred, cycle
+
+    # The last round may have relaxed edges without improving any node
+    if not changed.any():
+        return dist, pred, None
+
+    # A node still improving after n_nodes rounds has a path of n_nodes
+    # predecessors, so walking them lands on a negative cycle
+    v = flatnonzero(changed)[0]
+    for _ in xrange(n_nodes):
+        v = pred[v]
+    cycle = [v]
+    u = pred[v]
+    while u != v:
+        cycle.append(u)
+        u = pred[u]
+    cycle.reverse()
+    return dist, pred, array(cycle, dtype = uint32)
+
+def bellman_ford(G, s, directed = False, vectorized = False):
+    """
+    Returns the length of the shortest paths from source node s to all 
+    nodes of a weighted staticgraph G with possibly negative weights.
+    
+    Parameters
+    ----------
+    G          : A weighted staticgraph.
+    s          : Source node.
+    vectorized : Optional parameter, False runs the compiled queue based
+                 algorithm (SPFA), True runs synchronous rounds vectorized
+                 over all edges with numpy.
+    
+    Returns
+    -------
+    dist : A numpy float64 array, dist[i] is the distance from s to i.
+
+    pred : A numpy uint32 array, the predecessor on a shortest path.
+    
+    Raises
+    ------
+    StaticGraphNegativeCycleException : if a negative cycle is reachable 
+    from s, its nodes are in the cycle attribute of the exception.
+
+    Notes
+    ------
+
+    dist[i] = (2 ** 64) - 1 and pred[i] = (2 ** 32) - 1 imply that 
+    the node i is unreachable from the source.
+    directed must be set to True for directed graphs, every negative 
+    edge of an undirected graph is a negative cycle.
+    """
+    
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+
+    sources = array([s], dtype = uint32)
+    if vectorized:
+        dist, pred, cycle = _sweeps(G, sources, directed)
+    else:
+        dist, pred, cycle = sssp.spfa(G, sources, directed)
+
+    if cycle is not None:
+        raise StaticGraphNegativeCycleException("negative cycle found!!",
+                                                cycle)
+    return dist, pred
+
+def negative_cycle(G, directed = False, vectorized = False):
+    """
+    Returns a negative cycle of a weighted staticgraph G, if any.
+    
+    Parameters
+    ----------
+    G          : A weighted staticgraph.
+    vectorized : Optional parameter, as for bellman_ford.
+    
+    Returns
+    -------
+    cycle : A numpy uint32 array of nodes c0, c1, ..., ck such that 
+            (c0, c1), ..., (ck, c0) are edges with a negative total 
+            weight, or None.
+
+    Notes
+    ------
+
+    All nodes start at distance 0, as if an extra source had an edge of 
+    weight 0 to each of them, so cycles anywhere in G are found.
+    """
+
+    sources = arange(G.order(), dtype = uint32)
+    if vectorized:
+        _, _, cycle = _sweeps(G, sources, directed)
+    else:
+        _, _, cycle = sssp.spfa(G, sources, directed)
+    return cycle
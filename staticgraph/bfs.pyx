@@ -0,0 +1,1050 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+"""
+Compiled breadth first search kernels.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, ndarray
+from libc.stdlib cimport malloc, calloc, realloc, free
+from libc.string cimport memcpy, memset
+from cython.parallel cimport parallel, prange, threadid
+
+cdef extern from *:
+    int __builtin_ctzll(unsigned long long x) nogil
+    bint __sync_bool_compare_and_swap(uint32_t *ptr, uint32_t old,
+                                      uint32_t new) nogil
+    size_t __sync_fetch_and_add(size_t *ptr, size_t val) nogil
+
+# Size of the per thread queues used by the parallel BFS
+cdef enum:
+    LOCAL_QUEUE = 1024
+
+# The bit parallel BFS scans all nodes once the frontier holds more than
+# 1 / DENSE_FRONT of them
+cdef enum:
+    DENSE_FRONT = 16
+
+def direction_optimizing(object G, size_t s, size_t maxdepth=(2 ** 32) - 1,
+                         double alpha=15.0, double beta=18.0):
+    """
+    Run a direction optimizing BFS on the directed graph.
+
+    Returns bfs_indptr and bfs_indices in the same layout as
+    digraph_traversal.bfs_all. Nodes inside a level are not guaranteed
+    to be in the same order as the top-down traversal.
+
+    A level is expanded top-down over the successors while the frontier
+    is small. Once the edges out of the frontier exceed 1 / alpha of the
+    edges into the unvisited nodes, levels are expanded bottom-up: every
+    unvisited node scans its predecessors for a parent in the frontier
+    bitmap and stops at the first one found. The search switches back to
+    top-down once the frontier shrinks below 1 / beta of the nodes.
+
+    G        - the directed graph
+    s        - the source node
+    maxdepth - maximum depth of the traversal
+    alpha    - top-down to bottom-up switching factor
+    beta     - bottom-up to top-down switching factor
+    """
+
+    cdef:
+        ndarray[uint64_t] p_indptr, s_indptr, visited, front
+        ndarray[uint32_t] p_indices, s_indices, bfs_indptr, bfs_indices
+        uint32_t u, v
+        size_t i, j, start, end, n_nodes, n_words
+        size_t lo, hi, rear, depth, n_front, last_front
+        uint64_t m_front, m_unvisited
+        bint top_down
+
+    # Assign to typed variables for fast acces
+    p_indptr  = G.p_indptr
+    p_indices = G.p_indices
+    s_indptr  = G.s_indptr
+    s_indices = G.s_indices
+    n_nodes   = G.n_nodes
+
+    # Bitmaps for the visited nodes and the current frontier
+    n_words = (n_nodes + 63) // 64
+    visited = np.zeros(n_words, dtype="u8")
+    front   = np.zeros(n_words, dtype="u8")
+
+    # bfs_indices doubles as the queue, a level is a slice of it
+    bfs_indices = np.empty(n_nodes, dtype="u4")
+    bfs_indptr  = np.empty(n_nodes + 1, dtype="u4")
+
+    bfs_indices[0] = s
+    bfs_indptr[0]  = 0
+    visited[s >> 6] |= (<uint64_t> 1) << (s & 63)
+
+    # Edges that a bottom-up step would have to inspect
+    m_unvisited = p_indptr[n_nodes] - (p_indptr[s + 1] - p_indptr[s])
+
+    lo, hi = 0, 1
+    depth = 0
+    top_down = True
+    last_front = 0
+
+    while True:
+        if depth == maxdepth:
+            bfs_indptr[depth + 1] = hi
+            depth += 1
+            break
+
+        # Pick the direction for the current level
+        n_front = hi - lo
+        if top_down:
+            m_front = 0
+            for i in range(lo, hi):
+                u = bfs_indices[i]
+                m_front += s_indptr[u + 1] - s_indptr[u]
+            if m_front * alpha > m_unvisited:
+                top_down = False
+        elif n_front * beta < n_nodes and n_front < last_front:
+            top_down = True
+        last_front = n_front
+
+        rear = hi
+        if top_down:
+            for i in range(lo, hi):
+                u = bfs_indices[i]
+                start = s_indptr[u]
+                end   = s_indptr[u + 1]
+                for j in range(start, end):
+                    v = s_indices[j]
+                    if visited[v >> 6] & ((<uint64_t> 1) << (v & 63)) == 0:
+                        visited[v >> 6] |= (<uint64_t> 1) << (v & 63)
+                        m_unvisited -= p_indptr[v + 1] - p_indptr[v]
+                        bfs_indices[rear] = v
+                        rear += 1
+        else:
+            for i in range(n_words):
+                front[i] = 0
+            for i in range(lo, hi):
+                u = bfs_indices[i]
+                front[u >> 6] |= (<uint64_t> 1) << (u & 63)
+
+            for v in range(n_nodes):
+                if visited[v >> 6] & ((<uint64_t> 1) << (v & 63)) != 0:
+                    continue
+                start = p_indptr[v]
+                end   = p_indptr[v + 1]
+                for j in range(start, end):
+                    u = p_indices[j]
+                    if front[u >> 6] & ((<uint64_t> 1) << (u & 63)) != 0:
+                        visited[v >> 6] |= (<uint64_t> 1) << (v & 63)
+                        m_unvisited -= end - start
+                        bfs_indices[rear] = v
+                        rear += 1
+                        break
+
+        bfs_indptr[depth + 1] = hi
+        depth += 1
+        lo, hi = hi, rear
+        if lo == hi:
+            break
+
+    return bfs_indptr[:depth + 1], bfs_indices[:hi]
+
+cdef void _ms_batch(uint64_t *indptr, uint32_t *indices, size_t n_nodes,
+                    uint32_t *sources, size_t n_sources,
+                    uint64_t *seen, uint64_t *visit, uint64_t *nxt,
+                    uint32_t *front, uint32_t *touched,
+                    uint32_t *ecc, uint32_t *reached, uint32_t *dist) nogil:
+    """
+    Run a bit parallel BFS from at most 64 sources at once.
+
+    Bit i of seen[v], visit[v] and nxt[v] belongs to sources[i]. visit
+    and nxt must be all zero and are left so. front and touched list the
+    nodes of the frontier and of the next one, so a level only costs
+    the edges out of its frontier.
+    Rows of dist are only written when dist is not NULL.
+    """
+
+    cdef:
+        uint32_t u, v, level
+        uint64_t x, bit
+        size_t i, j, k, start, end, n_front, n_touched
+
+    memset(seen, 0, n_nodes * sizeof(uint64_t))
+
+    n_front = 0
+    for i in range(n_sources):
+        u = sources[i]
+        bit = (<uint64_t> 1) << i
+        if visit[u] == 0:
+            front[n_front] = u
+            n_front += 1
+        seen[u] |= bit
+        visit[u] |= bit
+        ecc[i] = 0
+        reached[i] = 1
+        if dist != NULL:
+            dist[i * n_nodes + u] = 0
+
+    level = 0
+    while n_front != 0:
+        level += 1
+
+        # Push the frontier of every source over the edges at once
+        n_touched = 0
+        if n_front * DENSE_FRONT < n_nodes:
+            for k in range(n_front):
+                u = front[k]
+                x = visit[u]
+                visit[u] = 0
+                start = indptr[u]
+                end   = indptr[u + 1]
+                for j in range(start, end):
+                    v = indices[j]
+                    if nxt[v] == 0:
+                        touched[n_touched] = v
+                        n_touched += 1
+                    nxt[v] |= x
+        else:
+            # Large frontiers are cheaper to scan in node order
+            for u in range(n_nodes):
+                x = visit[u]
+                if x == 0:
+                    continue
+                visit[u] = 0
+                start = indptr[u]
+                end   = indptr[u + 1]
+                for j in range(start, end):
+                    v = indices[j]
+                    nxt[v] |= x
+            for v in range(n_nodes):
+                if nxt[v] != 0:
+                    touched[n_touched] = v
+                    n_touched += 1
+
+        # Keep the newly seen bits as the next frontier
+        n_front = 0
+        for k in range(n_touched):
+            v = touched[k]
+            x = nxt[v] & ~seen[v]
+            nxt[v] = 0
+            if x == 0:
+                continue
+            front[n_front] = v
+            n_front += 1
+            visit[v] = x
+            seen[v] |= x
+            while x != 0:
+                i = __builtin_ctzll(x)
+                x &= x - 1
+                ecc[i] = level
+                reached[i] += 1
+                if dist != NULL:
+                    dist[i * n_nodes + v] = level
+
+def _out_arrays(object G):
+    """
+    Return the index pointers and indices used for forward traversal.
+    """
+
+    if hasattr(G, "s_indptr"):
+        return G.s_indptr, G.s_indices
+    return G.n_indptr, G.n_indices
+
+def _ms_run(object G, object sources, bint distances, object out=None,
+            int threads=1, bint reverse=False):
+    """
+    Run the bit parallel BFS over sources in batches of 64.
+
+    Batches are spread over threads, each with its own bit sets and
+    frontier lists. The distances are written to out if given. Directed
+    graphs are traversed along the predecessors if reverse. Raises
+    MemoryError if a thread cannot allocate its buffers.
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs, ecc, reached
+        ndarray[uint32_t, ndim=2] dist
+        uint64_t *p_indptr
+        uint32_t *p_indices
+        uint32_t *p_srcs
+        uint32_t *p_ecc
+        uint32_t *p_reached
+        uint32_t *p_dist
+        uint64_t *bits
+        uint32_t *lists
+        size_t b, n_nodes, n_sources, n_batches
+        bint failed = False
+        bint *p_failed = &failed
+
+    if reverse:
+        indptr, indices = _in_arrays(G)
+    else:
+        indptr, indices = _out_arrays(G)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes   = G.n_nodes
+    n_sources = srcs.shape[0]
+
+    if n_sources != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    ecc     = np.empty(n_sources, dtype="u4")
+    reached = np.empty(n_sources, dtype="u4")
+
+    dist = None
+    p_dist = NULL
+    if distances:
+        if out is None:
+            out = np.empty((n_sources, n_nodes), dtype="u4")
+        if out.shape != (n_sources, n_nodes) or out.dtype != np.uint32 or \
+           not out.flags.c_contiguous:
+            raise ValueError("out must be a C contiguous uint32 array of "
+                             "shape (len(sources), n_nodes)")
+        dist = out
+        dist.fill((2 ** 32) - 1)
+        p_dist = <uint32_t *> dist.data
+
+    p_indptr  = <uint64_t *> indptr.data
+    p_indices = <uint32_t *> indices.data
+    p_srcs    = <uint32_t *> srcs.data
+    p_ecc     = <uint32_t *> ecc.data
+    p_reached = <uint32_t *> reached.data
+    n_batches = (n_sources + 63) // 64
+
+    with nogil, parallel(num_threads=threads):
+        bits  = <uint64_t *> calloc(3 * n_nodes, sizeof(uint64_t))
+        lists = <uint32_t *> malloc(2 * n_nodes * sizeof(uint32_t))
+        if bits == NULL or lists == NULL:
+            p_failed[0] = True
+            free(bits)
+            free(lists)
+            bits = NULL
+            lists = NULL
+        for b in prange(n_batches, schedule="dynamic", chunksize=1):
+            if bits == NULL:
+                continue
+            _ms_batch(p_indptr, p_indices, n_nodes, p_srcs + 64 * b,
+                      min(64, n_sources - 64 * b), bits, bits + n_nodes,
+                      bits + 2 * n_nodes, lists, lists + n_nodes,
+                      p_ecc + 64 * b, p_reached + 64 * b,
+                      NULL if p_dist == NULL else
+                      p_dist + 64 * b * n_nodes)
+        free(bits)
+        free(lists)
+
+    if failed:
+        raise MemoryError()
+    return ecc, reached, dist
+
+def ms_eccentricity(object G, object sources, int threads=1,
+                    bint reverse=False):
+    """
+    Compute the eccentricity of many sources with a bit parallel BFS.
+
+    Returns two uint32 arrays, the eccentricity of every source within
+    its reachable set and the number of nodes reached from it.
+    Sources are processed in batches of 64. A level only inspects the
+    edges out of its frontier, shared by all sources of the batch, so
+    an edge is inspected at most once per source and usually once per
+    batch.
+
+    G       - the graph, directed graphs are traversed along successors
+    sources - array of source nodes
+    threads - number of threads to use
+    reverse - traverse directed graphs along predecessors instead
+    """
+
+    ecc, reached, _ = _ms_run(G, sources, False, None, threads, reverse)
+    return ecc, reached
+
+def ms_distances(object G, object sources, object out=None, int threads=1):
+    """
+    Compute the BFS distances of many sources with a bit parallel BFS.
+
+    Returns a uint32 array of shape (len(sources), G.n_nodes) where row i
+    holds the distances from sources[i]. Unreachable nodes are at
+    distance (2 ** 32) - 1.
+
+    G       - the graph, directed graphs are traversed along successors
+    sources - array of source nodes
+    out     - array to write the distances to, allocated if None
+    threads - number of threads to use
+    """
+
+    _, _, dist = _ms_run(G, sources, True, out, threads)
+    return dist
+
+cdef size_t _row(uint64_t *indptr, uint32_t *indices, size_t n_nodes,
+                 uint32_t s, uint32_t *dist, uint32_t *pred,
+                 uint32_t *queue) nogil:
+    """
+    Run a BFS from s filling the rows dist and pred of an APSP matrix.
+
+    Returns # reached nodes, queue holds them in the order of the BFS.
+    """
+
+    cdef:
+        uint32_t u, v, unseen = (2 ** 32) - 1
+        size_t j, front, rear
+
+    for v in range(n_nodes):
+        dist[v] = unseen
+        pred[v] = unseen
+
+    dist[s] = 0
+    queue[0] = s
+    front, rear = 0, 1
+    while front != rear:
+        u = queue[front]
+        front += 1
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if dist[v] == unseen:
+                dist[v] = dist[u] + 1
+                pred[v] = u
+                queue[rear] = v
+                rear += 1
+
+    return rear
+
+def rows(object G, object sources, object dist, object pred, int threads=1):
+    """
+    Compute the BFS distances and predecessors of many sources.
+
+    Row i of dist and pred, uint32 arrays of shape
+    (len(sources), G.n_nodes), is filled from a BFS from sources[i], with
+    (2 ** 32) - 1 for unreachable nodes and the predecessor of sources.
+    Rows are spread over threads, each with its own queue.
+
+    G       - the graph, directed graphs are traversed along successors
+    sources - array of source nodes
+    dist    - array to write the distances to
+    pred    - array to write the predecessors to
+    threads - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs
+        ndarray[uint32_t, ndim=2] d, p
+        uint64_t *p_indptr
+        uint32_t *p_indices
+        uint32_t *p_srcs
+        uint32_t *p_dist
+        uint32_t *p_pred
+        uint32_t *queue
+        size_t i, n_nodes, n_sources
+        bint failed = False
+        bint *p_failed = &failed
+
+    indptr, indices = _out_arrays(G)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes   = G.n_nodes
+    n_sources = srcs.shape[0]
+
+    if n_sources != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+    for out in (dist, pred):
+        if out.shape != (n_sources, n_nodes) or out.dtype != np.uint32 or \
+           not out.flags.c_contiguous:
+            raise ValueError("dist and pred must be C contiguous uint32 "
+                             "arrays of shape (len(sources), n_nodes)")
+    d, p = dist, pred
+
+    p_indptr  = <uint64_t *> indptr.data
+    p_indices = <uint32_t *> indices.data
+    p_srcs    = <uint32_t *> srcs.data
+    p_dist    = <uint32_t *> d.data
+    p_pred    = <uint32_t *> p.data
+
+    with nogil, parallel(num_threads=threads):
+        queue = <uint32_t *> malloc(n_nodes * sizeof(uint32_t))
+        if queue == NULL:
+            p_failed[0] = True
+        for i in prange(n_sources, schedule="dynamic", chunksize=1):
+            if queue == NULL:
+                continue
+            _row(p_indptr, p_indices, n_nodes, p_srcs[i],
+                 p_dist + i * n_nodes, p_pred + i * n_nodes, queue)
+        free(queue)
+
+    if failed:
+        raise MemoryError()
+
+def levels(object G, size_t s, bint reverse=False):
+    """
+    Run a BFS from s.
+
+    Returns three uint32 arrays: order, the reached nodes in the order of
+    the BFS so the nodes of a level are contiguous, dist, the distances
+    from s, and pred, the predecessors in the BFS tree. Both are
+    (2 ** 32) - 1 for unreachable nodes, pred also for s.
+
+    G       - the graph
+    s       - the source node
+    reverse - follow the edges of a directed graph backwards
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, dist, pred, queue
+        size_t n_nodes = G.n_nodes, n_reached
+
+    if s >= n_nodes:
+        raise ValueError("Invalid source node")
+
+    if reverse:
+        indptr, indices = _in_arrays(G)
+    else:
+        indptr, indices = _out_arrays(G)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+
+    dist  = np.empty(n_nodes, dtype="u4")
+    pred  = np.empty(n_nodes, dtype="u4")
+    queue = np.empty(n_nodes, dtype="u4")
+
+    with nogil:
+        n_reached = _row(<uint64_t *> indptr.data, <uint32_t *> indices.data,
+                         n_nodes, s, <uint32_t *> dist.data,
+                         <uint32_t *> pred.data, <uint32_t *> queue.data)
+
+    return queue[:n_reached], dist, pred
+
+def parallel(object G, size_t s, size_t maxdepth=(2 ** 32) - 1,
+             int threads=1):
+    """
+    Run a level synchronous BFS with the levels expanded in parallel.
+
+    Returns bfs_indptr and bfs_indices in the same layout as bfs_all of
+    the traversal modules. Nodes inside a level appear in no particular
+    order.
+
+    Threads claim nodes with a compare and swap on the distance array and
+    collect them in a local queue, which is flushed into the shared next
+    level with an atomic fetch and add once it fills up. The GIL is
+    released while a level is being expanded.
+
+    G        - the graph, directed graphs are traversed along successors
+    s        - the source node
+    maxdepth - maximum depth of the traversal
+    threads  - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, dist, bfs_indptr, bfs_indices
+        uint64_t *p_indptr
+        uint32_t *p_indices
+        uint32_t *p_dist
+        uint32_t *queue
+        uint32_t *local
+        size_t *n_local
+        uint32_t u, v, level, unseen = (2 ** 32) - 1
+        size_t i, j, n_nodes, lo, hi, rear, depth, pos, tail
+        bint failed = False
+        bint *p_failed = &failed
+
+    indptr, indices = _out_arrays(G)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    n_nodes = G.n_nodes
+
+    dist = np.empty(n_nodes, dtype="u4")
+    dist.fill((2 ** 32) - 1)
+
+    # bfs_indices doubles as the queue, a level is a slice of it
+    bfs_indices = np.empty(n_nodes, dtype="u4")
+    bfs_indptr  = np.empty(n_nodes + 1, dtype="u4")
+
+    p_indptr  = <uint64_t *> indptr.data
+    p_indices = <uint32_t *> indices.data
+    p_dist    = <uint32_t *> dist.data
+    queue     = <uint32_t *> bfs_indices.data
+
+    queue[0] = s
+    p_dist[s] = 0
+    bfs_indptr[0] = 0
+
+    lo, hi = 0, 1
+    depth = 0
+
+    while True:
+        if depth == maxdepth:
+            bfs_indptr[depth + 1] = hi
+            depth += 1
+            break
+
+        rear = hi
+        level = depth + 1
+        with nogil, parallel(num_threads=threads):
+            local = <uint32_t *> malloc(LOCAL_QUEUE * sizeof(uint32_t))
+            n_local = <size_t *> malloc(sizeof(size_t))
+            if local == NULL or n_local == NULL:
+                p_failed[0] = True
+            else:
+                n_local[0] = 0
+
+            for i in prange(lo, hi, schedule="dynamic", chunksize=64):
+                if local == NULL or n_local == NULL:
+                    continue
+                u = queue[i]
+                for j in range(p_indptr[u], p_indptr[u + 1]):
+                    v = p_indices[j]
+                    if p_dist[v] != unseen:
+                        continue
+                    if not __sync_bool_compare_and_swap(&p_dist[v],
+                                                        unseen, level):
+                        continue
+
+                    # Flush the local queue into the next level
+                    if n_local[0] == LOCAL_QUEUE:
+                        pos = __sync_fetch_and_add(&rear, n_local[0])
+                        memcpy(queue + pos, local,
+                               n_local[0] * sizeof(uint32_t))
+                        n_local[0] = 0
+                    local[n_local[0]] = v
+                    n_local[0] = n_local[0] + 1
+
+            if local != NULL and n_local != NULL and n_local[0] != 0:
+                tail = __sync_fetch_and_add(&rear, n_local[0])
+                memcpy(queue + tail, local, n_local[0] * sizeof(uint32_t))
+            free(local)
+            free(n_local)
+
+        if failed:
+            raise MemoryError()
+        bfs_indptr[depth + 1] = hi
+        depth += 1
+        lo, hi = hi, rear
+        if lo == hi:
+            break
+
+    return bfs_indptr[:depth + 1], bfs_indices[:hi]
+
+def _in_arrays(object G):
+    """
+    Return the index pointers and indices used for backward traversal.
+    """
+
+    if hasattr(G, "p_indptr"):
+        return G.p_indptr, G.p_indices
+    return G.n_indptr, G.n_indices
+
+def bidirectional(object G, size_t s, size_t t, object ctx, object rctx,
+                  size_t maxdepth=(2 ** 32) - 1):
+    """
+    Find a shortest path from s to t by searching from both ends.
+
+    Returns a uint32 array with the nodes of the path from s to t or None
+    if t is not within maxdepth hops of s.
+
+    A forward search along the successors and a backward search along
+    the predecessors are grown a level at a time, always expanding the
+    side whose frontier has fewer edges to inspect. The level in which
+    the two searches first meet contains the shortest connecting edge.
+    ctx and rctx are two TraversalContexts reset for the query, only the
+    nodes reached by each search are written.
+
+    G        - the graph, directed graphs use the predecessors backwards
+    s        - the source node
+    t        - the target node
+    ctx      - context of the search from s
+    rctx     - context of the search from t
+    maxdepth - maximum length of the path
+    """
+
+    cdef:
+        ndarray[uint64_t] f_indptr, b_indptr
+        ndarray[uint32_t] f_indices, b_indices, f_stamp, b_stamp
+        ndarray[uint32_t] f_dist, b_dist, f_pred, b_pred, f_queue, b_queue
+        ndarray[uint32_t] path
+        uint32_t u, v, meet_u, meet_v, unseen = (2 ** 32) - 1
+        uint32_t f_epoch = ctx.epoch, b_epoch = rctx.epoch
+        size_t i, j, index, best, length
+        size_t f_lo, f_hi, f_rear, b_lo, b_hi, b_rear, f_depth, b_depth
+        uint64_t f_edges, b_edges
+
+    f_indptr, f_indices = _out_arrays(G)
+    b_indptr, b_indices = _in_arrays(G)
+
+    if s == t:
+        return np.array([s], dtype="u4")
+
+    f_stamp, f_dist, f_pred, f_queue = ctx.stamp, ctx.dist, ctx.pred, \
+                                       ctx.queue
+    b_stamp, b_dist, b_pred, b_queue = rctx.stamp, rctx.dist, rctx.pred, \
+                                       rctx.queue
+
+    f_stamp[s], f_dist[s], f_queue[0] = f_epoch, 0, s
+    b_stamp[t], b_dist[t], b_queue[0] = b_epoch, 0, t
+    f_lo, f_hi, b_lo, b_hi = 0, 1, 0, 1
+    f_depth = b_depth = 0
+
+    best = unseen
+    meet_u = meet_v = 0
+
+    while f_lo != f_hi and b_lo != b_hi and f_depth + b_depth < maxdepth:
+
+        # Count the edges each side would inspect
+        f_edges = b_edges = 0
+        for i in range(f_lo, f_hi):
+            u = f_queue[i]
+            f_edges += f_indptr[u + 1] - f_indptr[u]
+        for i in range(b_lo, b_hi):
+            u = b_queue[i]
+            b_edges += b_indptr[u + 1] - b_indptr[u]
+
+        if f_edges <= b_edges:
+            f_rear = f_hi
+            for i in range(f_lo, f_hi):
+                u = f_queue[i]
+                for j in range(f_indptr[u], f_indptr[u + 1]):
+                    v = f_indices[j]
+                    if f_stamp[v] != f_epoch:
+                        f_stamp[v] = f_epoch
+                        f_dist[v] = f_depth + 1
+                        f_pred[v] = u
+                        f_queue[f_rear] = v
+                        f_rear += 1
+                    if b_stamp[v] == b_epoch:
+                        length = f_depth + 1 + b_dist[v]
+                        if length < best:
+                            best, meet_u, meet_v = length, u, v
+            f_lo, f_hi = f_hi, f_rear
+            f_depth += 1
+        else:
+            b_rear = b_hi
+            for i in range(b_lo, b_hi):
+                v = b_queue[i]
+                for j in range(b_indptr[v], b_indptr[v + 1]):
+                    u = b_indices[j]
+                    if b_stamp[u] != b_epoch:
+                        b_stamp[u] = b_epoch
+                        b_dist[u] = b_depth + 1
+                        b_pred[u] = v
+                        b_queue[b_rear] = u
+                        b_rear += 1
+                    if f_stamp[u] == f_epoch:
+                        length = f_dist[u] + 1 + b_depth
+                        if length < best:
+                            best, meet_u, meet_v = length, u, v
+            b_lo, b_hi = b_hi, b_rear
+            b_depth += 1
+
+        if best != unseen:
+            break
+
+    if best == unseen or best > maxdepth:
+        return None
+
+    # Walk back to s from meet_u and forward to t from meet_v
+    path = np.empty(best + 1, dtype="u4")
+    index = f_dist[meet_u]
+    u = meet_u
+    while True:
+        path[index] = u
+        if u == s:
+            break
+        index -= 1
+        u = f_pred[u]
+
+    index = f_dist[meet_u] + 1
+    v = meet_v
+    while True:
+        path[index] = v
+        if v == t:
+            break
+        index += 1
+        v = b_pred[v]
+
+    return path
+
+cdef struct _Buf:
+    uint32_t *queue
+    uint32_t *hop
+    size_t cap
+
+# Returned by _khop when a buffer cannot grow
+cdef size_t NO_MEMORY = <size_t> -1
+
+cdef bint _grow(_Buf *buf) nogil:
+    """
+    Double the capacity of a malloc'd buffer, return False on failure.
+    """
+
+    cdef:
+        size_t cap = buf.cap * 2 if buf.cap != 0 else 1024
+        uint32_t *queue
+        uint32_t *hop
+
+    queue = <uint32_t *> realloc(buf.queue, cap * sizeof(uint32_t))
+    if queue == NULL:
+        return False
+    buf.queue = queue
+    hop = <uint32_t *> realloc(buf.hop, cap * sizeof(uint32_t))
+    if hop == NULL:
+        return False
+    buf.hop = hop
+    buf.cap = cap
+    return True
+
+cdef size_t _khop(uint64_t *indptr0, uint32_t *indices0,
+                  uint64_t *indptr1, uint32_t *indices1,
+                  uint32_t *seeds, size_t n_seeds, size_t k,
+                  uint32_t *stamp, uint32_t epoch,
+                  _Buf *out, size_t base) nogil:
+    """
+    Collect the nodes within k hops of the seeds into out.
+
+    Nodes are appended to out.queue and out.hop from index base, the
+    buffers grow when full. Buffers of G.n_nodes - base entries never
+    need to, as every node is collected at most once. Nodes are stamped
+    with epoch when queued. The second pair of arrays is also traversed
+    unless indptr1 is NULL. Returns # nodes collected, or NO_MEMORY.
+    """
+
+    cdef:
+        uint32_t u, v, h
+        size_t i, j, l, front, rear
+        uint64_t *indptr
+        uint32_t *indices
+
+    rear = base
+    for i in range(n_seeds):
+        u = seeds[i]
+        if stamp[u] != epoch:
+            stamp[u] = epoch
+            if rear == out.cap and not _grow(out):
+                return NO_MEMORY
+            out.queue[rear] = u
+            out.hop[rear] = 0
+            rear += 1
+
+    front = base
+    while front != rear:
+        u = out.queue[front]
+        h = out.hop[front]
+        front += 1
+
+        # The queue is ordered by hop
+        if h == k:
+            break
+
+        for l in range(2):
+            if l == 0:
+                indptr, indices = indptr0, indices0
+            else:
+                indptr, indices = indptr1, indices1
+            if indptr == NULL:
+                break
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                if stamp[v] == epoch:
+                    continue
+                stamp[v] = epoch
+                if rear == out.cap and not _grow(out):
+                    return NO_MEMORY
+                out.queue[rear] = v
+                out.hop[rear] = h + 1
+                rear += 1
+
+    return rear - base
+
+def reach(object G, size_t s, object ctx, bint reverse=False):
+    """
+    Run a BFS from s on a traversal context.
+
+    Returns two uint32 arrays, views of the context buffers valid until
+    its next query: order, the reached nodes in the order of the BFS, and
+    hop, the distance from s of each of them. ctx is a TraversalContext
+    which was reset for the query, only the reached nodes are written.
+
+    G       - the graph
+    s       - the source node
+    ctx     - the traversal context
+    reverse - follow the edges of a directed graph backwards
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, stamp, queue, hop
+        uint32_t source = s, epoch = ctx.epoch
+        size_t n_reached
+        _Buf out
+
+    if s >= G.n_nodes:
+        raise ValueError("Invalid source node")
+
+    if reverse:
+        indptr, indices = _in_arrays(G)
+    else:
+        indptr, indices = _out_arrays(G)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+
+    stamp = ctx.stamp
+    queue = ctx.queue
+    hop   = ctx.dist
+
+    out.queue = <uint32_t *> queue.data
+    out.hop   = <uint32_t *> hop.data
+    out.cap   = G.n_nodes
+    with nogil:
+        n_reached = _khop(<uint64_t *> indptr.data,
+                          <uint32_t *> indices.data, NULL, NULL, &source, 1,
+                          (2 ** 32) - 1, <uint32_t *> stamp.data, epoch,
+                          &out, 0)
+
+    return queue[:n_reached], hop[:n_reached]
+
+def khop(object G, object seeds, size_t k, object direction="out",
+         bint union=False, int threads=1):
+    """
+    Find the k hop neighbourhoods of many seeds.
+
+    Returns three arrays forming a CSR structure: uint64 indptr, uint32
+    indices and uint32 hop. The neighbourhood of seeds[i] is
+    indices[indptr[i]:indptr[i + 1]] with the seed itself first at hop 0,
+    and hop holds the distance of every node from the seed. With union
+    set there is a single row holding every node within k hops of any seed
+    and its distance to the closest seed.
+
+    Seeds are spread over threads with the GIL released. Every thread
+    stamps the nodes it touches in its own array, only the nodes stamped
+    by the seed being searched are considered touched. Each search
+    appends its nodes to a growable buffer of its thread, so sizes follow
+    the neighbourhoods found, and the rows are copied into the CSR
+    arrays once all seeds are done.
+
+    G         - the graph
+    seeds     - array of seed nodes
+    k         - # hops
+    direction - "out", "in" or "both" for directed graphs
+    union     - merge the neighbourhoods of all seeds
+    threads   - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr0, indptr1, indptr, offset
+        ndarray[uint32_t] indices0, indices1, srcs, indices, hop
+        ndarray[uint32_t] stamps, owner
+        uint64_t *p_indptr0
+        uint64_t *p_indptr1 = NULL
+        uint32_t *p_indices0
+        uint32_t *p_indices1 = NULL
+        uint32_t *p_seeds
+        uint64_t *p_indptr
+        uint64_t *p_offset
+        uint32_t *p_stamps
+        uint32_t *p_owner
+        uint32_t *p_indices
+        uint32_t *p_hop
+        size_t *used
+        _Buf *bufs
+        _Buf out
+        size_t i, n, n_nodes, n_seeds, tid, count
+
+    if direction == "out":
+        indptr0, indices0 = _out_arrays(G)
+    elif direction == "in":
+        indptr0, indices0 = _in_arrays(G)
+    elif direction == "both":
+        indptr0, indices0 = _out_arrays(G)
+        indptr1, indices1 = _in_arrays(G)
+        if indptr1 is not indptr0:
+            indptr1  = np.ascontiguousarray(indptr1)
+            indices1 = np.ascontiguousarray(indices1)
+            p_indptr1  = <uint64_t *> indptr1.data
+            p_indices1 = <uint32_t *> indices1.data
+    else:
+        raise ValueError("direction must be one of out, in or both")
+
+    indptr0  = np.ascontiguousarray(indptr0)
+    indices0 = np.ascontiguousarray(indices0)
+    srcs     = np.ascontiguousarray(seeds, dtype="u4")
+    n_nodes  = G.n_nodes
+    n_seeds  = srcs.shape[0]
+    if n_seeds != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid seed node found in seeds")
+
+    p_indptr0  = <uint64_t *> indptr0.data
+    p_indices0 = <uint32_t *> indices0.data
+    p_seeds    = <uint32_t *> srcs.data
+
+    if union:
+        stamps = np.zeros(n_nodes, dtype="u4")
+        indices = np.empty(n_nodes, dtype="u4")
+        hop = np.empty(n_nodes, dtype="u4")
+        out.queue = <uint32_t *> indices.data
+        out.hop   = <uint32_t *> hop.data
+        out.cap   = n_nodes
+        with nogil:
+            count = _khop(p_indptr0, p_indices0, p_indptr1, p_indices1,
+                          p_seeds, n_seeds, k, <uint32_t *> stamps.data, 1,
+                          &out, 0)
+        indptr = np.array([0, count], dtype="u8")
+        return indptr, indices[:count].copy(), hop[:count].copy()
+
+    # Stamps and an output buffer per thread, shared by its seeds. The
+    # extra entry of used flags a failed allocation.
+    threads = max(threads, 1)
+    stamps = np.zeros(threads * n_nodes, dtype="u4")
+    p_stamps = <uint32_t *> stamps.data
+    bufs = <_Buf *> calloc(threads, sizeof(_Buf))
+    used = <size_t *> calloc(threads + 1, sizeof(size_t))
+    if bufs == NULL or used == NULL:
+        free(bufs)
+        free(used)
+        raise MemoryError()
+
+    # Where the row of every seed went
+    indptr = np.zeros(n_seeds + 1, dtype="u8")
+    offset = np.empty(n_seeds, dtype="u8")
+    owner  = np.empty(n_seeds, dtype="u4")
+    p_indptr = <uint64_t *> indptr.data
+    p_offset = <uint64_t *> offset.data
+    p_owner  = <uint32_t *> owner.data
+
+    try:
+        with nogil, parallel(num_threads=threads):
+            tid = threadid()
+            for i in prange(n_seeds, schedule="dynamic", chunksize=16):
+                n = _khop(p_indptr0, p_indices0, p_indptr1, p_indices1,
+                          p_seeds + i, 1, k, p_stamps + tid * n_nodes,
+                          i + 1, bufs + tid, used[tid])
+                if n == NO_MEMORY:
+                    n = 0
+                    used[threads] = 1
+                p_indptr[i + 1] = n
+                p_offset[i] = used[tid]
+                p_owner[i] = tid
+                used[tid] += n
+        if used[threads]:
+            raise MemoryError()
+
+        np.cumsum(indptr, out=indptr)
+        indices = np.empty(indptr[n_seeds], dtype="u4")
+        hop     = np.empty(indptr[n_seeds], dtype="u4")
+        p_indices = <uint32_t *> indices.data
+        p_hop     = <uint32_t *> hop.data
+
+        # Compact the rows into the CSR arrays
+        with nogil:
+            for i in prange(n_seeds, num_threads=threads, schedule="static"):
+                n = p_indptr[i + 1] - p_indptr[i]
+                memcpy(p_indices + p_indptr[i],
+                       bufs[p_owner[i]].queue + p_offset[i],
+                       n * sizeof(uint32_t))
+                memcpy(p_hop + p_indptr[i],
+                       bufs[p_owner[i]].hop + p_offset[i],
+                       n * sizeof(uint32_t))
+    finally:
+        for i in range(threads):
+            free(bufs[i].queue)
+            free(bufs[i].hop)
+        free(bufs)
+        free(used)
+
+    return indptr, indices, hop
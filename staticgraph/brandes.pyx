@@ -0,0 +1,370 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+#cython: cdivision=True
+"""
+Compiled Brandes kernels for shortest path betweenness.
+"""
+
+from functools import partial
+from random import sample
+
+import numpy as np
+import staticgraph.executor as executor
+from numpy cimport uint64_t, uint32_t, float64_t, ndarray
+from libc.stdlib cimport malloc, free
+from cython.parallel cimport parallel, prange, threadid
+
+# Distance of unreachable nodes
+cdef double UNREACHED = (2 ** 64) - 1
+
+# Heap position of settled nodes
+cdef uint32_t SETTLED = (2 ** 32) - 1
+
+def _arrays(object G, bint directed):
+    """
+    Return the index pointers, indices and weights of the out edges.
+
+    weights is None for unweighted graphs.
+    """
+
+    if directed:
+        return G.s_indptr, G.s_indices, getattr(G, "s_weights", None)
+    return G.n_indptr, G.n_indices, getattr(G, "weights", None)
+
+cdef inline void _sift_up(uint32_t *heap, uint32_t *pos, double *dist,
+                          size_t i) nogil:
+    """
+    Move heap[i] up until its parent is not farther.
+    """
+
+    cdef:
+        uint32_t v = heap[i]
+        double d = dist[v]
+        size_t parent
+
+    while i > 0:
+        parent = (i - 1) >> 1
+        if dist[heap[parent]] <= d:
+            break
+        heap[i] = heap[parent]
+        pos[heap[i]] = i
+        i = parent
+    heap[i] = v
+    pos[v] = i
+
+cdef inline void _sift_down(uint32_t *heap, uint32_t *pos, double *dist,
+                            size_t i, size_t size) nogil:
+    """
+    Move heap[i] down until no child is nearer.
+    """
+
+    cdef:
+        uint32_t v = heap[i]
+        double d = dist[v]
+        size_t c
+
+    while True:
+        c = 2 * i + 1
+        if c >= size:
+            break
+        if c + 1 < size and dist[heap[c + 1]] < dist[heap[c]]:
+            c += 1
+        if dist[heap[c]] >= d:
+            break
+        heap[i] = heap[c]
+        pos[heap[i]] = i
+        i = c
+    heap[i] = v
+    pos[v] = i
+
+cdef size_t _bfs(uint64_t *indptr, uint32_t *indices, uint32_t s,
+                 double *dist, double *sigma, uint32_t *order) nogil:
+    """
+    Count the shortest paths from s with a BFS.
+
+    Reached nodes are written to order by distance.
+    Returns # reached nodes.
+    """
+
+    cdef:
+        uint32_t u, v
+        size_t j, head = 0, rear = 1
+
+    order[0] = s
+    dist[s] = 0
+    sigma[s] = 1
+    while head < rear:
+        u = order[head]
+        head += 1
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if dist[v] == UNREACHED:
+                dist[v] = dist[u] + 1
+                order[rear] = v
+                rear += 1
+            if dist[v] == dist[u] + 1:
+                sigma[v] += sigma[u]
+    return rear
+
+cdef size_t _dijkstra(uint64_t *indptr, uint32_t *indices, double *weights,
+                      uint32_t s, double *dist, double *sigma,
+                      uint32_t *order, uint32_t *heap, uint32_t *pos) nogil:
+    """
+    Count the shortest paths from s with Dijkstra's algorithm.
+
+    Settled nodes are written to order by distance.
+    Returns # settled nodes.
+    """
+
+    cdef:
+        uint32_t u, v
+        size_t j, size = 1, n_settled = 0
+        double dv
+
+    heap[0] = s
+    pos[s] = 0
+    dist[s] = 0
+    sigma[s] = 1
+    while size != 0:
+        u = heap[0]
+        size -= 1
+        if size != 0:
+            heap[0] = heap[size]
+            pos[heap[0]] = 0
+            _sift_down(heap, pos, dist, 0, size)
+        pos[u] = SETTLED
+        order[n_settled] = u
+        n_settled += 1
+
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if pos[v] == SETTLED and dist[v] != UNREACHED:
+                continue
+            dv = dist[u] + weights[j]
+            if dv < dist[v]:
+                if dist[v] == UNREACHED:
+                    heap[size] = v
+                    pos[v] = size
+                    size += 1
+                dist[v] = dv
+                sigma[v] = sigma[u]
+                _sift_up(heap, pos, dist, pos[v])
+            elif dv == dist[v]:
+                sigma[v] += sigma[u]
+    return n_settled
+
+cdef void _accumulate(uint64_t *indptr, uint32_t *indices, double *weights,
+                      uint32_t s, size_t n_reached, double *dist,
+                      double *sigma, double *delta, uint32_t *order,
+                      double *node_acc, double *edge_acc) nogil:
+    """
+    Add the dependencies of s to the node and edge accumulators.
+
+    The nodes are visited farthest first, the children of a node in the
+    shortest path DAG are the heads of its tight out edges.
+    edge_acc may be NULL.
+    """
+
+    cdef:
+        uint32_t w, x
+        size_t i = n_reached, j
+        double c, wt = 1
+
+    while i != 0:
+        i -= 1
+        w = order[i]
+        for j in range(indptr[w], indptr[w + 1]):
+            x = indices[j]
+            if weights != NULL:
+                wt = weights[j]
+            if x == w or dist[x] != dist[w] + wt:
+                continue
+            c = sigma[w] / sigma[x] * (1 + delta[x])
+            delta[w] += c
+            if edge_acc != NULL:
+                edge_acc[j] += c
+        if w != s:
+            node_acc[w] += delta[w]
+
+def dependencies(object G, object sources, bint directed=False,
+                 bint edges=False, int threads=1):
+    """
+    Compute the summed Brandes dependencies of many sources.
+
+    Returns node, a float64 array of length G.n_nodes, and edge, a
+    float64 array with one entry per position of the index array, or
+    None unless edges is set. node[v] sums over the sources s the
+    fraction of the shortest paths from s through v, edge[j] the same
+    for the j-th edge of the index array.
+
+    Unweighted graphs count the paths with a BFS, weighted graphs with
+    Dijkstra's algorithm, edges of zero weight are not supported. Each
+    thread owns its search buffers and accumulators, which are summed
+    once all sources are done.
+
+    G        - the graph, weighted or not
+    sources  - array of source nodes
+    directed - G is a directed graph
+    edges    - also compute the edge dependencies
+    threads  - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs
+        ndarray[float64_t] weights
+        ndarray[float64_t, ndim=2] node_acc, edge_acc
+        uint64_t *p_indptr
+        uint32_t *p_indices
+        double *p_weights
+        uint32_t *p_srcs
+        double *p_node
+        double *p_edge
+        double *buf
+        double *dist
+        double *sigma
+        double *delta
+        double *t_node
+        double *t_edge
+        uint32_t *ubuf
+        uint32_t *order
+        uint32_t *heap
+        uint32_t *pos
+        size_t i, j, v, n_nodes, n_sources, n_slots, n_reached
+        bint failed = False
+        bint *p_failed = &failed
+
+    indptr, indices, wts = _arrays(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes   = G.n_nodes
+    n_sources = srcs.shape[0]
+    n_slots   = indices.shape[0]
+    threads   = max(threads, 1)
+
+    if n_sources != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    node_acc = np.zeros((threads, n_nodes), dtype="f8")
+    edge_acc = np.zeros((threads, n_slots if edges else 0), dtype="f8")
+
+    p_indptr  = <uint64_t *> indptr.data
+    p_indices = <uint32_t *> indices.data
+    p_srcs    = <uint32_t *> srcs.data
+    p_node    = <double *> node_acc.data
+    p_edge    = <double *> edge_acc.data if edges else NULL
+    p_weights = NULL
+    if wts is not None:
+        weights = np.ascontiguousarray(wts, dtype="f8")
+        p_weights = <double *> weights.data
+
+    with nogil, parallel(num_threads=threads):
+        buf  = <double *> malloc(3 * n_nodes * sizeof(double))
+        ubuf = <uint32_t *> malloc(3 * n_nodes * sizeof(uint32_t))
+        if buf == NULL or ubuf == NULL:
+            p_failed[0] = True
+            free(buf)
+            free(ubuf)
+            buf = NULL
+            ubuf = NULL
+        else:
+            dist  = buf
+            sigma = buf + n_nodes
+            delta = buf + 2 * n_nodes
+            order = ubuf
+            heap  = ubuf + n_nodes
+            pos   = ubuf + 2 * n_nodes
+            for v in range(n_nodes):
+                dist[v]  = UNREACHED
+                sigma[v] = 0
+                delta[v] = 0
+                pos[v]   = SETTLED
+
+        for i in prange(n_sources, schedule="dynamic", chunksize=1):
+            if buf == NULL:
+                continue
+            t_node = p_node + threadid() * n_nodes
+            t_edge = NULL
+            if p_edge != NULL:
+                t_edge = p_edge + threadid() * n_slots
+
+            if p_weights == NULL:
+                n_reached = _bfs(p_indptr, p_indices, p_srcs[i], dist,
+                                 sigma, order)
+            else:
+                n_reached = _dijkstra(p_indptr, p_indices, p_weights,
+                                      p_srcs[i], dist, sigma, order, heap,
+                                      pos)
+            _accumulate(p_indptr, p_indices, p_weights, p_srcs[i],
+                        n_reached, dist, sigma, delta, order, t_node,
+                        t_edge)
+
+            # Only the reached nodes need to be cleared
+            for j in range(n_reached):
+                dist[order[j]]  = UNREACHED
+                sigma[order[j]] = 0
+                delta[order[j]] = 0
+                pos[order[j]]   = SETTLED
+
+        free(buf)
+        free(ubuf)
+
+    if failed:
+        raise MemoryError()
+    node = node_acc.sum(axis=0)
+    if not edges:
+        return node, None
+    return node, edge_acc.sum(axis=0)
+
+def sampled(object G, bint directed=False, object k=None,
+            object adaptive=None, bint edges=False, int threads=1,
+            int workers=1, bint processes=False):
+    """
+    Sum the dependencies of all or of a sample of the sources.
+
+    Returns node and edge as from dependencies and the number of sources
+    used. With k the sources are k nodes drawn uniformly without
+    replacement. With adaptive, a constant c, they are drawn in batches
+    until some node has a summed dependency of at least c * G.n_nodes,
+    as proposed by Bader et al., so the most central nodes are estimated
+    within a constant factor with high probability. k, if given, bounds
+    # sources of the adaptive sampling.
+
+    Sources are split over workers, see executor, each running threads
+    threads. Process workers run one thread each, OpenMP cannot start
+    threads in a process forked after it ran threads in the parent.
+    """
+
+    n_nodes = G.n_nodes
+    if k is None or k >= n_nodes:
+        k = n_nodes
+    if k == n_nodes and adaptive is None:
+        sources = np.arange(n_nodes, dtype="u4")
+    else:
+        sources = np.array(sample(xrange(n_nodes), k), dtype="u4")
+
+    if processes and workers > 1:
+        threads = 1
+    step = k
+    if adaptive is not None:
+        step = 64 * max(threads, 1) * max(workers, 1)
+
+    func = partial(dependencies, directed=directed, edges=edges,
+                   threads=threads)
+    node = np.zeros(n_nodes, dtype="f8")
+    edge = None
+    used = 0
+    while used < k:
+        batch = sources[used:used + step]
+        for n, e in executor.run(G, func, batch, workers, processes):
+            node += n
+            if e is not None:
+                edge = e if edge is None else edge + e
+        used += batch.shape[0]
+        if adaptive is not None and node.max() >= adaptive * n_nodes:
+            break
+
+    if edges and edge is None:
+        edge = np.zeros(_arrays(G, directed)[1].shape[0], dtype="f8")
+    return node, edge, used
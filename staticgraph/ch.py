@@ -0,0 +1,214 @@
+"""
+Contraction hierarchies for fast point to point shortest paths.
+"""
+
+__all__ = ["ContractionHierarchy", "build", "save", "load", "ch_search"]
+
+from os import mkdir
+from os.path import join, exists
+import cPickle as pk
+
+import numpy as np
+import staticgraph.sssp as sssp
+import staticgraph.contraction as contraction
+from staticgraph.context import prepare
+from staticgraph.exceptions import StaticGraphNodeAbsentException
+
+class ContractionHierarchy(object):
+    """
+    Weighted graph augmented with shortcuts and ordered by rank.
+
+    Only the arcs between a node and higher ranked nodes are kept, split
+    the same way as the successors and predecessors of a WDiGraph.
+
+    n_nodes   - # nodes
+    n_edges   - # arcs, original edges and shortcuts
+    rank      - contraction order of each node
+    s_indptr  - index pointers for upward successors
+    s_indices - indices for upward successors
+    s_weights - arc weights arranged according to s_indices
+    s_middle  - node bypassed by each shortcut in s_indices
+    p_indptr  - index pointers for upward predecessors
+    p_indices - indices for upward predecessors
+    p_weights - arc weights arranged according to p_indices
+    p_middle  - node bypassed by each shortcut in p_indices
+    """
+
+    def __init__(self, n_nodes, n_edges, rank,
+                 s_indptr, s_indices, s_weights, s_middle,
+                 p_indptr, p_indices, p_weights, p_middle):
+
+        self.n_nodes   = n_nodes
+        self.n_edges   = n_edges
+        self.rank      = rank
+        self.s_indptr  = s_indptr
+        self.s_indices = s_indices
+        self.s_weights = s_weights
+        self.s_middle  = s_middle
+        self.p_indptr  = p_indptr
+        self.p_indices = p_indices
+        self.p_weights = p_weights
+        self.p_middle  = p_middle
+
+    @property
+    def nbytes(self):
+        """
+        Return total size of internal arrays in bytes.
+        """
+
+        nbytes  = self.rank.nbytes
+        nbytes += self.s_indptr.nbytes
+        nbytes += self.s_indices.nbytes
+        nbytes += self.s_weights.nbytes
+        nbytes += self.s_middle.nbytes
+        nbytes += self.p_indptr.nbytes
+        nbytes += self.p_indices.nbytes
+        nbytes += self.p_weights.nbytes
+        nbytes += self.p_middle.nbytes
+        return nbytes
+
+    def order(self):
+        """
+        Return # nodes.
+        """
+
+        return self.n_nodes
+
+def build(G, directed = False, settle_limit = 500):
+    """
+    Returns the contraction hierarchy of a weighted staticgraph G.
+
+    Parameters
+    ----------
+    G            : A weighted staticgraph with non-negative weights.
+    settle_limit : Optional parameter, most nodes settled by a witness
+                   search before a shortcut is added anyway.
+
+    Returns
+    -------
+    H : A ContractionHierarchy.
+
+    Notes
+    ------
+
+    directed must be set to True for directed graphs.
+    Lower settle_limit gives faster preprocessing and more shortcuts,
+    distances stay exact either way.
+    """
+
+    rank, up, down = contraction.contract(G, directed, settle_limit)
+    s_indptr, s_indices, s_weights, s_middle = up
+    p_indptr, p_indices, p_weights, p_middle = down
+    n_edges = s_indices.shape[0] + p_indices.shape[0]
+
+    return ContractionHierarchy(G.order(), n_edges, rank,
+                                s_indptr, s_indices, s_weights, s_middle,
+                                p_indptr, p_indices, p_weights, p_middle)
+
+def load(store):
+    """
+    Load a contraction hierarchy from disk.
+
+    store - directory where the hierarchy is stored
+    """
+
+    # Load basic info
+    fname = join(store, "ch_base.pickle")
+    with open(fname, "rb") as fobj:
+        n_nodes, n_edges = pk.load(fobj)
+
+    # define load shortcut
+    do_load = lambda fname : np.load(join(store, fname), "r")
+
+    # Make the arrays
+    rank      = do_load("ch_rank.npy")
+    s_indptr  = do_load("ch_s_indptr.npy")
+    s_indices = do_load("ch_s_indices.npy")
+    s_weights = do_load("ch_s_weights.npy")
+    s_middle  = do_load("ch_s_middle.npy")
+    p_indptr  = do_load("ch_p_indptr.npy")
+    p_indices = do_load("ch_p_indices.npy")
+    p_weights = do_load("ch_p_weights.npy")
+    p_middle  = do_load("ch_p_middle.npy")
+
+    return ContractionHierarchy(n_nodes, n_edges, rank,
+                                s_indptr, s_indices, s_weights, s_middle,
+                                p_indptr, p_indices, p_weights, p_middle)
+
+def save(store, H):
+    """
+    Save the contraction hierarchy to disk, next to a graph.
+
+    Files are prefixed with ch_, so the store of the graph it was built
+    from can hold it too.
+
+    store - the directory where the hierarchy will be stored
+    H     - the contraction hierarchy
+    """
+
+    # Create the directory
+    if not exists(store):
+        mkdir(store)
+
+    # Save basic info
+    fname = join(store, "ch_base.pickle")
+    with open(fname, "wb") as fobj:
+        pk.dump((H.n_nodes, H.n_edges), fobj, -1)
+
+    # define save shortcut
+    do_save = lambda fname, arr : np.save(join(store, fname), arr)
+
+    # Make the arrays
+    do_save("ch_rank.npy", H.rank)
+    do_save("ch_s_indptr.npy", H.s_indptr)
+    do_save("ch_s_indices.npy", H.s_indices)
+    do_save("ch_s_weights.npy", H.s_weights)
+    do_save("ch_s_middle.npy", H.s_middle)
+    do_save("ch_p_indptr.npy", H.p_indptr)
+    do_save("ch_p_indices.npy", H.p_indices)
+    do_save("ch_p_weights.npy", H.p_weights)
+    do_save("ch_p_middle.npy", H.p_middle)
+
+def ch_search(H, s, t, ctx = None, rctx = None):
+    """
+    Returns a shortest path from source node s to target node t using a
+    contraction hierarchy H.
+
+    Parameters
+    ----------
+    H    : A ContractionHierarchy, from build or load.
+    s    : Source node.
+    t    : Target node
+    ctx  : Optional TraversalContext reused for the search from s.
+    rctx : Optional TraversalContext reused for the search from t.
+
+    Returns
+    -------
+    nodes : A numpy uint32 array with the path from s to t in the
+            original graph.
+
+    distance : The distance from s to t.
+
+    Notes
+    ------
+
+    returns (None, None) if target is unreachable from source.
+    Both searches only follow arcs to higher ranked nodes and meet at the
+    highest node of the path, shortcuts are expanded afterwards.
+    """
+
+    if s >= H.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= H.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
+
+    ctx = prepare(H, ctx)
+    rctx = prepare(H, rctx)
+    meet, dist = sssp.bidirectional((H.s_indptr, H.s_indices, H.s_weights),
+                                    (H.p_indptr, H.p_indices, H.p_weights),
+                                    s, t, ctx, rctx)
+    if meet is None:
+        return None, None
+
+    path = contraction.unpack(H, ctx.pred, rctx.pred, s, t, meet)
+    return path, dist
@@ -1,7 +1,7 @@
 #cython: wraparound=False
 #cython: boundscheck=False
 """
-Finding components in directed graphs.
+Finding components in graphs and directed graphs.
 """
 
 import numpy as np
@@ -78,6 +78,63 @@ def weak(object G):
 
     return comp_num
 
+def connected(object G):
+    """
+    Compute connected components in the undirected graph.
+
+    Returns a array mapping each node to a connected component.
+    Component numbers start from 1.
+    The algorithm uses DFS to find components.
+
+    G - the undirected graph.
+    """
+
+    cdef:
+        ndarray[uint64_t] n_indptr
+        ndarray[uint32_t] n_indices, comp_num, s
+        uint32_t u, v, w
+        size_t i, start, end, n_nodes, comp_num_max, s_t
+
+    # Assign to typed variables for fast acces
+    n_indptr  = G.n_indptr
+    n_indices = G.n_indices
+    n_nodes   = G.n_nodes
+
+    comp_num     = np.zeros(G.order(), dtype="u4")
+    comp_num_max = 1
+
+    # Create the dfs stack
+    s   = np.empty(G.order(), dtype="u4")
+    s_t = 0
+
+    # For every node check if it already belongs to a component
+    # If not start a dfs from that node
+    for u in range(n_nodes):
+        if comp_num[u] == 0:
+            s[s_t] = u
+            s_t += 1
+            comp_num[u] = comp_num_max
+
+            # While stack is not empty
+            while s_t != 0:
+                v = s[s_t - 1]
+                s_t -= 1
+
+                # Check all neighbours
+                start = n_indptr[v]
+                end   = n_indptr[v + 1]
+                for i in range(start, end):
+                    w = n_indices[i]
+                    if comp_num[w] == 0:
+                        s[s_t] = w
+                        s_t += 1
+                        comp_num[w] = comp_num_max
+
+            # Out of the while loop
+            comp_num_max += 1
+
+    return comp_num
+
 def strong(object G):
     """
     Compute strong components for the graph.
@@ -0,0 +1,86 @@
+"""
+Reusable workspace for repeated traversal queries.
+"""
+
+__all__ = ["TraversalContext", "prepare"]
+
+import numpy as np
+
+class TraversalContext(object):
+    """
+    Buffers shared by successive point queries on graphs of a given order.
+
+    Entries of the buffers are valid only for nodes whose stamp equals
+    the current epoch. Starting a query bumps the epoch, which resets all
+    the entries touched by the previous query without writing to them.
+
+    n_nodes - # nodes of the graphs that can be queried
+    epoch   - stamp of the current query
+    stamp   - epoch in which each node was last touched
+    pred    - predecessors of the touched nodes
+    dist    - hop distances or heap positions of the touched nodes
+    queue   - queue, stack or heap of nodes
+    weights - weighted distances of the touched nodes
+    keys    - heap keys of the touched nodes in goal directed searches
+    cursor  - next edge to inspect of the nodes on a DFS stack
+    order   - nodes in the order they were settled
+    """
+
+    def __init__(self, n_nodes):
+
+        self.n_nodes = n_nodes
+        self.epoch   = 0
+        self.stamp   = np.zeros(n_nodes, dtype="u4")
+        self.pred    = np.empty(n_nodes, dtype="u4")
+        self.dist    = np.empty(n_nodes, dtype="u4")
+        self.queue   = np.empty(n_nodes, dtype="u4")
+        self.weights = np.empty(n_nodes, dtype="f8")
+        self.keys    = np.empty(n_nodes, dtype="f8")
+        self.cursor  = np.empty(n_nodes, dtype="u8")
+        self.order   = np.empty(n_nodes, dtype="u4")
+
+    @property
+    def nbytes(self):
+        """
+        Return total size of internal arrays in bytes.
+        """
+
+        nbytes  = self.stamp.nbytes
+        nbytes += self.pred.nbytes
+        nbytes += self.dist.nbytes
+        nbytes += self.queue.nbytes
+        nbytes += self.weights.nbytes
+        nbytes += self.keys.nbytes
+        nbytes += self.cursor.nbytes
+        nbytes += self.order.nbytes
+        return nbytes
+
+    def reset(self):
+        """
+        Start a new query and return its epoch.
+        """
+
+        self.epoch += 1
+
+        # Stamps are only cleared when the epoch wraps around
+        if self.epoch == (2 ** 32) - 1:
+            self.stamp[:] = 0
+            self.epoch = 1
+
+        return self.epoch
+
+def prepare(G, ctx = None):
+    """
+    Return a context reset for a new query on G.
+
+    G   - the graph to be queried
+    ctx - context to reuse, a new one is created if None
+    """
+
+    if ctx is None:
+        ctx = TraversalContext(G.order())
+    elif ctx.n_nodes < G.order():
+        raise ValueError("Context is smaller than the graph")
+
+    ctx.reset()
+    return ctx
@@ -0,0 +1,526 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+"""
+Compiled contraction hierarchy construction and path unpacking.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, float64_t, ndarray
+from libc.stdlib cimport malloc, calloc, realloc, free
+from libc.string cimport memset
+
+cdef struct _Arc:
+    double weight
+    uint32_t node
+    uint32_t middle
+
+cdef struct _Arcs:
+    _Arc *arcs
+    size_t size
+    size_t cap
+
+cdef struct _Entry:
+    double key
+    uint32_t node
+
+cdef struct _Heap:
+    _Entry *entries
+    size_t size
+    size_t cap
+
+cdef int _arcs_set(_Arcs *a, uint32_t node, double weight,
+                   uint32_t middle) nogil:
+    """
+    Add an arc to node or lower the weight of the existing one.
+
+    Returns 1 if the arcs changed, 0 if not and -1 if out of memory.
+    """
+
+    cdef:
+        _Arc *arcs
+        size_t i
+
+    for i in range(a.size):
+        if a.arcs[i].node == node:
+            if a.arcs[i].weight <= weight:
+                return 0
+            a.arcs[i].weight = weight
+            a.arcs[i].middle = middle
+            return 1
+
+    if a.size == a.cap:
+        arcs = <_Arc *> realloc(a.arcs, (2 * a.cap + 4) * sizeof(_Arc))
+        if arcs == NULL:
+            return -1
+        a.arcs = arcs
+        a.cap = 2 * a.cap + 4
+
+    a.arcs[a.size].weight = weight
+    a.arcs[a.size].node = node
+    a.arcs[a.size].middle = middle
+    a.size += 1
+    return 1
+
+cdef void _arcs_remove(_Arcs *a, uint32_t node) nogil:
+    """
+    Remove the arc to node if present.
+    """
+
+    cdef size_t i
+
+    for i in range(a.size):
+        if a.arcs[i].node == node:
+            a.size -= 1
+            a.arcs[i] = a.arcs[a.size]
+            return
+
+cdef int _heap_push(_Heap *h, double key, uint32_t node) nogil:
+    """
+    Push an entry on the min heap, returns -1 if out of memory.
+    """
+
+    cdef:
+        _Entry *entries
+        size_t i, parent
+
+    if h.size == h.cap:
+        entries = <_Entry *> realloc(h.entries,
+                                     (2 * h.cap + 64) * sizeof(_Entry))
+        if entries == NULL:
+            return -1
+        h.entries = entries
+        h.cap = 2 * h.cap + 64
+
+    i = h.size
+    h.size += 1
+    while i > 0:
+        parent = (i - 1) >> 1
+        if h.entries[parent].key <= key:
+            break
+        h.entries[i] = h.entries[parent]
+        i = parent
+    h.entries[i].key = key
+    h.entries[i].node = node
+    return 0
+
+cdef _Entry _heap_pop(_Heap *h) nogil:
+    """
+    Remove and return the entry with the smallest key.
+    """
+
+    cdef:
+        _Entry top = h.entries[0], last
+        size_t i, c
+
+    h.size -= 1
+    if h.size == 0:
+        return top
+
+    last = h.entries[h.size]
+    i = 0
+    while True:
+        c = 2 * i + 1
+        if c >= h.size:
+            break
+        if c + 1 < h.size and h.entries[c + 1].key < h.entries[c].key:
+            c += 1
+        if h.entries[c].key >= last.key:
+            break
+        h.entries[i] = h.entries[c]
+        i = c
+    h.entries[i] = last
+    return top
+
+cdef class _Builder:
+    """
+    Remaining graph during contraction.
+
+    out and inp hold the arcs between uncontracted nodes. Once a node is
+    contracted its own arcs are frozen, so they lead to the nodes
+    contracted after it, which are its upward arcs in the hierarchy.
+    """
+
+    cdef:
+        size_t n_nodes, settle_limit
+        _Arcs *out
+        _Arcs *inp
+        uint32_t *stamp
+        uint32_t *target
+        uint32_t epoch, t_epoch
+        double *dist
+        _Heap heap
+
+    def __cinit__(self, size_t n_nodes, size_t settle_limit):
+
+        self.n_nodes = n_nodes
+        self.settle_limit = settle_limit
+        self.out   = <_Arcs *> calloc(n_nodes + 1, sizeof(_Arcs))
+        self.inp   = <_Arcs *> calloc(n_nodes + 1, sizeof(_Arcs))
+        self.stamp  = <uint32_t *> calloc(n_nodes + 1, sizeof(uint32_t))
+        self.target = <uint32_t *> calloc(n_nodes + 1, sizeof(uint32_t))
+        self.dist   = <double *> malloc((n_nodes + 1) * sizeof(double))
+        self.epoch = self.t_epoch = 0
+        self.heap.entries = NULL
+        self.heap.size = self.heap.cap = 0
+        if self.out == NULL or self.inp == NULL or self.stamp == NULL or \
+           self.target == NULL or self.dist == NULL:
+            raise MemoryError()
+
+    def __dealloc__(self):
+
+        cdef size_t v
+
+        if self.out != NULL:
+            for v in range(self.n_nodes):
+                free(self.out[v].arcs)
+        if self.inp != NULL:
+            for v in range(self.n_nodes):
+                free(self.inp[v].arcs)
+        free(self.out)
+        free(self.inp)
+        free(self.stamp)
+        free(self.target)
+        free(self.dist)
+        free(self.heap.entries)
+
+    cdef int add_arc(self, uint32_t u, uint32_t w, double weight,
+                     uint32_t middle) except -1:
+        """
+        Add the arc from u to w unless a lighter one exists.
+        """
+
+        cdef int changed
+
+        changed = _arcs_set(&self.out[u], w, weight, middle)
+        if changed == 1:
+            changed = _arcs_set(&self.inp[w], u, weight, middle)
+        if changed == -1:
+            raise MemoryError()
+        return changed
+
+    cdef int witness(self, uint32_t u, uint32_t v, double limit,
+                     size_t n_targets) except -1:
+        """
+        Run a local Dijkstra from u avoiding v up to distance limit.
+
+        The search also stops once the n_targets nodes marked in target
+        are settled. Afterwards nodes stamped with the current epoch have
+        an upper bound on their distance from u in dist.
+        """
+
+        cdef:
+            _Entry e
+            _Arcs *arcs
+            uint32_t x, y
+            size_t i, n_settled
+            double dy
+
+        self.epoch += 1
+        if self.epoch == (2 ** 32) - 1:
+            memset(self.stamp, 0, self.n_nodes * sizeof(uint32_t))
+            self.epoch = 1
+
+        self.stamp[u] = self.epoch
+        self.dist[u] = 0
+        self.heap.size = 0
+        if _heap_push(&self.heap, 0, u) == -1:
+            raise MemoryError()
+
+        n_settled = 0
+        while self.heap.size != 0 and n_settled < self.settle_limit:
+            e = _heap_pop(&self.heap)
+            x = e.node
+            if e.key > self.dist[x]:
+                continue
+            if e.key > limit:
+                break
+            n_settled += 1
+            if self.target[x] == self.t_epoch:
+                n_targets -= 1
+                if n_targets == 0:
+                    break
+
+            arcs = &self.out[x]
+            for i in range(arcs.size):
+                y = arcs.arcs[i].node
+                if y == v:
+                    continue
+                dy = e.key + arcs.arcs[i].weight
+                if self.stamp[y] == self.epoch and self.dist[y] <= dy:
+                    continue
+                self.stamp[y] = self.epoch
+                self.dist[y] = dy
+                if _heap_push(&self.heap, dy, y) == -1:
+                    raise MemoryError()
+
+        return 0
+
+    cdef long contract(self, uint32_t v, bint simulate) except -1:
+        """
+        Find the shortcuts needed to remove v and add them unless simulate.
+
+        Returns # shortcuts.
+        """
+
+        cdef:
+            _Arcs *inp = &self.inp[v]
+            _Arcs *out = &self.out[v]
+            uint32_t u, w
+            size_t i, j
+            long count = 0
+            double wu, limit
+
+        self.t_epoch += 1
+        if self.t_epoch == (2 ** 32) - 1:
+            memset(self.target, 0, self.n_nodes * sizeof(uint32_t))
+            self.t_epoch = 1
+        for j in range(out.size):
+            self.target[out.arcs[j].node] = self.t_epoch
+
+        for i in range(inp.size):
+            u = inp.arcs[i].node
+            wu = inp.arcs[i].weight
+
+            limit = -1
+            for j in range(out.size):
+                if out.arcs[j].node != u and \
+                   wu + out.arcs[j].weight > limit:
+                    limit = wu + out.arcs[j].weight
+            if limit < 0:
+                continue
+
+            self.witness(u, v, limit, out.size)
+            for j in range(out.size):
+                w = out.arcs[j].node
+                if w == u:
+                    continue
+                if self.stamp[w] == self.epoch and \
+                   self.dist[w] <= wu + out.arcs[j].weight:
+                    continue
+                count += 1
+                if not simulate:
+                    self.add_arc(u, w, wu + out.arcs[j].weight, v)
+
+        return count
+
+    cdef double priority(self, uint32_t v, uint32_t deleted) except? -1:
+        """
+        Return the edge difference of v plus its contracted neighbours.
+        """
+
+        cdef long shortcuts = self.contract(v, True)
+        return (shortcuts - <long> self.out[v].size -
+                <long> self.inp[v].size + deleted)
+
+    cdef void remove(self, uint32_t v):
+        """
+        Unlink v from its uncontracted neighbours.
+        """
+
+        cdef size_t i
+
+        for i in range(self.out[v].size):
+            _arcs_remove(&self.inp[self.out[v].arcs[i].node], v)
+        for i in range(self.inp[v].size):
+            _arcs_remove(&self.out[self.inp[v].arcs[i].node], v)
+
+def _csr(_Builder b, bint upward):
+    """
+    Return the frozen out or in arcs of all nodes as CSR arrays.
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, middle
+        ndarray[float64_t] weights
+        _Arcs *lists = b.out if upward else b.inp
+        size_t v, i, k, n_nodes = b.n_nodes
+
+    indptr = np.empty(n_nodes + 1, dtype="u8")
+    indptr[0] = 0
+    for v in range(n_nodes):
+        indptr[v + 1] = indptr[v] + lists[v].size
+
+    indices = np.empty(indptr[n_nodes], dtype="u4")
+    weights = np.empty(indptr[n_nodes], dtype="f8")
+    middle  = np.empty(indptr[n_nodes], dtype="u4")
+    k = 0
+    for v in range(n_nodes):
+        for i in range(lists[v].size):
+            indices[k] = lists[v].arcs[i].node
+            weights[k] = lists[v].arcs[i].weight
+            middle[k]  = lists[v].arcs[i].middle
+            k += 1
+
+    return indptr, indices, weights, middle
+
+def contract(object G, bint directed=False, size_t settle_limit=500):
+    """
+    Contract all nodes of the weighted graph into a hierarchy.
+
+    Nodes are contracted in the order of their edge difference plus
+    their number of contracted neighbours, kept in a heap. The priorities
+    of the neighbours are updated after each contraction.
+    Removing a node adds a shortcut between each pair of its neighbours
+    unless a local witness search finds a path at most as long. A witness
+    search settling settle_limit nodes gives up and keeps the shortcut.
+
+    Returns rank, a uint32 array of the contraction order of every node,
+    and two tuples (indptr, indices, weights, middle) of CSR arrays. The
+    first holds the arcs from each node to higher ranked nodes, the second
+    the arcs into each node from higher ranked nodes. middle is the node
+    a shortcut bypasses and (2 ** 32) - 1 for original edges.
+
+    G            - the weighted graph
+    directed     - G is a directed graph
+    settle_limit - most nodes settled by a witness search
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, rank, deleted, touched
+        ndarray[float64_t] weights, current
+        _Builder b
+        _Heap order
+        _Entry e
+        uint32_t u, v, x, none = (2 ** 32) - 1
+        size_t i, j, n_nodes, r
+
+    if directed:
+        indptr, indices, weights = G.s_indptr, G.s_indices, G.s_weights
+    else:
+        indptr, indices, weights = G.n_indptr, G.n_indices, G.weights
+    n_nodes = G.n_nodes
+    if weights.shape[0] != 0 and weights.min() < 0:
+        raise ValueError("Weights must be non-negative")
+
+    # Parallel edges collapse into the lightest one, self loops are dropped
+    b = _Builder(n_nodes, settle_limit)
+    for u in range(n_nodes):
+        for j in range(indptr[u], indptr[u + 1]):
+            if indices[j] != u:
+                b.add_arc(u, indices[j], weights[j], none)
+
+    rank    = np.empty(n_nodes, dtype="u4")
+    rank.fill(none)
+    deleted = np.zeros(n_nodes, dtype="u4")
+    touched = np.zeros(n_nodes, dtype="u4")
+    current = np.empty(n_nodes, dtype="f8")
+
+    order.entries = NULL
+    order.size = order.cap = 0
+    try:
+        for v in range(n_nodes):
+            current[v] = b.priority(v, 0)
+            if _heap_push(&order, current[v], v) == -1:
+                raise MemoryError()
+
+        r = 0
+        while order.size != 0:
+            e = _heap_pop(&order)
+            v = e.node
+            if rank[v] != none or e.key != current[v]:
+                continue
+
+            b.contract(v, False)
+            b.remove(v)
+            rank[v] = r
+            r += 1
+
+            for i in range(b.out[v].size + b.inp[v].size):
+                if i < b.out[v].size:
+                    x = b.out[v].arcs[i].node
+                else:
+                    x = b.inp[v].arcs[i - b.out[v].size].node
+                if touched[x] == r:
+                    continue
+                touched[x] = r
+                deleted[x] += 1
+                current[x] = b.priority(x, deleted[x])
+                if _heap_push(&order, current[x], x) == -1:
+                    raise MemoryError()
+    finally:
+        free(order.entries)
+
+    return rank, _csr(b, True), _csr(b, False)
+
+cdef uint32_t _middle(uint32_t *rank, uint64_t *s_indptr,
+                      uint32_t *s_indices, uint32_t *s_middle,
+                      uint64_t *p_indptr, uint32_t *p_indices,
+                      uint32_t *p_middle, uint32_t a, uint32_t b):
+    """
+    Return the middle node of the hierarchy arc from a to b.
+    """
+
+    cdef size_t j
+
+    if rank[a] < rank[b]:
+        for j in range(s_indptr[a], s_indptr[a + 1]):
+            if s_indices[j] == b:
+                return s_middle[j]
+    else:
+        for j in range(p_indptr[b], p_indptr[b + 1]):
+            if p_indices[j] == a:
+                return p_middle[j]
+    return (2 ** 32) - 1
+
+def unpack(object H, ndarray[uint32_t] pred, ndarray[uint32_t] rpred,
+           size_t s, size_t t, size_t meet):
+    """
+    Expand the shortcuts on the path found by an upward search.
+
+    Returns the path from s to t in the original graph as a uint32 array.
+
+    H     - the contraction hierarchy
+    pred  - predecessors of the forward search from s
+    rpred - predecessors of the backward search from t
+    s     - the source node
+    t     - the target node
+    meet  - the node where both searches met
+    """
+
+    cdef:
+        ndarray[uint32_t] rank, s_indices, s_middle, p_indices, p_middle
+        ndarray[uint64_t] s_indptr, p_indptr
+        uint32_t a, b, m, u, none = (2 ** 32) - 1
+        list chain, stack, path
+
+    rank      = H.rank
+    s_indptr  = H.s_indptr
+    s_indices = H.s_indices
+    s_middle  = H.s_middle
+    p_indptr  = H.p_indptr
+    p_indices = H.p_indices
+    p_middle  = H.p_middle
+
+    # Nodes of the path in the hierarchy
+    chain = []
+    u = meet
+    while u != s:
+        chain.append(u)
+        u = pred[u]
+    chain.append(s)
+    chain.reverse()
+    u = meet
+    while u != t:
+        u = rpred[u]
+        chain.append(u)
+
+    path = [s]
+    for i in range(len(chain) - 1):
+        stack = [(chain[i], chain[i + 1])]
+        while stack:
+            a, b = stack.pop()
+            m = _middle(<uint32_t *> rank.data, <uint64_t *> s_indptr.data,
+                        <uint32_t *> s_indices.data,
+                        <uint32_t *> s_middle.data,
+                        <uint64_t *> p_indptr.data,
+                        <uint32_t *> p_indices.data,
+                        <uint32_t *> p_middle.data, a, b)
+            if m == none:
+                path.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    return np.array(path, dtype="u4")
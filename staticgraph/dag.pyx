@@ -0,0 +1,131 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+"""
+Topological ordering of directed acyclic graphs.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, ndarray
+
+def _kahn(object G, bint with_levels):
+    """
+    Run Kahn's algorithm on the directed graph.
+
+    Returns the nodes in topological order, their levels and a witness
+    cycle. Nodes on or behind a cycle are left out of the order, the
+    cycle is None when the order is complete and the levels are None
+    when not requested.
+    """
+
+    cdef:
+        ndarray[uint64_t] p_indptr, s_indptr
+        ndarray[uint32_t] p_indices, s_indices, in_deg, order, level
+        ndarray[uint32_t] step, walk, cycle
+        uint32_t u, v, w, unseen = (2 ** 32) - 1
+        size_t j, k, n_nodes, front, rear
+
+    # Assign to typed variables for fast acces
+    p_indptr  = G.p_indptr
+    p_indices = G.p_indices
+    s_indptr  = G.s_indptr
+    s_indices = G.s_indices
+    n_nodes   = G.n_nodes
+
+    in_deg = np.diff(p_indptr).astype("u4")
+
+    # order doubles as the queue of nodes with no pending predecessors
+    order = np.empty(n_nodes, dtype="u4")
+    level = None
+    if with_levels:
+        level = np.zeros(n_nodes, dtype="u4")
+
+    rear = 0
+    for u in range(n_nodes):
+        if in_deg[u] == 0:
+            order[rear] = u
+            rear += 1
+
+    front = 0
+    while front != rear:
+        u = order[front]
+        front += 1
+        for j in range(s_indptr[u], s_indptr[u + 1]):
+            v = s_indices[j]
+            if with_levels and level[v] < level[u] + 1:
+                level[v] = level[u] + 1
+            in_deg[v] -= 1
+            if in_deg[v] == 0:
+                order[rear] = v
+                rear += 1
+
+    if rear == n_nodes:
+        return order, level, None
+
+    # Every leftover node has a leftover predecessor, so walking
+    # backwards over them has to run into a cycle
+    step = np.empty(n_nodes, dtype="u4")
+    walk = np.empty(n_nodes, dtype="u4")
+    step.fill(unseen)
+    for u in range(n_nodes):
+        if in_deg[u] != 0:
+            break
+
+    k = 0
+    while step[u] == unseen:
+        step[u] = k
+        walk[k] = u
+        k += 1
+        for j in range(p_indptr[u], p_indptr[u + 1]):
+            w = p_indices[j]
+            if in_deg[w] != 0:
+                u = w
+                break
+
+    # The walk went against the edges, so the cycle is read backwards
+    cycle = walk[step[u]:k][::-1].copy()
+
+    return order[:rear], level, cycle
+
+def topological_sort(object G):
+    """
+    Sort the nodes of the directed graph topologically.
+
+    Returns a tuple (order, cycle). If G is acyclic order is a uint32 array
+    of all nodes such that every edge points forward and cycle is None.
+    Otherwise order is None and cycle is a uint32 array of nodes
+    c0, c1, ..., ck such that (c0, c1), ..., (ck, c0) are edges of G.
+
+    G - the directed graph
+    """
+
+    order, _, cycle = _kahn(G, False)
+    if cycle is not None:
+        return None, cycle
+    return order, None
+
+def topological_levels(object G):
+    """
+    Compute the longest path layer of every node of the directed graph.
+
+    Returns a tuple (level, cycle). level is a uint32 array where level[v]
+    is the number of edges on the longest path ending at v, so nodes with
+    equal levels are independent of each other. If G has a cycle, level is
+    None and cycle is a witness as returned by topological_sort.
+
+    G - the directed graph
+    """
+
+    _, level, cycle = _kahn(G, True)
+    if cycle is not None:
+        return None, cycle
+    return level, None
+
+def is_dag(object G):
+    """
+    Check if the directed graph is acyclic.
+
+    G - the directed graph
+    """
+
+    order, _, _ = _kahn(G, False)
+    return order.shape[0] == G.n_nodes
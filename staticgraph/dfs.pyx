@@ -0,0 +1,102 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+"""
+Compiled depth first search kernels.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, ndarray
+from staticgraph.bfs import _out_arrays, _in_arrays
+
+def dfs(object G, object sources=None, bint reverse=False):
+    """
+    Run an iterative DFS covering the graph.
+
+    Returns five arrays: preorder, postorder and parent of uint32,
+    discovery and finish of uint64. preorder and postorder list the
+    visited nodes. parent, discovery and finish are indexed by node, with
+    discovery and finish times taken from a single clock, which runs up
+    to 2 * n_nodes - 1. Roots and unvisited nodes have parent
+    (2 ** 32) - 1, unvisited nodes have discovery and finish
+    (2 ** 64) - 1.
+
+    Every node on the stack keeps a cursor into its adjacency, so each
+    edge is inspected exactly once.
+
+    G       - the graph, directed graphs are traversed along successors
+    sources - roots in the order they are tried, all nodes if None
+    reverse - traverse directed graphs along predecessors
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr, cursor, discovery, finish
+        ndarray[uint32_t] indices, roots, stack
+        ndarray[uint32_t] preorder, postorder, parent
+        uint32_t r, u, v, unseen = (2 ** 32) - 1
+        uint64_t undiscovered = (2 ** 64) - 1
+        size_t i, n_nodes, n_roots, top, n_pre, n_post, clock
+
+    if reverse:
+        indptr, indices = _in_arrays(G)
+    else:
+        indptr, indices = _out_arrays(G)
+    n_nodes = G.n_nodes
+
+    if sources is None:
+        roots = np.arange(n_nodes, dtype="u4")
+    else:
+        roots = np.ascontiguousarray(sources, dtype="u4")
+    n_roots = roots.shape[0]
+    if n_roots != 0 and roots.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    preorder  = np.empty(n_nodes, dtype="u4")
+    postorder = np.empty(n_nodes, dtype="u4")
+    parent    = np.empty(n_nodes, dtype="u4")
+    discovery = np.empty(n_nodes, dtype="u8")
+    finish    = np.empty(n_nodes, dtype="u8")
+    parent.fill(unseen)
+    discovery.fill(undiscovered)
+    finish.fill(undiscovered)
+
+    # The stack holds the current path, cursors the next edge to inspect
+    stack  = np.empty(n_nodes, dtype="u4")
+    cursor = np.empty(n_nodes, dtype="u8")
+
+    top = n_pre = n_post = clock = 0
+
+    for i in range(n_roots):
+        r = roots[i]
+        if discovery[r] != undiscovered:
+            continue
+
+        discovery[r] = clock
+        clock += 1
+        preorder[n_pre] = r
+        n_pre += 1
+        cursor[r] = indptr[r]
+        stack[top] = r
+        top += 1
+
+        while top != 0:
+            u = stack[top - 1]
+            if cursor[u] != indptr[u + 1]:
+                v = indices[cursor[u]]
+                cursor[u] += 1
+                if discovery[v] == undiscovered:
+                    parent[v] = u
+                    discovery[v] = clock
+                    clock += 1
+                    preorder[n_pre] = v
+                    n_pre += 1
+                    cursor[v] = indptr[v]
+                    stack[top] = v
+                    top += 1
+            else:
+                finish[u] = clock
+                clock += 1
+                postorder[n_post] = u
+                n_post += 1
+                top -= 1
+
+    return preorder[:n_pre], postorder[:n_post], parent, discovery, finish
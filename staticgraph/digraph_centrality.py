@@ -0,0 +1,104 @@
+"""
+module to implement different centrality measures for directed graphs.
+"""
+
+import staticgraph as sg
+
+def betweenness_centrality(G, k = None, adaptive = None, normalized = True,
+                           threads = 1, workers = 1, processes = False):
+    """
+    Compute the shortest path betweenness centrality for nodes.
+
+    The betweenness centrality of a node v is the sum over the ordered
+    pairs of nodes s, t of the fraction of the shortest paths from s to t
+    that pass through v.
+
+    Parameters
+    ----------
+    G          : A directed staticgraph, weighted or not.
+    k          : int, optional
+                 Estimate from the dependencies of k random sources.
+    adaptive   : float, optional
+                 Draw sources until the largest summed dependency is
+                 adaptive * n, at most k of them.
+    normalized : bool, optional
+                 Divide by (n - 1)(n - 2).
+    threads    : int, optional
+                 # threads of each worker, with their own accumulators.
+    workers    : int, optional
+                 # workers sharing the sources, see executor.
+    processes  : bool, optional
+                 Use processes instead of threads for the workers, each
+                 running a single thread.
+
+    Returns
+    -------
+    betweenness_centrality : numpy array having betweenness centrality of
+                             the nodes.
+
+    Notes
+    -----
+    Paths follow the successors. Values are scaled as by networkx, the
+    estimates from sampled sources by n / # sources.
+    """
+
+    n_nodes = G.order()
+    node, _, used = sg.brandes.sampled(G, True, k, adaptive, False,
+                                       threads, workers, processes)
+
+    scale = 1.0
+    if normalized:
+        scale = 1.0 / ((n_nodes - 1) * (n_nodes - 2)) if n_nodes > 2 else 0.0
+    if used:
+        scale *= float(n_nodes) / used
+    return node * scale
+
+def edge_betweenness_centrality(G, k = None, adaptive = None,
+                                normalized = True, threads = 1,
+                                workers = 1, processes = False):
+    """
+    Compute the shortest path betweenness centrality for edges.
+
+    The betweenness centrality of an edge e is the sum over the ordered
+    pairs of nodes s, t of the fraction of the shortest paths from s to t
+    that pass through e.
+
+    Parameters
+    ----------
+    G          : A directed staticgraph, weighted or not.
+    k          : int, optional
+                 Estimate from the dependencies of k random sources.
+    adaptive   : float, optional
+                 Draw sources until the largest summed node dependency
+                 is adaptive * n, at most k of them.
+    normalized : bool, optional
+                 Divide by n (n - 1).
+    threads    : int, optional
+                 # threads of each worker, with their own accumulators.
+    workers    : int, optional
+                 # workers sharing the sources, see executor.
+    processes  : bool, optional
+                 Use processes instead of threads for the workers, each
+                 running a single thread.
+
+    Returns
+    -------
+    edge_betweenness_centrality : numpy array aligned with G.s_indices.
+
+    Notes
+    -----
+    The entry of the edge (u, G.s_indices[j]) is j for
+    G.s_indptr[u] <= j < G.s_indptr[u + 1]. Values are scaled as by
+    networkx.
+    """
+
+    n_nodes = G.order()
+    _, edge, used = sg.brandes.sampled(G, True, k, adaptive, True,
+                                       threads, workers, processes)
+
+    scale = 1.0
+    if normalized:
+        scale = 1.0 / (n_nodes * (n_nodes - 1)) if n_nodes > 1 else 0.0
+    if used:
+        scale *= float(n_nodes) / used
+    return edge * scale
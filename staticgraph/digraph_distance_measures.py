@@ -3,12 +3,17 @@ Functions for the standard distance measures for directed graphs.
 """
 
 import staticgraph as sg
-from numpy import empty, uint32, amax, amin, array
+from numpy import empty, uint32, amax, amin, array, argmax, diff, searchsorted
+from numpy import concatenate, zeros, maximum, argmin
 from random import sample
 from staticgraph.exceptions import StaticGraphNodeAbsentException
 from staticgraph.exceptions import StaticGraphDisconnectedGraphException
 
-def eccentricity(G, n_nodes, v=None):
+# Fringes of at most this many nodes share few BFS levels, exact_diameter
+# runs one BFS per node for them
+SMALL_FRINGE = 8
+
+def eccentricity(G, n_nodes, v=None, workers=1, processes=False):
     """
     Return the eccentricity of nodes in G.
 
@@ -24,6 +29,12 @@ def eccentricity(G, n_nodes, v=None):
     v :       node, optional
               Return value of specified node       
 
+    workers : int, optional
+              # workers sharing the BFS runs, see executor.
+
+    processes : bool, optional
+              Use processes instead of threads for the workers.
+
     Returns
     -------
     ecc : A 2D numpy array.
@@ -39,31 +50,24 @@ def eccentricity(G, n_nodes, v=None):
         raise sg.exceptions.StaticGraphNodeAbsentException("given node absent in graph!!")
     
     order = G.order()
-    edgelist = empty((n_nodes ** 2, 2), dtype = uint32) 
-    index = 0
-
     nodes = sample(xrange(order), n_nodes)    
     nodes = array(nodes, dtype = uint32)
     
     if v != None:
-        if v not in nodes:
-            nodes[0] = v
-
-    if v != None:
-        sp = sg.digraph_traversal.bfs_all(G, v)
-        if sp[1].size < n_nodes:
+        ecc, reached = sg.bfs.ms_eccentricity(G, array([v], dtype = uint32))
+        if reached[0] < n_nodes:
             raise StaticGraphDisconnectedGraphException("disconnected graph!!")
-        return sp[0].size - 2
+        return ecc[0]
 
+    # Bit parallel BFS carries 64 sources per traversal
     ecc = empty((2, n_nodes), dtype = uint32)
-    index = 0
-    for i in xrange(n_nodes):
-        sp = sg.digraph_traversal.bfs_all(G, nodes[i])
-        ecc[0, i] = nodes[i]
-        if sp[1].size < n_nodes:
-            raise StaticGraphDisconnectedGraphException("disconnected graph!!")
-        else:
-            ecc[1, i] = sp[0].size - 2
+    ecc[0] = nodes
+    parts = sg.executor.run(G, sg.bfs.ms_eccentricity, nodes, workers,
+                            processes, 64)
+    ecc[1] = concatenate([part[0] for part in parts])
+    reached = concatenate([part[1] for part in parts])
+    if (reached < n_nodes).any():
+        raise StaticGraphDisconnectedGraphException("disconnected graph!!")
 
     return ecc
 
@@ -198,3 +202,119 @@ def center(G, n_nodes, e = None):
         i += 1
 
     return e[0][:i]
+
+def _bfs_eccentricity(G, nodes, reverse):
+    """
+    Return the eccentricities of nodes, with one BFS each.
+    """
+
+    ecc = empty(len(nodes), dtype = uint32)
+    for k, v in enumerate(nodes):
+        order, dist, _ = sg.bfs.levels(G, v, reverse)
+        ecc[k] = dist[order[-1]]
+    return ecc
+
+def exact_diameter(G, return_pair = False):
+    """
+    Return the exact diameter of G.
+
+    The bounds of a few BFS sweeps are tightened with the DiFUB
+    algorithm: only the nodes far from or to a node u need their
+    eccentricity.
+
+    Parameters
+    ----------
+    G : A directed staticgraph
+
+    return_pair : bool, optional
+      Also return two nodes at distance equal to the diameter.
+
+    Returns
+    -------
+    Diameter of graph, and a (source, target) tuple if return_pair.
+
+    Notes
+    -----
+    Exception is raised if given graph is not strongly connected.
+    A path from x to y through u is at most 2 * (i - 1) long when
+    d(x, u) and d(u, y) are both below i. So the forward eccentricity
+    of the nodes at distance i to u and the backward eccentricity of the
+    nodes at distance i from u are computed for decreasing i, until the
+    largest exceeds 2 * (i - 1). u is picked by the sweeps to have small
+    eccentricities both ways, which keeps i small on high diameter
+    graphs. Fringes of a few nodes take one BFS per node.
+    """
+
+    n_nodes = G.order()
+    if n_nodes == 0:
+        return (None, None) if return_pair else None
+
+    # Sweeps from u both ways and back from the farthest nodes found give
+    # a lower bound. d(x, v) never exceeds the backward eccentricity of v
+    # and d(v, x) its forward one, so the next u is the node whose bounds
+    # from all sweeps so far sum lowest.
+    u = int(argmax(diff(G.s_indptr) + diff(G.p_indptr)))
+    lb, pair = 0, (u, u)
+    f_far = zeros(n_nodes, dtype = uint32)
+    b_far = zeros(n_nodes, dtype = uint32)
+    for j in xrange(4):
+        f_order, f_dist, _ = sg.bfs.levels(G, u)
+        b_order, b_dist, _ = sg.bfs.levels(G, u, True)
+        if f_order.size < n_nodes or b_order.size < n_nodes:
+            raise StaticGraphDisconnectedGraphException("disconnected graph!!")
+        if f_dist[f_order[-1]] > lb:
+            lb, pair = int(f_dist[f_order[-1]]), (u, f_order[-1])
+        if b_dist[b_order[-1]] > lb:
+            lb, pair = int(b_dist[b_order[-1]]), (b_order[-1], u)
+        if j == 3 or (f_dist[f_order[-1]] == f_far[u] and
+                      b_dist[b_order[-1]] == b_far[u]):
+            break
+        maximum(b_far, f_dist, out = b_far)
+        maximum(f_far, b_dist, out = f_far)
+
+        order, dist, _ = sg.bfs.levels(G, b_order[-1])
+        if dist[order[-1]] > lb:
+            lb, pair = int(dist[order[-1]]), (b_order[-1], order[-1])
+        maximum(b_far, dist, out = b_far)
+        order, dist, _ = sg.bfs.levels(G, f_order[-1], True)
+        if dist[order[-1]] > lb:
+            lb, pair = int(dist[order[-1]]), (order[-1], f_order[-1])
+        maximum(f_far, dist, out = f_far)
+        u = int(argmin(f_far + b_far))
+
+    i = int(max(f_dist[f_order[-1]], b_dist[b_order[-1]]))
+    ub = int(f_dist[f_order[-1]] + b_dist[b_order[-1]])
+    f_level = f_dist[f_order]
+    b_level = b_dist[b_order]
+
+    # Forward eccentricities of the nodes at distance i to u and backward
+    # eccentricities of the nodes at distance i from u
+    source = None
+    while ub > lb:
+        fringes = ((b_order[searchsorted(b_level, i):
+                            searchsorted(b_level, i + 1)], False),
+                   (f_order[searchsorted(f_level, i):
+                            searchsorted(f_level, i + 1)], True))
+        for fringe, reverse in fringes:
+            for j in xrange(0, fringe.size, 64):
+                batch = fringe[j:j + 64]
+                if fringe.size <= SMALL_FRINGE:
+                    ecc = _bfs_eccentricity(G, batch, reverse)
+                else:
+                    ecc, _ = sg.bfs.ms_eccentricity(G, batch, 1, reverse)
+                k = argmax(ecc)
+                if ecc[k] > lb:
+                    lb, source = int(ecc[k]), (batch[k], reverse)
+
+        # Both whole fringes are needed before the bound drops
+        ub = min(ub, max(lb, 2 * (i - 1)))
+        i -= 1
+
+    if not return_pair:
+        return lb
+
+    if source is not None:
+        v, reverse = source
+        order, _, _ = sg.bfs.levels(G, v, reverse)
+        pair = (order[-1], v) if reverse else (v, order[-1])
+    return lb, pair
@@ -2,11 +2,15 @@
 Module implementing the standard traversal techniques for a directed graph
 """
 
-from numpy import uint32, zeros, empty
+from numpy import uint32, zeros, empty, asarray
 from itertools import imap
 from staticgraph.exceptions import StaticGraphNodeAbsentException
+from staticgraph.context import prepare
+import staticgraph.bfs as bfs
+import staticgraph.dfs as dfs
 
-def bfs_all(G, s, maxdepth = (2 ** 32) - 1):
+def bfs_all(G, s, maxdepth = (2 ** 32) - 1, direction_optimizing = False,
+            threads = 1):
     """
     Returns a sequence of vertices for 
     staticgraph G in a breadth-first-search order starting at source s.
@@ -16,6 +20,10 @@ def bfs_all(G, s, maxdepth = (2 ** 32) - 1):
     G        : An undirected staticgraph.
     s        : Source node to start the bfs traversal.
     maxdepth : Optional parameter denoting the maximum depth for traversal.
+    direction_optimizing : Optional parameter to switch between top-down
+                           and bottom-up expansion of the levels.
+    threads  : Optional parameter denoting the number of threads used to
+               expand every level.
     
     Returns
     -------
@@ -29,10 +37,17 @@ def bfs_all(G, s, maxdepth = (2 ** 32) - 1):
     ------
 
     It is mandatory that G be directed.
+    With direction_optimizing set or threads > 1, the nodes within a depth 
+    may appear in a different order.
     """
     
     if s >= G.order():
         raise StaticGraphNodeAbsentException("source node absent in graph!!")
+
+    if direction_optimizing:
+        return bfs.direction_optimizing(G, s, maxdepth)
+    if threads > 1:
+        return bfs.parallel(G, s, maxdepth, threads)
     
     order = G.order()
     dist = empty(order , dtype = uint32)
@@ -72,7 +87,7 @@ def bfs_all(G, s, maxdepth = (2 ** 32) - 1):
     bfs_indptr[depth] = index
     return bfs_indptr[:depth + 1], bfs_indices[:index]
 
-def bfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
+def bfs_search(G, s, t, maxdepth = (2 ** 32) - 1, ctx = None):
     """
     Returns the path from source to target in BFS
     
@@ -82,6 +97,7 @@ def bfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
     s        : Source node to start the BFS.
     t        : Target node to start the BFS.
     maxdepth : Optional parameter denoting the maximum depth for BFS.
+    ctx      : Optional TraversalContext reused across queries.
     
     Returns
     -------
@@ -93,6 +109,7 @@ def bfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
 
     It is mandatory that G be directed.
     Returns None on failure to find target node.
+    Only the entries touched by the previous query on ctx are reset.
     """
 
     if s >= G.order():
@@ -100,47 +117,130 @@ def bfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
     if t >= G.order():
         raise StaticGraphNodeAbsentException("target node absent in graph!!")
     
-    order = G.order()
-    path = empty(order , dtype = uint32)
-    path[:] = (2 ** 32) - 1
-    pred = empty(order , dtype = uint32)
-    pred[:] = (2 ** 32) - 1
-    queue = empty(order, dtype = uint32)
+    # Nodes with a predecessor are stamped with the current epoch
+    ctx = prepare(G, ctx)
+    epoch = ctx.epoch
+    stamp = ctx.stamp
+    dist = ctx.dist
+    pred = ctx.pred
+    queue = ctx.queue
     front = rear = 0
     queue[rear] = s
     rear = 1
-    depth = path[s] = 0
+    depth = dist[s] = 0
+    stamp[s] = epoch
+    pred[s] = s
 
-    while front != rear and pred[t] == (2 ** 32) - 1 and depth < maxdepth:
+    while front != rear and stamp[t] != epoch and depth < maxdepth:
         u = queue[front]
         front += 1
         start = G.s_indptr[u]
         stop  = G.s_indptr[u + 1]
         for v in imap(int, G.s_indices[start:stop]):
-            if pred[v] == (2 ** 32) - 1:
+            if stamp[v] != epoch:
+                stamp[v] = epoch
                 pred[v] = u
-                path[v] = path[u] + 1
-                if depth < path[v]:
+                dist[v] = dist[u] + 1
+                if depth < dist[v]:
                     depth += 1
                 queue[rear] = v
                 rear = rear + 1
             if v == t:
                 break
     
-    if pred[t] == (2 ** 32) - 1:
+    if stamp[t] != epoch:
         return None
     
     u = t
     index = 0
+    path = queue
     while u != s:
         path[index] = u
         index += 1
         u = pred[u]
     path[index] = s
     
-    return path[index::-1]
+    return path[index::-1].copy()
+
+def khop(G, seeds, k, direction = "out", union = False, threads = 1):
+    """
+    Returns the k-hop neighbourhoods of a batch of seed nodes.
+    
+    Parameters
+    ----------
+    G         : A directed staticgraph.
+    seeds     : A sequence of seed nodes.
+    k         : Maximum number of hops from a seed.
+    direction : Optional parameter, "out" follows the successors, "in" 
+                the predecessors and "both" follows either.
+    union     : Optional parameter to merge the neighbourhoods of all seeds.
+    threads   : Optional parameter denoting the number of threads to use.
+    
+    Returns
+    -------
+    indptr  : A numpy uint64 array of index pointers, the neighbourhood 
+              of seeds[i] is indices[indptr[i]:indptr[i + 1]].
+    indices : A numpy uint32 array of the nodes in the neighbourhoods, 
+              each starting with its seed.
+    hop     : A numpy uint32 array with the distance of every node in 
+              indices from its seed.
+              
+    Notes
+    ------
+
+    It is mandatory that G be directed.
+    With union set, indptr has a single row holding every node within 
+    k hops of some seed along with the distance to the closest seed.
+    Every thread reuses one workspace for all of its seeds.
+    """
+
+    seeds = asarray(seeds, dtype = uint32)
+    if seeds.size != 0 and seeds.max() >= G.order():
+        raise StaticGraphNodeAbsentException("seed node absent in graph!!")
+    if direction not in ("out", "in", "both"):
+        raise ValueError("direction must be one of out, in or both")
+
+    return bfs.khop(G, seeds, k, direction, union, threads)
 
-def dfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
+def bidirectional_bfs_search(G, s, t, maxdepth = (2 ** 32) - 1, ctx = None,
+                             rctx = None):
+    """
+    Returns the path from source to target using a bidirectional BFS
+    
+    Parameters
+    ----------
+    G        : A directed staticgraph.
+    s        : Source node to start the BFS.
+    t        : Target node to start the BFS.
+    maxdepth : Optional parameter denoting the maximum depth for BFS.
+    ctx      : Optional TraversalContext reused for the search from s.
+    rctx     : Optional TraversalContext reused for the search from t.
+    
+    Returns
+    -------
+    path : A numpy uint32 array returning a sequence of vertices in 
+           a shortest path from s to t.
+              
+    Notes
+    ------
+
+    It is mandatory that G be directed.
+    Searches from s and t meet in the middle, so only about the square 
+    root of the nodes seen by bfs_search are explored on small world graphs.
+    Returns None on failure to find target node.
+    Only the entries touched by the previous queries on ctx and rctx
+    are reset.
+    """
+
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
+
+    return bfs.bidirectional(G, s, t, prepare(G, ctx), prepare(G, rctx),
+                             maxdepth)
+
+def dfs_search(G, s, t, maxdepth = (2 ** 32) - 1, ctx = None):
     """
     Returns the path from source to target in DFS
     
@@ -150,6 +250,7 @@ def dfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
     s        : Source node to start the DFS.
     t        : Target node to start the DFS.
     maxdepth : Optional parameter denoting the maximum depth for DFS.
+    ctx      : Optional TraversalContext reused across queries.
     
     Returns
     -------
@@ -161,6 +262,9 @@ def dfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
 
     It is mandatory that G be directed.
     Returns None on failure to find target node.
+    Only the entries touched by the previous query on ctx are reset.
+    Every node on the stack keeps a cursor into its adjacency, 
+    so each edge is inspected at most once.
     """
 
     if s >= G.order():
@@ -168,47 +272,88 @@ def dfs_search(G, s, t, maxdepth = (2 ** 32) - 1):
     if t >= G.order():
         raise StaticGraphNodeAbsentException("target node absent in graph!!")
     
-    order = G.order()
-    path = empty(order , dtype = uint32)
-    path[:] = (2 ** 32) - 1
-    pred = empty(order , dtype = uint32)
-    pred[:] = (2 ** 32) - 1
-    stack = empty(order, dtype = uint32)
+    # Nodes with a predecessor are stamped with the current epoch
+    ctx = prepare(G, ctx)
+    epoch = ctx.epoch
+    stamp = ctx.stamp
+    dist = ctx.dist
+    pred = ctx.pred
+    stack = ctx.queue
+    cursor = ctx.cursor
     top = 0
     stack[top] = s
-    path[s] = 0
+    cursor[s] = G.s_indptr[s]
+    dist[s] = 0
+    stamp[s] = epoch
+    pred[s] = s
     flag = 0
 
     while top >= 0:
         if flag == 1:
             break
         u = stack[top]
-        start = G.s_indptr[u]
+
+        # Resume the scan of u where it was left off
+        start = cursor[u]
         stop  = G.s_indptr[u + 1]
-        for v in imap(int, G.s_indices[start:stop]):
-            if pred[v] == (2 ** 32) - 1:
+        for i in xrange(start, stop):
+            v = int(G.s_indices[i])
+            cursor[u] = i + 1
+            if stamp[v] != epoch:
+                stamp[v] = epoch
                 pred[v] = u
-                path[v] = path[u] + 1
-                if path[v] >= maxdepth:
+                dist[v] = dist[u] + 1
+                if dist[v] >= maxdepth:
                     break
                 if v == t:
                     flag = 1
                     break
                 top = top + 1
                 stack[top] = v
+                cursor[v] = G.s_indptr[v]
                 break
         else:
             top -= 1
 
-    if pred[t] == (2 ** 32) - 1:
+    if stamp[t] != epoch:
         return None
         
     u = t
     index = 0
+    path = stack
     while u != s:
         path[index] = u
         index += 1
         u = pred[u]
     path[index] = s
     
-    return path[index::-1]
+    return path[index::-1].copy()
+
+def dfs_all(G, sources = None, reverse = False):
+    """
+    Returns the depth-first-search forest of staticgraph G.
+    
+    Parameters
+    ----------
+    G       : A directed staticgraph.
+    sources : Optional sequence of roots tried in order, all nodes if None.
+    reverse : Optional parameter to traverse along the predecessors.
+    
+    Returns
+    -------
+    preorder  : A numpy uint32 array of the visited nodes in preorder.
+    postorder : A numpy uint32 array of the visited nodes in postorder.
+    parent    : A numpy uint32 array with the parent of every node 
+                in the forest.
+    discovery : A numpy uint64 array with the discovery time of every node.
+    finish    : A numpy uint64 array with the finish time of every node.
+              
+    Notes
+    ------
+
+    It is mandatory that G be directed.
+    parent is (2 ** 32) - 1 for roots and unvisited nodes. Discovery and 
+    finish times are (2 ** 64) - 1 for unvisited nodes.
+    """
+
+    return dfs.dfs(G, sources, reverse)
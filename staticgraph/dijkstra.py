@@ -2,59 +2,29 @@
 Module implementing the Dijkstra shortest path algorithm for weighted graphs
 """
 
-from numpy import arange, uint32, zeros, empty, float64, uint8
+from numpy import uint32, float64, concatenate, flatnonzero, array
+from numpy import floor, argsort
 from staticgraph.exceptions import StaticGraphNodeAbsentException
+from staticgraph.context import prepare
+import staticgraph.sssp as sssp
 
-def isEmpty(prior_queue):
-    """
-    Returns whether the priority queue is empty or not.
-    """
-
-    return prior_queue[0] == (2 ** 32) - 1
-
-def min_heapify(heap, weights, i, heap_size):
-    """
-    Module that maintains heap property of the heap.
+def integral_weights(G, directed = False):
     """
+    Returns whether all edge weights of G are small non-negative integers.
 
-    left = (2 * i) + 1
-    right = (2 * i) + 2
-    smallest = i
-    if left < heap_size and weights[heap[left]] < weights[heap[i]]:
-        smallest = left
-    if right < heap_size and weights[heap[right]] < weights[heap[smallest]]:
-        smallest = right
-        
-    if smallest != i:
-
-        #exchanging the values in the heap
-        heap[i], heap[smallest] = heap[smallest], heap[i]
-        min_heapify(heap, weights, smallest, heap_size)
-
-def build_min_heap(p_queue, heap_size, weights):
-    """
-    Module to create a heap from an unsorted array p_queue
-    according to the corresponding values of weights.
-    """
-
-    for i in range(heap_size // 2, -1, -1):
-        min_heapify(p_queue, weights, i, heap_size)
-
-def extract_min_dist(p_queue, weights, heap_size):
-    """
-    Module to extract the minimum element from the heap
+    Weights are small when a bucket queue with one bucket per distance
+    up to the largest weight, at most 2 ** 16, pays off over a heap.
     """
 
-    minimum = p_queue[0]
-    p_queue[0] = p_queue[heap_size - 1]
-    p_queue[heap_size - 1] = (2 ** 32) - 1
-    heap_size -= 1
-    
-    #Restoring heap property
-    min_heapify(p_queue, weights, 0, heap_size)
-    return minimum
+    weights = G.s_weights if directed else G.weights
+    if weights.size == 0:
+        return True
+    if weights.min() < 0 or weights.max() > 2 ** 16:
+        return False
+    return bool((floor(weights) == weights).all())
 
-def dijkstra_all(G, s, directed = False):
+def dijkstra_all(G, s, directed = False, integer = None, cutoff = None,
+                 k = None, ctx = None):
     """
     Returns a sequence of vertices alongwith the length of their 
     shortest paths from source node s for a weighted staticgraph G.
@@ -64,8 +34,16 @@ def dijkstra_all(G, s, directed = False):
 
     Parameters
     ----------
-    G : An undirected weighted staticgraph.
-    s : Source node.
+    G       : An undirected weighted staticgraph.
+    s       : Source node.
+    integer : Optional parameter, True runs Dial's bucket queue algorithm
+              for integer weights, False the binary heap and None picks 
+              Dial's algorithm when the weights are small integers.
+    cutoff  : Optional parameter, only nodes within this distance from 
+              the source are returned.
+    k       : Optional parameter, only the k nodes closest to the source,
+              including the source itself, are returned.
+    ctx     : Optional TraversalContext reused across bounded queries.
     
     Returns
     -------
@@ -83,48 +61,129 @@ def dijkstra_all(G, s, directed = False):
 
     weights[i] = (2 ** 64) : implies that the node i is unreachable from the source.
     directed must be set to True for directed graphs.
+    Uses an indexed binary heap with decrease-key reading the edge weights
+    straight from the adjacency arrays.
+    If cutoff or k is given, unreachable and farther nodes are left out
+    and the heap search stops as soon as the bound is hit. With ctx only
+    the entries of the nodes reached are touched, so small balls in 
+    large graphs cost time proportional to the ball.
+    """
+    
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+
+    if cutoff is not None or k is not None:
+        if cutoff is None:
+            cutoff = (2 ** 64) - 1
+        if k is None:
+            k = G.order()
+        if k <= 0 or cutoff < 0:
+            return array([], dtype = uint32), array([], dtype = float64)
+        return sssp.bounded(G, s, directed, cutoff, k, prepare(G, ctx))
+
+    if integer is None:
+        integer = integral_weights(G, directed)
+
+    sources = array([s], dtype = uint32)
+    if integer:
+        order, weights, _ = sssp.dial(G, sources, directed)
+    else:
+        order, weights, _ = sssp.dijkstra(G, sources, directed)
+
+    # Settled nodes are already sorted, the unreachable ones follow
+    nodes = concatenate((order, flatnonzero(weights == (2 ** 64) - 1)))
+    nodes = nodes.astype(uint32)
+    weights = weights[nodes]
+    return nodes, weights
+
+def multi_source_dijkstra(G, sources, directed = False):
+    """
+    Returns the distance of every node to its nearest source in a 
+    weighted staticgraph G, alongwith that source.
+    
+    This function runs a single Dijkstra's algorithm with the heap 
+    seeded with all the sources at distance 0.
+
+    Parameters
+    ----------
+    G       : A weighted staticgraph.
+    sources : A sequence of source nodes, e.g. facilities or depots.
+    
+    Returns
+    -------
+    dist  : A numpy float64 array, the distance from the nearest source.
+
+    owner : A numpy uint32 array, the nearest source of each node. The 
+            nodes owned by a source form its Voronoi cell.
+
+    pred  : A numpy uint32 array, the predecessor on a shortest path 
+            from the owner.
+    
+    Notes
+    ------
+
+    dist[i] = (2 ** 64) - 1 and owner[i] = pred[i] = (2 ** 32) - 1 
+    imply that the node i is unreachable from all sources.
+    pred is (2 ** 32) - 1 for the sources themselves.
+    directed must be set to True for directed graphs.
+    Ties between equally near sources are broken arbitrarily.
+    """
+    
+    sources = array(sources, dtype = uint32, ndmin = 1)
+    if sources.size and sources.max() >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+
+    order, dist, pred = sssp.dijkstra(G, sources, directed)
+    owner = sssp.owners(order, pred)
+    return dist, owner, pred
+
+def delta_stepping(G, s, directed = False, delta = None, threads = 1):
+    """
+    Returns a sequence of vertices alongwith the length of their 
+    shortest paths from source node s for a weighted staticgraph G.
+    
+    This function uses the parallel delta stepping algorithm to find 
+    single-source shortest paths for the Graph G.
+
+    Parameters
+    ----------
+    G       : A weighted staticgraph with non-negative weights.
+    s       : Source node.
+    delta   : Optional parameter, width of the distance buckets.
+              If None, the largest weight divided by the average degree.
+    threads : Optional parameter, number of threads to use.
+    
+    Returns
+    -------
+    path : 2 numpy arrays, same as dijkstra_all.
+    
+    Notes
+    ------
+
+    directed must be set to True for directed graphs.
+    Small delta approaches Dijkstra's algorithm with little parallel work
+    per bucket, large delta approaches Bellman-Ford with many wasted 
+    relaxations. Nodes at equal distance may be ordered differently
+    than by dijkstra_all.
     """
     
     if s >= G.order():
         raise StaticGraphNodeAbsentException("source node absent in graph!!")
 
-    order = G.order()
-    nodes = arange(order, dtype = uint32)
-    weights = empty(order, dtype = float64)
-    visited = zeros(order, dtype = uint8)
-    weights[:] = (2 ** 64) -1
-    weights[s] = 0
-    heap_size = order
-    build_min_heap(nodes, heap_size, weights)
-
-    while isEmpty(nodes) == False:
-        u = extract_min_dist(nodes, weights, heap_size)
-        visited[u] = 1
-        heap_size -= 1
-
-        #if graph is undirected
-        if directed == False:    
-            for v in G.neighbours(u):
-                if visited[v] == 0:
-                    if weights[v] > (weights[u] + G.weight(u, v)):
-                        weights[v] = (weights[u] + G.weight(u, v))
-                    
-        #if graph is directed
-        else:
-             for v in G.successors(u):
-                 if visited[v] == 0:
-                     if weights[v] > (weights[u] + G.weight(u, v)):
-                         weights[v] = (weights[u] + G.weight(u, v))
-        
-        build_min_heap(nodes, heap_size, weights)
-
-    nodes = arange(order, dtype = uint32)
-    sort_indices = weights.argsort()
-    weights = weights[sort_indices]
-    nodes = nodes[sort_indices]
+    if delta is None:
+        weights = G.s_weights if directed else G.weights
+        max_weight = weights.max() if weights.size else 0.0
+        avg_degree = float(weights.size) / max(G.order(), 1)
+        delta = max_weight / max(avg_degree, 1.0)
+        if delta == 0:
+            delta = 1.0
+
+    weights = sssp.delta_stepping(G, s, directed, delta, threads)
+    nodes = argsort(weights, kind = "mergesort").astype(uint32)
+    weights = weights[nodes]
     return nodes, weights
 
-def dijkstra_search(G, s, t, directed = False):
+def dijkstra_search(G, s, t, directed = False, ctx = None):
     """
     Returns a sequence of vertices source node s to target node t for a 
     weighted staticgraph G.
@@ -134,9 +193,10 @@ def dijkstra_search(G, s, t, directed = False):
 
     Parameters
     ----------
-    G : An undirected weighted staticgraph.
-    s : Source node.
-    t : Target node
+    G   : An undirected weighted staticgraph.
+    s   : Source node.
+    t   : Target node
+    ctx : Optional TraversalContext reused across queries.
     
     Returns
     -------
@@ -151,62 +211,61 @@ def dijkstra_search(G, s, t, directed = False):
     Notes
     ------
 
-    returns None if target is unreachable from source.
+    returns (None, None) if target is unreachable from source.
     directed keyword must be set to True for directed graphs.
+    The indexed heap only holds the nodes reached so far and only the 
+    entries touched by the previous query on ctx are reset.
     """
     
     if s >= G.order():
         raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
 
-    order = G.order()
-    nodes = arange(order, dtype = uint32)
-    weights = empty(order, dtype = float64)
-    visited = zeros(order, dtype = uint8)
-    pred = empty(order, dtype = uint32)
-    pred[:] = (2 ** 32) - 1
-    weights[:] = (2 ** 64) -1
-    weights[s] = 0
-    heap_size = order
-    build_min_heap(nodes, heap_size, weights)
-    flag = 0
-
-    while isEmpty(nodes) == False:
-        u = extract_min_dist(nodes, weights, heap_size)
-        if u == t:
-            flag = 1
-            break
-        visited[u] = 1
-        heap_size -= 1
-
-        #if graph is undirected
-        if directed == False:    
-            for v in G.neighbours(u):
-                if visited[v] == 0:
-                    if weights[v] > (weights[u] + G.weight(u, v)):
-                        weights[v] = (weights[u] + G.weight(u, v))
-                        pred[v] = u
-       
-                    
-        #if graph is directed
-        else:
-             for v in G.successors(u):
-                 if visited[v] == 0:
-                     if weights[v] > (weights[u] + G.weight(u, v)):
-                         weights[v] = (weights[u] + G.weight(u, v))
-                         pred[v] = u
-
-        build_min_heap(nodes, heap_size, weights)
-
-    if flag == 0:
-        return None, None
+    return sssp.search(G, s, t, directed, prepare(G, ctx))
+
+def bidirectional_dijkstra_search(G, s, t, directed = False, ctx = None,
+                                  rctx = None):
+    """
+    Returns a sequence of vertices source node s to target node t for a 
+    weighted staticgraph G.
+    
+    This function runs Dijkstra's algorithm from s along the successors
+    and from t along the predecessors at the same time.
+
+    Parameters
+    ----------
+    G    : A weighted staticgraph.
+    s    : Source node.
+    t    : Target node
+    ctx  : Optional TraversalContext reused for the search from s.
+    rctx : Optional TraversalContext reused for the search from t.
+    
+    Returns
+    -------
+    nodes : 2 numpy arrays, same as dijkstra_search.
+    
+    Notes
+    ------
+
+    returns (None, None) if target is unreachable from source.
+    directed keyword must be set to True for directed graphs.
+    The searches stop once the sum of their nearest distances reaches 
+    the best path through a node seen by both, so each only covers 
+    about half the distance from s to t.
+    """
+    
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
 
-    u = t
-    index = 0
-    while u != s:
-        nodes[index] = u
-        index += 1
-        u = pred[u]
-    nodes[index] = s
+    ctx = prepare(G, ctx)
+    rctx = prepare(G, rctx)
+    meet, dist = sssp.bidirectional(sssp._forward(G, directed),
+                                    sssp._backward(G, directed),
+                                    s, t, ctx, rctx, False)
+    if meet is None:
+        return None, None
 
-    distance = weights[t]
-    return nodes[index::-1], distance
+    return sssp.meeting_path(ctx.pred, rctx.pred, s, t, meet), dist
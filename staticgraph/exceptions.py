@@ -23,3 +23,16 @@ class StaticGraphDisconnectedGraphException(StaticGraphException):
     Subclass of StaticGraphException class for
     handling unexpected disconnected graphs.
     """
+
+class StaticGraphNegativeCycleException(StaticGraphException):
+    """
+    Subclass of StaticGraphException class for
+    negative cycles reachable from the source.
+
+    cycle - nodes of a negative cycle in the order of its edges
+    """
+
+    def __init__(self, msg, cycle):
+
+        StaticGraphException.__init__(self, msg)
+        self.cycle = cycle
@@ -0,0 +1,117 @@
+"""
+Pools of workers running a traversal per source over a shared graph.
+"""
+
+__all__ = ["Executor", "run"]
+
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+
+# Graphs of the live executors, forked process workers inherit them
+_graphs = {}
+
+def _call(task):
+    """
+    Run one chunk of sources in a worker.
+    """
+
+    key, func, chunk = task
+    return func(_graphs[key], chunk)
+
+class Executor(object):
+    """
+    Run a function over chunks of sources in a pool of workers.
+
+    Thread workers share the graph object, they pay off when the function
+    releases the GIL as the compiled kernels do. Process workers are
+    forked after the graph is registered, so they map the same arrays,
+    or the same files for a graph loaded from a store, without copying
+    them. Functions run by process workers must be picklable, e.g.
+    module level functions or partials of them, and must not start
+    OpenMP threads: libgomp is not fork safe, so a worker forked after
+    the parent ran a kernel with threads > 1 blocks in its first
+    threaded kernel. Pin such functions to threads = 1.
+
+    G         - the graph shared by the workers
+    workers   - # workers, the function runs in the caller if 1
+    processes - use processes instead of threads
+    """
+
+    def __init__(self, G, workers = 1, processes = False):
+
+        self.G       = G
+        self.workers = max(workers, 1)
+        self.key     = id(self)
+        self.pool    = None
+
+        _graphs[self.key] = G
+        if self.workers > 1:
+            self.pool = Pool(self.workers) if processes else \
+                        ThreadPool(self.workers)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def close(self):
+        """
+        Stop the workers.
+        """
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        _graphs.pop(self.key, None)
+
+    def chunks(self, sources, align = 1):
+        """
+        Split sources into a few chunks per worker.
+
+        Every chunk but the last has a multiple of align sources.
+        """
+
+        n = len(sources)
+        size = -(-n // (4 * self.workers)) if self.workers > 1 else n
+        size = max(-(-size // align) * align, 1)
+        return [sources[i:i + size] for i in xrange(0, n, size)]
+
+    def map(self, func, sources, align = 1):
+        """
+        Return the results of func(G, chunk) for the chunks of sources.
+
+        The results are in the order of the chunks.
+        """
+
+        chunks = self.chunks(sources, align)
+        if self.pool is None:
+            return [func(self.G, chunk) for chunk in chunks]
+        return self.pool.map(_call, [(self.key, func, chunk)
+                                     for chunk in chunks], chunksize = 1)
+
+def run(G, func, sources, workers = 1, processes = False, align = 1):
+    """
+    Return the results of func(G, chunk) for chunks of sources.
+
+    Parameters
+    ----------
+    G         : A staticgraph.
+    func      : Function of the graph and a chunk of sources.
+    sources   : A numpy array of sources.
+    workers   : Optional parameter, # workers running the chunks.
+    processes : Optional parameter, use processes instead of threads.
+                func must then run single threaded, see Executor.
+    align     : Optional parameter, chunk sizes are multiples of align,
+                e.g. 64 for the bit parallel BFS.
+
+    Returns
+    -------
+    results : A list of the results, in the order of the chunks.
+    """
+
+    with Executor(G, workers, processes) as ex:
+        return ex.map(func, sources, align)
@@ -3,7 +3,9 @@ module to implement different centrality measures for undirected graphs.
 """
 
 import staticgraph as sg
-from numpy import empty, float64
+from numpy import empty, zeros, array, arange, where, float64, uint32, \
+                  minimum, maximum, repeat, diff, unique, bincount, int64
+from random import sample
 
 def degree_centrality(G):
     """
@@ -35,3 +37,191 @@ def degree_centrality(G):
     for u in G.nodes():
         degree_centrality[u] = float(G.degree(u)) / d
     return degree_centrality
+
+def _distance_sums(G, sources):
+    """
+    Return the sums of the distances from sources to every node and
+    the number of sources reaching every node.
+    """
+
+    n_nodes = G.order()
+    sums = zeros(n_nodes, dtype = float64)
+    counts = zeros(n_nodes, dtype = float64)
+
+    # Bit parallel BFS, 64 rows at a time
+    for i in xrange(0, len(sources), 64):
+        dist = sg.bfs.ms_distances(G, sources[i:i + 64])
+        reached = dist != (2 ** 32) - 1
+        sums += where(reached, dist, 0).sum(axis = 0)
+        counts += reached.sum(axis = 0)
+
+    return sums, counts
+
+def closeness_centrality(G, k = None, workers = 1, processes = False):
+    """
+    Compute the closeness centrality for nodes.
+
+    The closeness centrality of a node v is the number of other nodes
+    reachable from v divided by the sum of their distances, scaled by
+    the fraction of the other nodes which are reachable.
+
+    Parameters
+    ----------
+    G         : An undirected staticgraph
+    k         : int, optional
+                Estimate from the distances of k random sources.
+    workers   : int, optional
+                # workers sharing the BFS runs, see executor.
+    processes : bool, optional
+                Use processes instead of threads for the workers.
+
+    Returns
+    -------
+    closeness_centrality : numpy array having closeness centrality of 
+                           the nodes.
+
+    Notes
+    -----
+    The values are normalized as by networkx. Distances are symmetric,
+    so the sums of distances of all nodes come from the sums over the
+    sources. With k sources they are scaled by n / k, as proposed by 
+    Eppstein and Wang, so the error drops with sqrt(k).
+    """
+
+    n_nodes = G.order()
+    if k is None or k >= n_nodes:
+        sources = arange(n_nodes, dtype = uint32)
+    else:
+        sources = array(sample(xrange(n_nodes), k), dtype = uint32)
+
+    sums = zeros(n_nodes, dtype = float64)
+    counts = zeros(n_nodes, dtype = float64)
+    for s, c in sg.executor.run(G, _distance_sums, sources, workers,
+                                processes, 64):
+        sums += s
+        counts += c
+
+    scale = float(n_nodes) / max(sources.size, 1)
+    sums *= scale
+    others = counts * scale - 1
+
+    closeness_centrality = zeros(n_nodes, dtype = float64)
+    if n_nodes < 2:
+        return closeness_centrality
+    valid = (sums > 0) & (others > 0)
+    closeness_centrality[valid] = others[valid] / sums[valid] * \
+                                  others[valid] / (n_nodes - 1)
+    return closeness_centrality
+
+def betweenness_centrality(G, k = None, adaptive = None, normalized = True,
+                           threads = 1, workers = 1, processes = False):
+    """
+    Compute the shortest path betweenness centrality for nodes.
+
+    The betweenness centrality of a node v is the sum over the pairs of
+    nodes s, t of the fraction of the shortest paths from s to t that
+    pass through v.
+
+    Parameters
+    ----------
+    G          : An undirected staticgraph, weighted or not.
+    k          : int, optional
+                 Estimate from the dependencies of k random sources.
+    adaptive   : float, optional
+                 Draw sources until the largest summed dependency is
+                 adaptive * n, at most k of them.
+    normalized : bool, optional
+                 Divide by (n - 1)(n - 2), else count each pair once.
+    threads    : int, optional
+                 # threads of each worker, with their own accumulators.
+    workers    : int, optional
+                 # workers sharing the sources, see executor.
+    processes  : bool, optional
+                 Use processes instead of threads for the workers, each
+                 running a single thread.
+
+    Returns
+    -------
+    betweenness_centrality : numpy array having betweenness centrality of
+                             the nodes.
+
+    Notes
+    -----
+    Uses the compiled algorithm of Brandes, a BFS or a Dijkstra run per
+    source followed by the accumulation of the dependencies. Values are
+    scaled as by networkx. The estimates from sampled sources are
+    scaled by n / # sources.
+    """
+
+    n_nodes = G.order()
+    node, _, used = sg.brandes.sampled(G, False, k, adaptive, False,
+                                       threads, workers, processes)
+
+    if normalized:
+        scale = 1.0 / ((n_nodes - 1) * (n_nodes - 2)) if n_nodes > 2 else 0.0
+    else:
+        scale = 0.5
+    if used:
+        scale *= float(n_nodes) / used
+    return node * scale
+
+def edge_betweenness_centrality(G, k = None, adaptive = None,
+                                normalized = True, threads = 1,
+                                workers = 1, processes = False):
+    """
+    Compute the shortest path betweenness centrality for edges.
+
+    The betweenness centrality of an edge e is the sum over the pairs of
+    nodes s, t of the fraction of the shortest paths from s to t that
+    pass through e.
+
+    Parameters
+    ----------
+    G          : An undirected staticgraph, weighted or not.
+    k          : int, optional
+                 Estimate from the dependencies of k random sources.
+    adaptive   : float, optional
+                 Draw sources until the largest summed node dependency
+                 is adaptive * n, at most k of them.
+    normalized : bool, optional
+                 Divide by n (n - 1), else count each pair once.
+    threads    : int, optional
+                 # threads of each worker, with their own accumulators.
+    workers    : int, optional
+                 # workers sharing the sources, see executor.
+    processes  : bool, optional
+                 Use processes instead of threads for the workers, each
+                 running a single thread.
+
+    Returns
+    -------
+    edge_betweenness_centrality : numpy array aligned with G.n_indices,
+                                  the entries of both copies of an edge
+                                  hold its betweenness centrality.
+
+    Notes
+    -----
+    The entry of the edge (u, G.n_indices[j]) is j for
+    G.n_indptr[u] <= j < G.n_indptr[u + 1]. Values are scaled as by
+    networkx.
+    """
+
+    n_nodes = G.order()
+    _, edge, used = sg.brandes.sampled(G, False, k, adaptive, True,
+                                       threads, workers, processes)
+
+    # Paths through either copy of an edge pass through the edge
+    tails = repeat(arange(n_nodes, dtype = int64),
+                   diff(G.n_indptr).astype(int64))
+    heads = G.n_indices.astype(int64)
+    keys = minimum(tails, heads) * n_nodes + maximum(tails, heads)
+    _, inverse = unique(keys, return_inverse = True)
+    edge = bincount(inverse, weights = edge)[inverse]
+
+    if normalized:
+        scale = 1.0 / (n_nodes * (n_nodes - 1)) if n_nodes > 1 else 0.0
+    else:
+        scale = 0.5
+    if used:
+        scale *= float(n_nodes) / used
+    return edge * scale
@@ -3,12 +3,18 @@ Functions for the standard distance measures for undirected graphs.
 """
 
 import staticgraph as sg
-from numpy import empty, uint32, amax, amin, array
+from numpy import empty, uint32, amax, amin, array, argmax, argmin, diff
+from numpy import concatenate, zeros, ones, arange, maximum, minimum
+from numpy import searchsorted, argsort, flatnonzero, split, int64
 from random import sample
 from staticgraph.exceptions import StaticGraphNodeAbsentException
 from staticgraph.exceptions import StaticGraphDisconnectedGraphException
 
-def eccentricity(G, n_nodes, v=None):
+# Fringes of at most this many nodes share few BFS levels, exact_diameter
+# runs one BFS per node for them
+SMALL_FRINGE = 8
+
+def eccentricity(G, n_nodes, v=None, workers=1, processes=False):
     """
     Return the eccentricity of nodes in G.
 
@@ -24,6 +30,12 @@ def eccentricity(G, n_nodes, v=None):
     v :       node, optional
               Return value of specified node       
 
+    workers : int, optional
+              # workers sharing the BFS runs, see executor.
+
+    processes : bool, optional
+              Use processes instead of threads for the workers.
+
     Returns
     -------
     ecc : A 2D numpy array.
@@ -39,31 +51,24 @@ def eccentricity(G, n_nodes, v=None):
         raise StaticGraphNodeAbsentException("given node absent in graph!!")
     
     order = G.order()
-    edgelist = empty((n_nodes ** 2, 2), dtype = uint32) 
-    index = 0
-
     nodes = sample(xrange(order), n_nodes)    
     nodes = array(nodes, dtype = uint32)
     
     if v != None:
-        if v not in nodes:
-            nodes[0] = v
-
-    if v != None:
-        sp = sg.graph_traversal.bfs_all(G, v)
-        if sp[1].size < n_nodes:
+        ecc, reached = sg.bfs.ms_eccentricity(G, array([v], dtype = uint32))
+        if reached[0] < n_nodes:
             raise StaticGraphDisconnectedGraphException("disconnected graph!!")
-        return sp[0].size - 2
+        return ecc[0]
 
+    # Bit parallel BFS carries 64 sources per traversal
     ecc = empty((2, n_nodes), dtype = uint32)
-    index = 0
-    for i in xrange(n_nodes):
-        sp = sg.graph_traversal.bfs_all(G, nodes[i])
-        ecc[0, i] = nodes[i]
-        if sp[1].size < n_nodes:
-           raise StaticGraphDisconnectedGraphException("disconnected graph!!")
-        else:
-            ecc[1, i] = sp[0].size - 2
+    ecc[0] = nodes
+    parts = sg.executor.run(G, sg.bfs.ms_eccentricity, nodes, workers,
+                            processes, 64)
+    ecc[1] = concatenate([part[0] for part in parts])
+    reached = concatenate([part[1] for part in parts])
+    if (reached < n_nodes).any():
+        raise StaticGraphDisconnectedGraphException("disconnected graph!!")
 
     return ecc
 
@@ -198,3 +203,196 @@ def center(G, n_nodes, e = None):
         i += 1
 
     return e[0][:i]
+
+def _bfs_eccentricity(G, nodes):
+    """
+    Return the eccentricities of nodes, with one BFS each.
+    """
+
+    ecc = empty(len(nodes), dtype = uint32)
+    for k, v in enumerate(nodes):
+        order, dist, _ = sg.bfs.levels(G, v)
+        ecc[k] = dist[order[-1]]
+    return ecc
+
+def exact_diameter(G, return_pair = False):
+    """
+    Return the exact diameter of G.
+
+    The bounds of a few BFS sweeps are tightened with the iFUB algorithm:
+    only the nodes far from a central node u need their eccentricity.
+
+    Parameters
+    ----------
+    G : An undirected staticgraph
+
+    return_pair : bool, optional
+      Also return two nodes at distance equal to the diameter.
+
+    Returns
+    -------
+    Diameter of graph, and a (source, target) tuple if return_pair.
+
+    Notes
+    -----
+    Exception is raised if given graph has disconnected components.
+    Any pair of nodes both within distance i - 1 of u is at most
+    2 * (i - 1) apart, so once the largest eccentricity among the nodes
+    at distance i or more from u exceeds that, it is the diameter.
+    Fringes are processed 64 nodes at a time by the bit parallel BFS,
+    which usually ends after a few dozen traversals, small fringes with
+    one BFS per node.
+    """
+
+    n_nodes = G.order()
+    if n_nodes == 0:
+        return (None, None) if return_pair else None
+
+    # Double sweeps give a lower bound. Each starts from the node nearest
+    # to the ends of all previous sweeps, far[u] never exceeds the
+    # eccentricity of u so u is central once they match.
+    u = int(argmax(diff(G.n_indptr)))
+    lb, pair = 0, (u, u)
+    far = zeros(n_nodes, dtype = uint32)
+    for j in xrange(5):
+        order, dist, _ = sg.bfs.levels(G, u)
+        if order.size < n_nodes:
+            raise StaticGraphDisconnectedGraphException("disconnected graph!!")
+        if dist[order[-1]] > lb:
+            lb, pair = int(dist[order[-1]]), (u, order[-1])
+        if j == 4 or dist[order[-1]] == far[u]:
+            break
+        maximum(far, dist, out = far)
+
+        a = order[-1]
+        ends, dist, _ = sg.bfs.levels(G, a)
+        if dist[ends[-1]] > lb:
+            lb, pair = int(dist[ends[-1]]), (a, ends[-1])
+        maximum(far, dist, out = far)
+        u = int(argmin(far))
+
+    i = int(dist[order[-1]])
+    ub = 2 * i
+    level = dist[order]
+
+    # Eccentricities of the fringe at distance i from u
+    source = None
+    while ub > lb:
+        fringe = order[searchsorted(level, i):searchsorted(level, i + 1)]
+        for j in xrange(0, fringe.size, 64):
+            batch = fringe[j:j + 64]
+            if fringe.size <= SMALL_FRINGE:
+                ecc = _bfs_eccentricity(G, batch)
+            else:
+                ecc, _ = sg.bfs.ms_eccentricity(G, batch)
+            k = argmax(ecc)
+            if ecc[k] > lb:
+                lb, source = int(ecc[k]), batch[k]
+
+        # The whole fringe is needed, two of its nodes can be 2 * i apart
+        ub = min(ub, max(lb, 2 * (i - 1)))
+        i -= 1
+
+    if not return_pair:
+        return lb
+
+    if source is not None:
+        order, _, _ = sg.bfs.levels(G, source)
+        pair = (source, order[-1])
+    return lb, pair
+
+def all_eccentricities(G, comp = None):
+    """
+    Return the exact eccentricity of every node of G.
+
+    The eccentricities are bounded with the algorithm of Takes and
+    Kosters, a BFS from v gives for every node w of its component
+    max(d(v, w), ecc(v) - d(v, w)) <= ecc(w) <= ecc(v) + d(v, w).
+
+    Parameters
+    ----------
+    G : An undirected staticgraph
+
+    comp : numpy array, optional
+      Component number of every node, as from components.connected.
+
+    Returns
+    -------
+    ecc : A 2D numpy array, in the same layout as eccentricity.
+          Row 1: Node labels
+          Row 2: Eccentricity of corresponding nodes.
+
+    Notes
+    -----
+    The eccentricity of a node is taken within its connected component,
+    so isolated nodes have eccentricity 0.
+    Nodes whose bounds meet are done. After a double sweep, sources are
+    picked among the rest, alternately the one with the largest upper
+    bound and the one with the smallest lower bound, ties going to the
+    larger degree. Nodes of degree one are left out and get the
+    eccentricity of their neighbour plus one. Only the nodes of the
+    component being bounded are touched by each BFS.
+    """
+
+    n_nodes = G.order()
+    if comp is None:
+        comp = sg.components.connected(G)
+
+    ecc = zeros((2, n_nodes), dtype = uint32)
+    ecc[0] = arange(n_nodes, dtype = uint32)
+
+    # Nodes grouped by component
+    nodes = argsort(comp, kind = "mergesort").astype(uint32)
+    bounds = flatnonzero(diff(comp[nodes])) + 1
+    ctx = sg.context.TraversalContext(n_nodes)
+    local = empty(n_nodes, dtype = uint32)
+    degree = diff(G.n_indptr)
+
+    for members in split(nodes, bounds):
+        size = members.size
+        if size == 1:
+            continue
+
+        local[members] = arange(size, dtype = uint32)
+        deg = degree[members]
+        lower = zeros(size, dtype = int64)
+        upper = empty(size, dtype = int64)
+        upper.fill(n_nodes)
+        todo = ones(size, dtype = bool)
+        d = empty(size, dtype = int64)
+
+        # A leaf is one farther from everything than its neighbour
+        leaves = flatnonzero(deg == 1) if size > 2 else []
+        todo[leaves] = False
+
+        # A double sweep from the node of largest degree first, its ends
+        # bound the far nodes and are often leaves never picked later
+        v = members[argmax(deg)]
+        sweeps, high = 2, True
+        while True:
+            ctx.reset()
+            order, hop = sg.bfs.reach(G, v, ctx)
+            d[local[order]] = hop
+            e = hop[-1]
+
+            maximum(lower, maximum(d, e - d), out = lower)
+            minimum(upper, e + d, out = upper)
+            todo &= lower != upper
+
+            left = flatnonzero(todo)
+            if left.size == 0:
+                break
+            if sweeps:
+                v, sweeps = order[-1], sweeps - 1
+                continue
+
+            bound = upper[left] if high else -lower[left]
+            best = left[bound == bound.max()]
+            v = members[best[argmax(deg[best])]]
+            high = not high
+
+        parents = local[G.n_indices[G.n_indptr[members[leaves]]]]
+        lower[leaves] = lower[parents] + 1
+        ecc[1, members] = lower
+
+    return ecc
@@ -2,19 +2,21 @@
 Module implementing the standard shortest path algorithms for unweighted graphs
 """
 
-from numpy import arange, int32, zeros
+from numpy import arange, int32, zeros, broadcast_to
 from itertools import imap
 from staticgraph.exceptions import StaticGraphNodeAbsentException
+from staticgraph.context import prepare
 
-def single_source_shortest_path(G, s):
+def single_source_shortest_path(G, s, ctx = None):
     """
     Returns a sequence of vertices alongwith the length of their 
     shortest paths from source node s for an undirected staticgraph G.
     
     Parameters
     ----------
-    G : An undirected staticgraph.
-    s : Source node.
+    G   : An undirected staticgraph.
+    s   : Source node.
+    ctx : Optional TraversalContext whose queue is reused across queries.
     
     Returns
     -------
@@ -39,7 +41,7 @@ def single_source_shortest_path(G, s):
     path[order : order * 3] = -1
     path = path.reshape(3, order)
     
-    queue = zeros(order, dtype = int32)
+    queue = prepare(G, ctx).queue
     
     front = rear = 0
     queue[rear] = s
@@ -83,6 +85,8 @@ def floyd_warshall(G):
     dense graphs or graphs with negative weights when Dijkstra's
     algorithm fails.  This algorithm can still fail if there are
     negative cycles.  It has running time O(n^3) with running space of O(n^2).
+    The updates for every intermediate node are vectorized over all pairs,
+    apsp.all_pairs_shortest_paths scales to much larger graphs.
     
     G must be undirected, simple and unweighted.
 
@@ -98,10 +102,11 @@ def floyd_warshall(G):
         matrix[i, j, 0] = matrix[j, i, 0] = 1
         matrix[i, j, 1] = i
         matrix[j, i, 1] = j
+    dist = matrix[:, :, 0]
+    pred = matrix[:, :, 1]
     for k in xrange(order):
-        for i in xrange(order):
-            for j in xrange(order):
-                if matrix[i, j, 0] > (matrix[i, k, 0] + matrix[k, j, 0]):
-                    matrix[i, j, 0] = (matrix[i, k, 0] + matrix[k, j, 0])
-                    matrix[i, j, 1] = matrix[k, j, 1]
+        cand = dist[:, k, None] + dist[None, k, :]
+        mask = dist > cand
+        dist[mask] = cand[mask]
+        pred[mask] = broadcast_to(pred[k, :], (order, order))[mask]
     return matrix
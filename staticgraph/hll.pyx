@@ -0,0 +1,191 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+#cython: cdivision=True
+"""
+Compiled HyperLogLog counter kernels for approximate neighbourhoods.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, uint8_t, float64_t, ndarray
+from libc.math cimport log
+from libc.string cimport memcpy
+from cython.parallel cimport prange
+
+cdef extern from *:
+    int __builtin_ctzll(unsigned long long x) nogil
+
+def _arrays(object G, bint reverse):
+    """
+    Return the index pointers and indices of the edges followed.
+    """
+
+    if hasattr(G, "s_indptr"):
+        if reverse:
+            return G.p_indptr, G.p_indices
+        return G.s_indptr, G.s_indices
+    return G.n_indptr, G.n_indices
+
+cdef inline uint64_t _mix(uint64_t x) nogil:
+    """
+    Return the splitmix64 hash of x.
+    """
+
+    x += 0x9e3779b97f4a7c15ULL
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL
+    return x ^ (x >> 31)
+
+cdef inline double _estimate(uint8_t *reg, size_t m, double alpha,
+                             double *inverse) nogil:
+    """
+    Return the cardinality estimate of the m registers reg.
+    """
+
+    cdef:
+        double total = 0, e
+        size_t j, zeros = 0
+
+    for j in range(m):
+        total += inverse[reg[j]]
+        if reg[j] == 0:
+            zeros += 1
+
+    e = alpha * m * m / total
+
+    # Linear counting is more accurate for small sets
+    if e <= 2.5 * m and zeros != 0:
+        e = m * log(<double> m / zeros)
+    return e
+
+cdef inline bint _union(uint8_t *dst, uint8_t *src, size_t m) nogil:
+    """
+    Merge the registers src into dst, return whether dst changed.
+    """
+
+    cdef:
+        size_t j
+        bint changed = False
+
+    for j in range(m):
+        if src[j] > dst[j]:
+            dst[j] = src[j]
+            changed = True
+    return changed
+
+def hyperanf(object G, int log2m=6, uint64_t seed=0,
+             size_t max_dist=(2 ** 32) - 1, bint reverse=False,
+             int threads=1):
+    """
+    Approximate the neighbourhood function with HyperLogLog counters.
+
+    Returns nf, a float64 array where nf[t] estimates the number of pairs
+    (x, y) with y within distance t of x, and harmonic, a float64 array
+    estimating the sum of 1 / d(x, y) over the nodes y reached from x.
+
+    Every node owns 2 ** log2m registers of one byte, the counter of the
+    ball around it. The balls of radius t + 1 are the union of the balls
+    of radius t of the neighbours, each iteration is one pass over the
+    index arrays. Only the nodes with a neighbour whose counter changed
+    are merged again. Iterations stop once no counter changes.
+
+    G        - the graph
+    log2m    - log2 of # registers per node
+    seed     - seed of the hash function
+    max_dist - largest distance considered
+    reverse  - follow the edges of a directed graph backwards
+    threads  - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices
+        ndarray[uint8_t, ndim=2] cur, nxt
+        ndarray[uint8_t] changed, changing, tmp
+        ndarray[float64_t] est, harmonic, inverse
+        uint64_t h
+        size_t i, j, m, n_nodes, n_changed, t
+        long x
+        uint8_t *p_cur
+        uint8_t *p_nxt
+        uint8_t *p_changed
+        uint8_t *p_changing
+        double *p_inverse
+        double alpha, total, e
+
+    if log2m < 4 or log2m > 16:
+        raise ValueError("log2m must be between 4 and 16")
+
+    indptr, indices = _arrays(G, reverse)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    n_nodes = G.n_nodes
+    m = 1 << log2m
+
+    if m == 16:
+        alpha = 0.673
+    elif m == 32:
+        alpha = 0.697
+    elif m == 64:
+        alpha = 0.709
+    else:
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+
+    inverse = np.ldexp(1.0, -np.arange(256)).astype("f8")
+    p_inverse = <double *> inverse.data
+
+    # Each counter starts with its own node
+    cur = np.zeros((n_nodes, m), dtype="u1")
+    for i in range(n_nodes):
+        h = _mix(i ^ _mix(seed))
+        j = h & (m - 1)
+        h >>= log2m
+        cur[i, j] = 1 + (__builtin_ctzll(h) if h != 0 else 64 - log2m)
+
+    nxt      = cur.copy()
+    changed  = np.ones(n_nodes, dtype="u1")
+    changing = np.empty(n_nodes, dtype="u1")
+    est      = np.ones(n_nodes, dtype="f8")
+    harmonic = np.zeros(n_nodes, dtype="f8")
+    nf = [float(n_nodes)]
+
+    t = 0
+    while t < max_dist:
+        t += 1
+        p_cur = <uint8_t *> cur.data
+        p_nxt = <uint8_t *> nxt.data
+        p_changed  = <uint8_t *> changed.data
+        p_changing = <uint8_t *> changing.data
+
+        total = 0
+        n_changed = 0
+        for x in prange(<long> n_nodes, nogil=True, num_threads=threads,
+                        schedule="guided"):
+            p_changing[x] = 0
+            for j in range(indptr[x], indptr[x + 1]):
+                if p_changed[indices[j]] and \
+                   _union(p_nxt + x * m, p_cur + indices[j] * m, m):
+                    p_changing[x] = 1
+
+            if p_changing[x]:
+                e = _estimate(p_nxt + x * m, m, alpha, p_inverse)
+                if e > est[x]:
+                    harmonic[x] += (e - est[x]) / t
+                    est[x] = e
+                n_changed += 1
+            total += est[x]
+
+        if n_changed == 0:
+            break
+        nf.append(total)
+
+        # Both copies must agree before the next pass
+        for x in prange(<long> n_nodes, nogil=True, num_threads=threads,
+                        schedule="static"):
+            if p_changing[x]:
+                memcpy(p_cur + x * m, p_nxt + x * m, m)
+
+        tmp = changed
+        changed = changing
+        changing = tmp
+
+    return np.array(nf, dtype="f8"), harmonic
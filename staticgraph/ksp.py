@@ -0,0 +1,104 @@
+"""
+K shortest loopless paths between two nodes of weighted graphs.
+"""
+
+__all__ = ["k_shortest_paths"]
+
+from heapq import heappush, heappop
+
+import numpy as np
+import staticgraph.sssp as sssp
+from staticgraph.context import prepare
+from staticgraph.exceptions import StaticGraphNodeAbsentException
+
+def _positions(indptr, indices, u, v):
+    """
+    Return the positions of the edges from u to v in the index arrays.
+    """
+
+    start, stop = indptr[u], indptr[u + 1]
+    return start + np.flatnonzero(indices[start:stop] == v)
+
+def k_shortest_paths(G, s, t, k, directed = False, ctx = None):
+    """
+    Returns the k shortest loopless paths from source node s to target 
+    node t for a weighted staticgraph G.
+
+    This function uses Yen's algorithm, each candidate path is found by
+    a Dijkstra search from a node of a previous path, the spur node.
+
+    Parameters
+    ----------
+    G   : A weighted staticgraph with non-negative weights.
+    s   : Source node.
+    t   : Target node
+    k   : Most paths wanted.
+    ctx : Optional TraversalContext reused for the spur searches.
+
+    Returns
+    -------
+    paths : A list of at most k (nodes, distance) pairs sorted by
+            distance, nodes being a numpy uint32 array with the path.
+
+    Notes
+    ------
+
+    directed keyword must be set to True for directed graphs.
+    Fewer than k paths are returned when there are no more loopless 
+    paths. Instead of removing nodes and edges from G, each spur search
+    stamps the nodes of the root path as settled and skips the edges
+    flagged in a mask, so only the entries touched are ever reset.
+    """
+
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
+
+    indptr, indices, _ = sssp._forward(G, directed)
+    mask = np.zeros(indices.shape[0], dtype=np.uint8)
+    ctx = prepare(G, ctx)
+
+    path, dist = sssp.spur(G, s, t, directed, [], mask, ctx)
+    if path is None or k <= 0:
+        return []
+
+    # Each path is kept with the distances from s along it
+    found = [(path, dist)]
+    candidates = []
+    seen = set([tuple(path)])
+
+    while len(found) < k:
+        prev, prev_dist = found[-1]
+        for j in xrange(len(prev) - 1):
+            root = prev[:j + 1]
+
+            # Edges leaving the root taken by the paths sharing it
+            banned = []
+            for p, _ in found:
+                if len(p) > j + 1 and np.array_equal(p[:j + 1], root):
+                    banned.append(_positions(indptr, indices, p[j], p[j + 1]))
+            banned = np.concatenate(banned)
+            mask[banned] = 1
+
+            ctx.reset()
+            path, dist = sssp.spur(G, prev[j], t, directed, root[:-1], mask,
+                                   ctx)
+            mask[banned] = 0
+            if path is None:
+                continue
+
+            path = np.concatenate((root[:-1], path))
+            key = tuple(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            dist = np.concatenate((prev_dist[:j], dist + prev_dist[j]))
+            heappush(candidates, (dist[-1], key, path, dist))
+
+        if not candidates:
+            break
+        _, _, path, dist = heappop(candidates)
+        found.append((path, dist))
+
+    return [(path, dist[-1]) for path, dist in found]
@@ -0,0 +1,241 @@
+"""
+Landmark distance oracle for repeated unweighted distance queries.
+"""
+
+__all__ = ["DistanceOracle", "select", "build", "save", "load", "bounds",
+           "distance"]
+
+from os import mkdir
+from os.path import join, exists
+
+import numpy as np
+import staticgraph.bfs as bfs
+from staticgraph.context import prepare
+from staticgraph.exceptions import StaticGraphNodeAbsentException
+
+# Table entry of the nodes unreachable or too far from a landmark
+FAR = 255
+
+class DistanceOracle(object):
+    """
+    BFS distances between a few landmarks and all nodes of a graph.
+
+    The table has one row per node so that the bounds of a query are
+    read from two short rows. Distances of FAR or more, or to other
+    components, are stored as FAR.
+
+    landmarks - uint32 array of the landmark nodes
+    table     - uint8 array, table[v, i] is the distance of v from
+                landmarks[i]
+    """
+
+    def __init__(self, landmarks, table):
+
+        self.landmarks = landmarks
+        self.table     = table
+
+    @property
+    def nbytes(self):
+        """
+        Return total size of internal arrays in bytes.
+        """
+
+        return self.landmarks.nbytes + self.table.nbytes
+
+    @property
+    def n_landmarks(self):
+        """
+        Return # landmarks.
+        """
+
+        return self.landmarks.shape[0]
+
+def select(G, n_landmarks):
+    """
+    Returns landmarks chosen by degree.
+
+    Nodes are taken in order of decreasing degree, skipping the
+    neighbours of the landmarks already chosen, so the landmarks are
+    central but do not all cover the same region.
+
+    Parameters
+    ----------
+    G           : An undirected staticgraph.
+    n_landmarks : Number of landmarks wanted.
+
+    Returns
+    -------
+    landmarks : A numpy uint32 array of at most n_landmarks nodes.
+    """
+
+    degree = np.diff(G.n_indptr)
+    covered = np.zeros(G.order(), dtype=bool)
+    landmarks = []
+    for u in np.argsort(-degree.astype(np.int64), kind="mergesort"):
+        if len(landmarks) == n_landmarks:
+            break
+        if covered[u]:
+            continue
+        landmarks.append(u)
+        covered[G.n_indices[G.n_indptr[u]:G.n_indptr[u + 1]]] = True
+
+    return np.array(landmarks, dtype=np.uint32)
+
+def build(G, n_landmarks = 16, landmarks = None, threads = 1):
+    """
+    Returns the distance oracle of G.
+
+    Parameters
+    ----------
+    G           : An undirected staticgraph.
+    n_landmarks : Number of landmarks, used if landmarks is None.
+    landmarks   : Optional sequence of landmark nodes, picked by select
+                  if None.
+    threads     : Number of threads of the BFS.
+
+    Returns
+    -------
+    O : A DistanceOracle instance.
+
+    Notes
+    ------
+
+    All landmarks are traversed together by the bit parallel BFS, so 64
+    landmarks cost about as much as one BFS. The table takes one byte per
+    node and landmark.
+    """
+
+    if landmarks is None:
+        landmarks = select(G, n_landmarks)
+    landmarks = np.asarray(landmarks, dtype=np.uint32)
+    if landmarks.size and landmarks.max() >= G.order():
+        raise StaticGraphNodeAbsentException("landmark absent in graph!!")
+
+    table = np.empty((G.order(), landmarks.size), dtype=np.uint8)
+    for i in xrange(0, landmarks.size, 64):
+        dist = bfs.ms_distances(G, landmarks[i:i + 64], None, threads)
+        table[:, i:i + 64] = np.minimum(dist, FAR).T
+
+    return DistanceOracle(landmarks, table)
+
+def save(store, O):
+    """
+    Save the distance oracle to disk, next to a graph.
+
+    store - the directory where the graph is stored
+    O     - the distance oracle
+    """
+
+    # Create the directory
+    if not exists(store):
+        mkdir(store)
+
+    # define save shortcut
+    do_save = lambda fname, arr : np.save(join(store, fname), arr)
+
+    # Make the arrays
+    do_save("oracle_landmarks.npy", O.landmarks)
+    do_save("oracle_table.npy", O.table)
+
+def load(store):
+    """
+    Load the distance oracle from disk.
+
+    The table is memory mapped, so processes sharing a store share it.
+
+    store - directory where the graph is stored
+    """
+
+    # define load shortcut
+    do_load = lambda fname : np.load(join(store, fname), "r")
+
+    # Make the arrays
+    landmarks = do_load("oracle_landmarks.npy")
+    table     = do_load("oracle_table.npy")
+
+    return DistanceOracle(landmarks, table)
+
+def bounds(O, s, t):
+    """
+    Returns bounds on the distances between s and t.
+
+    Parameters
+    ----------
+    O : A DistanceOracle, from build or load.
+    s : Source node or numpy array of source nodes.
+    t : Target node or numpy array of target nodes, paired with s.
+
+    Returns
+    -------
+    lower : Lower bounds on the distances, as uint32.
+
+    upper : Upper bounds on the distances, as uint32, (2 ** 32) - 1 if
+            no landmark reaches both nodes.
+
+    Notes
+    ------
+
+    For every landmark l, |d(l, s) - d(l, t)| <= d(s, t) <= d(l, s) +
+    d(l, t). The upper bound only uses landmarks with both entries below
+    FAR, the lower bound holds for FAR entries as well since they are at
+    least FAR. Each query reads two rows of the table.
+    """
+
+    ds = O.table[s].astype(np.int32)
+    dt = O.table[t].astype(np.int32)
+
+    lower = np.abs(ds - dt).max(axis=-1, initial=0)
+    upper = np.where((ds == FAR) | (dt == FAR), (2 ** 32) - 1, ds + dt)
+    upper = upper.min(axis=-1, initial=(2 ** 32) - 1)
+
+    same = np.asarray(s) == np.asarray(t)
+    lower = np.where(same, 0, lower).astype(np.uint32)
+    upper = np.where(same, 0, upper).astype(np.uint32)
+    return lower, upper
+
+def distance(G, O, s, t, refine = True, ctx = None, rctx = None):
+    """
+    Returns the distance between s and t, or bounds on it.
+
+    Parameters
+    ----------
+    G      : An undirected staticgraph.
+    O      : The DistanceOracle of G.
+    s      : Source node.
+    t      : Target node.
+    refine : Optional parameter, search for paths shorter than the upper
+             bound if the bounds differ.
+    ctx    : Optional TraversalContext reused for the refinement from s.
+    rctx   : Optional TraversalContext reused for the refinement from t.
+
+    Returns
+    -------
+    lower : Lower bound on the distance.
+
+    upper : Upper bound on the distance, (2 ** 32) - 1 if unknown.
+
+    Notes
+    ------
+
+    With refine the bounds are exact, lower = upper = (2 ** 32) - 1 if t
+    is unreachable. The refinement is a bidirectional BFS limited to
+    paths shorter than the upper bound, so it stops early when the
+    oracle bound is tight. It runs on ctx and rctx, so with reused
+    contexts a query only writes the nodes it reaches.
+    """
+
+    if s >= G.order():
+        raise StaticGraphNodeAbsentException("source node absent in graph!!")
+    if t >= G.order():
+        raise StaticGraphNodeAbsentException("target node absent in graph!!")
+
+    lower, upper = bounds(O, s, t)
+    lower, upper = int(lower), int(upper)
+    if not refine or lower == upper:
+        return lower, upper
+
+    path = bfs.bidirectional(G, s, t, prepare(G, ctx), prepare(G, rctx),
+                             upper - 1)
+    if path is not None:
+        return len(path) - 1, len(path) - 1
+    return upper, upper
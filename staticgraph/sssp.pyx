@@ -0,0 +1,1504 @@
+#cython: wraparound=False
+#cython: boundscheck=False
+"""
+Compiled single source shortest path kernels for weighted graphs.
+"""
+
+import numpy as np
+from numpy cimport uint64_t, uint32_t, uint8_t, float64_t, ndarray
+from libc.stdlib cimport malloc, calloc, realloc, free
+from libc.string cimport memcpy, memset
+from cython.parallel cimport parallel, prange
+
+cdef extern from *:
+    bint __sync_bool_compare_and_swap(uint32_t *ptr, uint32_t old,
+                                      uint32_t new) nogil
+    bint _cas_u8 "__sync_bool_compare_and_swap" (uint64_t *ptr,
+                                                 uint64_t old,
+                                                 uint64_t new) nogil
+    size_t __sync_fetch_and_add(size_t *ptr, size_t val) nogil
+
+# Size of the per thread buffers used by delta stepping
+cdef enum:
+    LOCAL_QUEUE = 1024
+
+# Most buckets kept by delta stepping, farther ones share their slots
+cdef enum:
+    MAX_BUCKETS = 65536
+
+# Distance of unreachable nodes
+cdef double UNREACHED = (2 ** 64) - 1
+
+# Returned by kernels when a thread cannot allocate its buffers
+cdef size_t NO_MEMORY = <size_t> -1
+
+def _forward(object G, bint directed):
+    """
+    Return the index pointers, indices and weights of the out edges.
+    """
+
+    if directed:
+        return G.s_indptr, G.s_indices, G.s_weights
+    return G.n_indptr, G.n_indices, G.weights
+
+def _backward(object G, bint directed):
+    """
+    Return the index pointers, indices and weights of the in edges.
+    """
+
+    if directed:
+        return G.p_indptr, G.p_indices, G.p_weights
+    return G.n_indptr, G.n_indices, G.weights
+
+cdef inline void _sift_up(uint32_t *heap, uint32_t *pos, double *dist,
+                          size_t i) nogil:
+    """
+    Move heap[i] up until its parent is not farther.
+    """
+
+    cdef:
+        uint32_t v = heap[i]
+        double d = dist[v]
+        size_t parent
+
+    while i > 0:
+        parent = (i - 1) >> 1
+        if dist[heap[parent]] <= d:
+            break
+        heap[i] = heap[parent]
+        pos[heap[i]] = i
+        i = parent
+    heap[i] = v
+    pos[v] = i
+
+cdef inline void _sift_down(uint32_t *heap, uint32_t *pos, double *dist,
+                            size_t i, size_t size) nogil:
+    """
+    Move heap[i] down until no child is nearer.
+    """
+
+    cdef:
+        uint32_t v = heap[i]
+        double d = dist[v]
+        size_t c
+
+    while True:
+        c = 2 * i + 1
+        if c >= size:
+            break
+        if c + 1 < size and dist[heap[c + 1]] < dist[heap[c]]:
+            c += 1
+        if dist[heap[c]] >= d:
+            break
+        heap[i] = heap[c]
+        pos[heap[i]] = i
+        i = c
+    heap[i] = v
+    pos[v] = i
+
+cdef size_t _dijkstra(uint64_t *indptr, uint32_t *indices, double *weights,
+                      uint32_t *sources, size_t n_sources, uint32_t target,
+                      double cutoff, size_t limit, uint8_t *edge_mask,
+                      uint32_t *stamp, uint32_t epoch, double *dist,
+                      uint32_t *pred, uint32_t *heap, uint32_t *pos,
+                      uint32_t *order) nogil:
+    """
+    Run Dijkstra's algorithm with an indexed binary heap.
+
+    Only nodes stamped with epoch are considered touched, their dist and
+    pred are valid and pos holds their heap index or (2 ** 32) - 1 once
+    settled. Settled nodes are written to order unless it is NULL.
+    The search stops when target or limit nodes are settled, nodes
+    farther than cutoff are never touched. Edges j with edge_mask[j] set
+    are skipped unless edge_mask is NULL.
+    Returns # settled nodes.
+    """
+
+    cdef:
+        uint32_t u, v, settled = (2 ** 32) - 1
+        size_t i, j, size, n_settled
+        double du, dv
+
+    size = 0
+    for i in range(n_sources):
+        u = sources[i]
+        if stamp[u] == epoch:
+            continue
+        stamp[u] = epoch
+        dist[u] = 0
+        pred[u] = settled
+        heap[size] = u
+        pos[u] = size
+        size += 1
+
+    n_settled = 0
+    while size != 0:
+        u = heap[0]
+        size -= 1
+        if size != 0:
+            heap[0] = heap[size]
+            pos[heap[0]] = 0
+            _sift_down(heap, pos, dist, 0, size)
+        pos[u] = settled
+
+        if order != NULL:
+            order[n_settled] = u
+        n_settled += 1
+        if u == target or n_settled == limit:
+            break
+
+        du = dist[u]
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            dv = du + weights[j]
+            if dv > cutoff or (edge_mask != NULL and edge_mask[j]):
+                continue
+            if stamp[v] != epoch:
+                stamp[v] = epoch
+                dist[v] = dv
+                pred[v] = u
+                heap[size] = v
+                size += 1
+                _sift_up(heap, pos, dist, size - 1)
+            elif pos[v] != settled and dv < dist[v]:
+                dist[v] = dv
+                pred[v] = u
+                _sift_up(heap, pos, dist, pos[v])
+
+    return n_settled
+
+def dijkstra(object G, object sources, bint directed=False,
+             bint reverse=False):
+    """
+    Compute shortest path distances from a set of sources.
+
+    Returns three arrays: order, a uint32 array of the reachable nodes in
+    the order they were settled, dist, a float64 array of distances with
+    (2 ** 64) - 1 for unreachable nodes, and pred, a uint32 array of
+    predecessors in the shortest path tree with (2 ** 32) - 1 for sources
+    and unreachable nodes.
+
+    G        - the weighted graph
+    sources  - array of source nodes
+    directed - G is a directed graph
+    reverse  - follow the edges of a directed graph backwards
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs, stamp, pred, heap, pos, order
+        ndarray[float64_t] weights, dist
+        size_t n_nodes, n_settled
+
+    if reverse:
+        indptr, indices, weights = _backward(G, directed)
+    else:
+        indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes = G.n_nodes
+    if srcs.shape[0] != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    stamp = np.zeros(n_nodes, dtype="u4")
+    dist  = np.empty(n_nodes, dtype="f8")
+    pred  = np.empty(n_nodes, dtype="u4")
+    heap  = np.empty(n_nodes, dtype="u4")
+    pos   = np.empty(n_nodes, dtype="u4")
+    order = np.empty(n_nodes, dtype="u4")
+
+    with nogil:
+        n_settled = _dijkstra(<uint64_t *> indptr.data,
+                              <uint32_t *> indices.data,
+                              <double *> weights.data,
+                              <uint32_t *> srcs.data, srcs.shape[0],
+                              (2 ** 32) - 1, UNREACHED, n_nodes, NULL,
+                              <uint32_t *> stamp.data, 1,
+                              <double *> dist.data, <uint32_t *> pred.data,
+                              <uint32_t *> heap.data, <uint32_t *> pos.data,
+                              <uint32_t *> order.data)
+
+    dist[stamp == 0] = (2 ** 64) - 1
+    pred[stamp == 0] = (2 ** 32) - 1
+    return order[:n_settled], dist, pred
+
+def bounded(object G, size_t s, bint directed, double cutoff, size_t k,
+            object ctx):
+    """
+    Compute the distances from s to its nearest nodes.
+
+    Returns two arrays: nodes, a uint32 array of the nodes settled in
+    order of distance, and dist, their float64 distances. Nodes farther
+    than cutoff are not reached and the search stops after k nodes,
+    including s. ctx is a TraversalContext which was reset for the query,
+    only the entries of the nodes reached are written.
+
+    G        - the weighted graph
+    s        - the source node
+    directed - G is a directed graph
+    cutoff   - largest distance of interest
+    k        - most nodes to settle
+    ctx      - the traversal context
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, stamp, pred, heap, pos, order, nodes
+        ndarray[float64_t] weights, dist
+        uint32_t source = s, epoch = ctx.epoch
+        size_t n_settled
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+
+    stamp = ctx.stamp
+    dist  = ctx.weights
+    pred  = ctx.pred
+    heap  = ctx.queue
+    pos   = ctx.dist
+    order = ctx.order
+
+    with nogil:
+        n_settled = _dijkstra(<uint64_t *> indptr.data,
+                              <uint32_t *> indices.data,
+                              <double *> weights.data, &source, 1,
+                              (2 ** 32) - 1, cutoff, k, NULL,
+                              <uint32_t *> stamp.data, epoch,
+                              <double *> dist.data, <uint32_t *> pred.data,
+                              <uint32_t *> heap.data, <uint32_t *> pos.data,
+                              <uint32_t *> order.data)
+
+    nodes = order[:n_settled].copy()
+    return nodes, dist[nodes]
+
+def owners(ndarray[uint32_t] order, ndarray[uint32_t] pred):
+    """
+    Return the source at the root of the shortest path tree of each node.
+
+    order and pred are as returned by dijkstra. Every node comes after its
+    predecessor in order, so a single pass suffices. Unreached nodes get
+    (2 ** 32) - 1.
+    """
+
+    cdef:
+        ndarray[uint32_t] owner
+        uint32_t u, none = (2 ** 32) - 1
+        size_t i
+
+    owner = np.empty(pred.shape[0], dtype="u4")
+    owner.fill(none)
+    for i in range(order.shape[0]):
+        u = order[i]
+        if pred[u] == none:
+            owner[u] = u
+        else:
+            owner[u] = owner[pred[u]]
+
+    return owner
+
+def rows(object G, object sources, bint directed, object dist, object pred,
+         int threads=1):
+    """
+    Compute the shortest path distances and predecessors of many sources.
+
+    Row i of dist, a float64 array of shape (len(sources), G.n_nodes), is
+    filled from a Dijkstra run from sources[i], with (2 ** 64) - 1 for
+    unreachable nodes. pred is None or a uint32 array of the same shape
+    getting the predecessors as returned by dijkstra. Rows are spread
+    over threads, each with its own heap.
+
+    G        - the weighted graph
+    sources  - array of source nodes
+    directed - G is a directed graph
+    dist     - array to write the distances to
+    pred     - array to write the predecessors to, or None
+    threads  - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs
+        ndarray[float64_t] weights
+        ndarray d, p
+        uint64_t *p_indptr
+        uint32_t *p_indices
+        double *p_weights
+        uint32_t *p_srcs
+        double *p_dist
+        uint32_t *p_pred
+        uint32_t *buf
+        uint32_t *row_pred
+        double *row
+        uint32_t none = (2 ** 32) - 1
+        size_t i, v, n_nodes, n_sources
+        bint failed = False
+        bint *p_failed = &failed
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes   = G.n_nodes
+    n_sources = srcs.shape[0]
+
+    if n_sources != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+    if dist.shape != (n_sources, n_nodes) or dist.dtype != np.float64 or \
+       not dist.flags.c_contiguous:
+        raise ValueError("dist must be a C contiguous float64 array of "
+                         "shape (len(sources), n_nodes)")
+    if pred is not None and (pred.shape != dist.shape or
+                             pred.dtype != np.uint32 or
+                             not pred.flags.c_contiguous):
+        raise ValueError("pred must be a C contiguous uint32 array shaped "
+                         "like dist")
+
+    d = dist
+    p_indptr  = <uint64_t *> indptr.data
+    p_indices = <uint32_t *> indices.data
+    p_weights = <double *> weights.data
+    p_srcs    = <uint32_t *> srcs.data
+    p_dist    = <double *> d.data
+    p_pred    = NULL
+    if pred is not None:
+        p = pred
+        p_pred = <uint32_t *> p.data
+
+    # Sources have distinct indices, so i + 1 is a fresh epoch
+    with nogil, parallel(num_threads=threads):
+        buf = <uint32_t *> calloc(4 * n_nodes, sizeof(uint32_t))
+        if buf == NULL:
+            p_failed[0] = True
+        for i in prange(n_sources, schedule="dynamic", chunksize=1):
+            if buf == NULL:
+                continue
+            row = p_dist + i * n_nodes
+            if p_pred != NULL:
+                row_pred = p_pred + i * n_nodes
+            else:
+                row_pred = buf + 3 * n_nodes
+            _dijkstra(p_indptr, p_indices, p_weights, p_srcs + i, 1, none,
+                      UNREACHED, n_nodes, NULL, buf, i + 1, row, row_pred,
+                      buf + n_nodes, buf + 2 * n_nodes, NULL)
+            for v in range(n_nodes):
+                if buf[v] != i + 1:
+                    row[v] = UNREACHED
+                    row_pred[v] = none
+        free(buf)
+
+    if failed:
+        raise MemoryError()
+
+cdef size_t _dial(uint64_t *indptr, uint32_t *indices, double *weights,
+                  size_t n_nodes, uint64_t max_weight,
+                  uint32_t *sources, size_t n_sources, uint64_t *dist,
+                  uint32_t *pred, uint32_t *head, uint32_t *nxt,
+                  uint32_t *prv, uint32_t *order) nogil:
+    """
+    Run Dial's algorithm for non-negative integer weights.
+
+    The max_weight + 1 buckets form a circular array indexed by distance,
+    each holding a doubly linked list of the nodes at that distance.
+    dist must be (2 ** 64) - 1 and nxt (2 ** 32) - 1 for all nodes.
+    Settled nodes get their nxt set to (2 ** 32) - 2.
+    Returns # settled nodes.
+    """
+
+    cdef:
+        uint32_t u, v, none = (2 ** 32) - 1, done = (2 ** 32) - 2
+        uint64_t cur, dv, n_buckets = max_weight + 1
+        size_t i, j, b, count, n_settled
+
+    for b in range(n_buckets):
+        head[b] = none
+
+    count = 0
+    for i in range(n_sources):
+        u = sources[i]
+        if dist[u] == 0:
+            continue
+        dist[u] = 0
+        pred[u] = none
+        nxt[u] = head[0]
+        prv[u] = none
+        if head[0] != none:
+            prv[head[0]] = u
+        head[0] = u
+        count += 1
+
+    cur = 0
+    n_settled = 0
+    while count != 0:
+        while head[cur % n_buckets] == none:
+            cur += 1
+
+        # Pop the head of the current bucket
+        b = cur % n_buckets
+        u = head[b]
+        head[b] = nxt[u]
+        if head[b] != none:
+            prv[head[b]] = none
+        nxt[u] = done
+        count -= 1
+        order[n_settled] = u
+        n_settled += 1
+
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            dv = cur + <uint64_t> weights[j]
+            if nxt[v] == done or dv >= dist[v]:
+                continue
+
+            # Unlink v from its old bucket
+            if dist[v] != <uint64_t> -1:
+                if prv[v] != none:
+                    nxt[prv[v]] = nxt[v]
+                else:
+                    head[dist[v] % n_buckets] = nxt[v]
+                if nxt[v] != none:
+                    prv[nxt[v]] = prv[v]
+            else:
+                count += 1
+
+            dist[v] = dv
+            pred[v] = u
+            b = dv % n_buckets
+            nxt[v] = head[b]
+            prv[v] = none
+            if head[b] != none:
+                prv[head[b]] = v
+            head[b] = v
+
+    return n_settled
+
+def dial(object G, object sources, bint directed=False):
+    """
+    Compute shortest path distances for non-negative integer weights.
+
+    Returns order, dist and pred as dijkstra does. The weights must be
+    integral, a bucket queue with one bucket per distance up to the
+    largest weight replaces the binary heap.
+
+    G        - the weighted graph
+    sources  - array of source nodes
+    directed - G is a directed graph
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr, idist
+        ndarray[uint32_t] indices, srcs, pred, head, nxt, prv, order
+        ndarray[float64_t] weights, dist
+        uint64_t max_weight
+        size_t n_nodes, n_settled
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes = G.n_nodes
+    if srcs.shape[0] != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    max_weight = 0
+    if weights.shape[0] != 0:
+        if weights.min() < 0 or (np.floor(weights) != weights).any():
+            raise ValueError("Weights must be non-negative integers")
+        max_weight = <uint64_t> weights.max()
+
+    idist = np.empty(n_nodes, dtype="u8")
+    idist.fill((2 ** 64) - 1)
+    pred  = np.empty(n_nodes, dtype="u4")
+    pred.fill((2 ** 32) - 1)
+    head  = np.empty(max_weight + 1, dtype="u4")
+    nxt   = np.empty(n_nodes, dtype="u4")
+    nxt.fill((2 ** 32) - 1)
+    prv   = np.empty(n_nodes, dtype="u4")
+    order = np.empty(n_nodes, dtype="u4")
+
+    with nogil:
+        n_settled = _dial(<uint64_t *> indptr.data, <uint32_t *> indices.data,
+                          <double *> weights.data, n_nodes, max_weight,
+                          <uint32_t *> srcs.data, srcs.shape[0],
+                          <uint64_t *> idist.data, <uint32_t *> pred.data,
+                          <uint32_t *> head.data, <uint32_t *> nxt.data,
+                          <uint32_t *> prv.data, <uint32_t *> order.data)
+
+    dist = idist.astype("f8")
+    return order[:n_settled], dist, pred
+
+cdef struct _Bucket:
+    uint32_t *items
+    size_t size
+    size_t cap
+
+cdef inline int _push(_Bucket *b, uint32_t v) nogil:
+    """
+    Append v to the bucket, returns -1 if it could not grow.
+    """
+
+    cdef uint32_t *items
+
+    if b.size == b.cap:
+        items = <uint32_t *> realloc(b.items, (2 * b.cap + 16) *
+                                              sizeof(uint32_t))
+        if items == NULL:
+            return -1
+        b.items = items
+        b.cap = 2 * b.cap + 16
+    b.items[b.size] = v
+    b.size += 1
+    return 0
+
+cdef inline bint _atomic_min(double *addr, double val) nogil:
+    """
+    Lower addr[0] to val with a compare and swap on its bits.
+
+    Returns True if val was written.
+    """
+
+    cdef double old = addr[0]
+
+    while val < old:
+        if _cas_u8(<uint64_t *> addr, (<uint64_t *> &old)[0],
+                                      (<uint64_t *> &val)[0]):
+            return True
+        old = addr[0]
+    return False
+
+cdef size_t _relax(uint64_t *indptr, uint32_t *indices, double *weights,
+                   double delta, bint light, uint32_t *frontier,
+                   size_t n_frontier, double *dist, uint32_t *mark,
+                   uint32_t phase, uint32_t *touched, int threads) nogil:
+    """
+    Relax the light or heavy out edges of the frontier in parallel.
+
+    Every node whose distance dropped is written once to touched, marking
+    it with phase. Returns # touched nodes, or NO_MEMORY if a thread
+    could not allocate its buffer.
+    """
+
+    cdef:
+        uint32_t *local
+        size_t *n_local
+        uint32_t u, v, old
+        size_t i, j, pos, tail, rear = 0
+        double w
+        bint failed = False
+        bint *p_failed = &failed
+
+    with parallel(num_threads=threads):
+        local = <uint32_t *> malloc(LOCAL_QUEUE * sizeof(uint32_t))
+        n_local = <size_t *> malloc(sizeof(size_t))
+        if local == NULL or n_local == NULL:
+            p_failed[0] = True
+        else:
+            n_local[0] = 0
+
+        for i in prange(n_frontier, schedule="dynamic", chunksize=64):
+            if local == NULL or n_local == NULL:
+                continue
+            u = frontier[i]
+            for j in range(indptr[u], indptr[u + 1]):
+                w = weights[j]
+                if (w <= delta) != light:
+                    continue
+                v = indices[j]
+                if not _atomic_min(&dist[v], dist[u] + w):
+                    continue
+                old = mark[v]
+                if old == phase:
+                    continue
+                if not __sync_bool_compare_and_swap(&mark[v], old, phase):
+                    continue
+
+                # Flush the local buffer into touched
+                if n_local[0] == LOCAL_QUEUE:
+                    pos = __sync_fetch_and_add(&rear, n_local[0])
+                    memcpy(touched + pos, local,
+                           n_local[0] * sizeof(uint32_t))
+                    n_local[0] = 0
+                local[n_local[0]] = v
+                n_local[0] = n_local[0] + 1
+
+        if local != NULL and n_local != NULL and n_local[0] != 0:
+            tail = __sync_fetch_and_add(&rear, n_local[0])
+            memcpy(touched + tail, local, n_local[0] * sizeof(uint32_t))
+        free(local)
+        free(n_local)
+
+    if failed:
+        return NO_MEMORY
+    return rear
+
+cdef size_t _enqueue(_Bucket *buckets, uint64_t n_slots, double delta,
+                     uint32_t *touched, size_t n_touched, double *dist,
+                     uint64_t *where) except? 0:
+    """
+    Move the touched nodes to the buckets of their new distances.
+
+    Returns # nodes pushed.
+    """
+
+    cdef:
+        uint32_t v
+        uint64_t b
+        size_t k, n_pushed = 0
+
+    for k in range(n_touched):
+        v = touched[k]
+        b = <uint64_t> (dist[v] / delta)
+        if where[v] == b:
+            continue
+        where[v] = b
+        if _push(&buckets[b % n_slots], v) != 0:
+            raise MemoryError()
+        n_pushed += 1
+    return n_pushed
+
+cdef uint32_t _next_phase(uint32_t phase, ndarray[uint32_t] mark):
+    """
+    Return the stamp of the next relax phase, clearing mark on wraparound.
+    """
+
+    phase += 1
+    if phase == (2 ** 32) - 1:
+        mark.fill(0)
+        phase = 1
+    return phase
+
+def delta_stepping(object G, size_t s, bint directed=False,
+                   double delta=1.0, int threads=1):
+    """
+    Compute shortest path distances with parallel delta stepping.
+
+    Returns a float64 array of distances with (2 ** 64) - 1 for unreachable
+    nodes. The weights must be non-negative.
+
+    Nodes are kept in buckets of width delta. The light edges, not heavier
+    than delta, of the nearest bucket are relaxed in parallel until it
+    stays empty, then the heavy edges of all nodes it held are relaxed
+    once. Threads lower distances with a compare and swap and collect the
+    improved nodes, which are sorted into the buckets serially.
+
+    G        - the weighted graph
+    s        - the source node
+    directed - G is a directed graph
+    delta    - width of the buckets
+    threads  - number of threads to use
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr, where, seen
+        ndarray[uint32_t] indices, mark, frontier, settled, touched
+        ndarray[float64_t] weights, dist
+        _Bucket *buckets = NULL
+        _Bucket *bk
+        uint64_t cur, b, n_slots, none = (2 ** 64) - 1
+        uint32_t v, phase
+        size_t k, slot, keep, n_frontier, n_settled, n_touched, pending
+        size_t n_nodes
+        double max_weight
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    n_nodes = G.n_nodes
+    if s >= n_nodes:
+        raise ValueError("Invalid source node")
+    if not delta > 0:
+        raise ValueError("delta must be positive")
+
+    max_weight = 0
+    if weights.shape[0] != 0:
+        if weights.min() < 0:
+            raise ValueError("Weights must be non-negative")
+        max_weight = weights.max()
+
+    # Pending nodes are never more than max_weight / delta buckets ahead
+    n_slots = min(<uint64_t> (max_weight / delta) + 2, MAX_BUCKETS)
+
+    dist = np.empty(n_nodes, dtype="f8")
+    dist.fill((2 ** 64) - 1)
+    where = np.empty(n_nodes, dtype="u8")
+    where.fill(none)
+    seen = np.empty(n_nodes, dtype="u8")
+    seen.fill(none)
+    mark     = np.zeros(n_nodes, dtype="u4")
+    frontier = np.empty(n_nodes, dtype="u4")
+    settled  = np.empty(n_nodes, dtype="u4")
+    touched  = np.empty(n_nodes, dtype="u4")
+
+    buckets = <_Bucket *> malloc(n_slots * sizeof(_Bucket))
+    if buckets == NULL:
+        raise MemoryError()
+    for slot in range(n_slots):
+        buckets[slot].items = NULL
+        buckets[slot].size = buckets[slot].cap = 0
+
+    try:
+        dist[s] = 0
+        where[s] = 0
+        if _push(&buckets[0], s) != 0:
+            raise MemoryError()
+        pending = 1
+
+        cur = 0
+        phase = 0
+        while pending != 0:
+            slot = cur % n_slots
+            bk = &buckets[slot]
+            n_settled = 0
+
+            while bk.size != 0:
+                # Take the nodes of the current bucket, keep those of
+                # farther buckets sharing the slot and drop stale entries
+                n_frontier = keep = 0
+                for k in range(bk.size):
+                    v = bk.items[k]
+                    b = where[v]
+                    if b == cur:
+                        where[v] = none
+                        frontier[n_frontier] = v
+                        n_frontier += 1
+                        if seen[v] != cur:
+                            seen[v] = cur
+                            settled[n_settled] = v
+                            n_settled += 1
+                        pending -= 1
+                    elif b != none and b > cur and b % n_slots == slot:
+                        bk.items[keep] = v
+                        keep += 1
+                    else:
+                        pending -= 1
+                bk.size = keep
+                if n_frontier == 0:
+                    break
+
+                phase = _next_phase(phase, mark)
+                with nogil:
+                    n_touched = _relax(<uint64_t *> indptr.data,
+                                       <uint32_t *> indices.data,
+                                       <double *> weights.data, delta, True,
+                                       <uint32_t *> frontier.data,
+                                       n_frontier, <double *> dist.data,
+                                       <uint32_t *> mark.data, phase,
+                                       <uint32_t *> touched.data, threads)
+                if n_touched == NO_MEMORY:
+                    raise MemoryError()
+                pending += _enqueue(buckets, n_slots, delta,
+                                    <uint32_t *> touched.data, n_touched,
+                                    <double *> dist.data,
+                                    <uint64_t *> where.data)
+
+            if n_settled != 0:
+                phase = _next_phase(phase, mark)
+                with nogil:
+                    n_touched = _relax(<uint64_t *> indptr.data,
+                                       <uint32_t *> indices.data,
+                                       <double *> weights.data, delta, False,
+                                       <uint32_t *> settled.data,
+                                       n_settled, <double *> dist.data,
+                                       <uint32_t *> mark.data, phase,
+                                       <uint32_t *> touched.data, threads)
+                if n_touched == NO_MEMORY:
+                    raise MemoryError()
+                pending += _enqueue(buckets, n_slots, delta,
+                                    <uint32_t *> touched.data, n_touched,
+                                    <double *> dist.data,
+                                    <uint64_t *> where.data)
+
+            cur += 1
+    finally:
+        for slot in range(n_slots):
+            free(buckets[slot].items)
+        free(buckets)
+
+    return dist
+
+def _path(ndarray[uint32_t] pred, size_t s, size_t t):
+    """
+    Return the path from s to t read backwards from the predecessors.
+    """
+
+    cdef:
+        ndarray[uint32_t] path
+        uint32_t u
+        size_t index
+
+    index = 0
+    u = t
+    while u != s:
+        index += 1
+        u = pred[u]
+
+    path = np.empty(index + 1, dtype="u4")
+    u = t
+    while True:
+        path[index] = u
+        if u == s:
+            break
+        index -= 1
+        u = pred[u]
+
+    return path
+
+def meeting_path(ndarray[uint32_t] pred, ndarray[uint32_t] rpred, size_t s,
+                 size_t t, size_t meet):
+    """
+    Return the path from s through meet to t found by bidirectional.
+    """
+
+    cdef:
+        ndarray[uint32_t] head, path
+        uint32_t u
+        size_t n_head, n_tail
+
+    head = _path(pred, s, meet)
+    n_head = head.shape[0]
+
+    n_tail = 0
+    u = meet
+    while u != t:
+        u = rpred[u]
+        n_tail += 1
+
+    path = np.empty(n_head + n_tail, dtype="u4")
+    path[:n_head] = head
+    u = meet
+    while u != t:
+        u = rpred[u]
+        path[n_head] = u
+        n_head += 1
+
+    return path
+
+cdef size_t _pred_cycle(uint32_t *pred, uint32_t v, size_t n_nodes,
+                        uint32_t *mark, uint32_t epoch, uint32_t *walk,
+                        size_t *start) nogil:
+    """
+    Walk the predecessors from v looking for a cycle.
+
+    Returns the length of the walk and sets start to the index in walk
+    where the cycle begins, or to the length if a root was reached.
+    """
+
+    cdef:
+        uint32_t none = (2 ** 32) - 1
+        size_t k = 0
+
+    while v != none and mark[v] != epoch:
+        mark[v] = epoch
+        walk[k] = v
+        k += 1
+        v = pred[v]
+
+    start[0] = k
+    if v != none:
+        while walk[start[0] - 1] != v:
+            start[0] -= 1
+        start[0] -= 1
+    return k
+
+cdef size_t _forest_cycle(uint32_t *pred, size_t n_nodes, uint32_t *mark,
+                          uint32_t *walk, size_t *start) nogil:
+    """
+    Look for a cycle anywhere in the predecessor graph.
+
+    Each node is walked at most once, a walk stops at a root, at a node
+    of an earlier walk or on its own trail, the last being a cycle.
+    mark must be zeroed. Returns the length of the cycle walk and sets
+    start as _pred_cycle does, or returns 0 if there is no cycle.
+    """
+
+    cdef:
+        uint32_t r, v, none = (2 ** 32) - 1
+        size_t k
+
+    for r in range(n_nodes):
+        if mark[r] != 0:
+            continue
+        v = r
+        k = 0
+        while v != none and mark[v] == 0:
+            mark[v] = r + 1
+            walk[k] = v
+            k += 1
+            v = pred[v]
+        if v != none and mark[v] == r + 1:
+            start[0] = k - 1
+            while walk[start[0]] != v:
+                start[0] -= 1
+            return k
+    return 0
+
+def pred_cycle(object pred):
+    """
+    Find a cycle in the predecessor graph.
+
+    Returns a uint32 array of nodes c0, c1, ..., ck such that c0 is the
+    predecessor of c1 and so on, and ck that of c0, or None if pred is
+    a forest. During Bellman-Ford such a cycle has a negative weight.
+
+    pred - uint32 array of predecessors, (2 ** 32) - 1 for roots
+    """
+
+    cdef:
+        ndarray[uint32_t] p, mark, walk
+        size_t k, start = 0
+
+    p    = np.ascontiguousarray(pred, dtype="u4")
+    mark = np.zeros(p.shape[0], dtype="u4")
+    walk = np.empty(p.shape[0], dtype="u4")
+    k = _forest_cycle(<uint32_t *> p.data, p.shape[0],
+                      <uint32_t *> mark.data, <uint32_t *> walk.data, &start)
+    if k == 0:
+        return None
+    return walk[start:k][::-1].copy()
+
+def spfa(object G, object sources, bint directed=False):
+    """
+    Compute shortest path distances allowing negative weights.
+
+    Returns dist, pred and cycle. dist and pred are as returned by
+    dijkstra. If a negative cycle is reachable from the sources, dist
+    and pred are not final and cycle is a uint32 array of nodes
+    c0, c1, ..., ck such that (c0, c1), ..., (ck, c0) are edges of G
+    with a negative total weight, otherwise cycle is None.
+
+    Nodes whose distance drops are appended to a FIFO queue unless
+    already in it. After every n_nodes relaxations the predecessor graph
+    is searched for a cycle, which costs O(n_nodes) and so at most
+    doubles the work, but finds a negative cycle within a few passes
+    instead of once a path of n_nodes edges has formed. Each node also
+    tracks the # edges of its path, once that reaches n_nodes its
+    predecessors are searched for a cycle.
+
+    G        - the weighted graph
+    sources  - array of source nodes
+    directed - G is a directed graph
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, srcs, pred, length, queue, mark, walk
+        ndarray[float64_t] weights, dist
+        ndarray[uint8_t] queued
+        uint32_t u, v, epoch, none = (2 ** 32) - 1
+        size_t i, j, n_nodes, front, size, k, start, relaxed
+        bint found
+        double dv
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    srcs    = np.ascontiguousarray(sources, dtype="u4")
+    n_nodes = G.n_nodes
+    if srcs.shape[0] != 0 and srcs.max() >= n_nodes:
+        raise ValueError("Invalid source node found in sources")
+
+    dist   = np.empty(n_nodes, dtype="f8")
+    dist.fill((2 ** 64) - 1)
+    pred   = np.empty(n_nodes, dtype="u4")
+    pred.fill(none)
+    length = np.zeros(n_nodes, dtype="u4")
+    queued = np.zeros(n_nodes, dtype="u1")
+    queue  = np.empty(n_nodes, dtype="u4")
+    mark   = np.zeros(n_nodes, dtype="u4")
+    walk   = np.empty(n_nodes, dtype="u4")
+
+    front = size = 0
+    for i in range(srcs.shape[0]):
+        u = srcs[i]
+        if queued[u]:
+            continue
+        dist[u] = 0
+        queued[u] = 1
+        queue[size] = u
+        size += 1
+
+    epoch = k = start = relaxed = 0
+    found = False
+    with nogil:
+        while size != 0 and not found:
+            u = queue[front]
+            front = (front + 1) % n_nodes
+            size -= 1
+            queued[u] = 0
+
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                dv = dist[u] + weights[j]
+                if dv >= dist[v]:
+                    continue
+                dist[v] = dv
+                pred[v] = u
+                length[v] = length[u] + 1
+
+                # Amortized search of the whole predecessor graph
+                relaxed += 1
+                if relaxed >= n_nodes:
+                    relaxed = 0
+                    memset(<uint32_t *> mark.data, 0,
+                           n_nodes * sizeof(uint32_t))
+                    epoch = 0
+                    k = _forest_cycle(<uint32_t *> pred.data, n_nodes,
+                                      <uint32_t *> mark.data,
+                                      <uint32_t *> walk.data, &start)
+                    memset(<uint32_t *> mark.data, 0,
+                           n_nodes * sizeof(uint32_t))
+                    if k != 0:
+                        found = True
+                        break
+
+                # A path of n_nodes edges repeats a node, unless the
+                # predecessors changed since and v is nearer the root
+                if length[v] >= n_nodes:
+                    epoch += 1
+                    if epoch == none:
+                        memset(<uint32_t *> mark.data, 0,
+                               n_nodes * sizeof(uint32_t))
+                        epoch = 1
+                    k = _pred_cycle(<uint32_t *> pred.data, v, n_nodes,
+                                    <uint32_t *> mark.data, epoch,
+                                    <uint32_t *> walk.data, &start)
+                    if start != k:
+                        found = True
+                        break
+                    length[v] = k - 1
+
+                if not queued[v]:
+                    queued[v] = 1
+                    queue[(front + size) % n_nodes] = v
+                    size += 1
+
+    if not found:
+        return dist, pred, None
+
+    # The walk went against the edges, so the cycle is read backwards
+    return dist, pred, walk[start:k][::-1].copy()
+
+def search(object G, size_t s, size_t t, bint directed, object ctx):
+    """
+    Find a shortest path from s to t.
+
+    Returns the path as a uint32 array and its length, or (None, None) if
+    t is unreachable. ctx is a TraversalContext which was reset for the
+    query, its dist buffer holds the heap positions.
+
+    G        - the weighted graph
+    s        - the source node
+    t        - the target node
+    directed - G is a directed graph
+    ctx      - the traversal context
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, stamp, pred, heap, pos
+        ndarray[float64_t] weights, dist
+        uint32_t source = s, epoch = ctx.epoch
+        size_t n_nodes = G.n_nodes
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+
+    stamp = ctx.stamp
+    dist  = ctx.weights
+    pred  = ctx.pred
+    heap  = ctx.queue
+    pos   = ctx.dist
+
+    with nogil:
+        _dijkstra(<uint64_t *> indptr.data, <uint32_t *> indices.data,
+                  <double *> weights.data, &source, 1, t, UNREACHED,
+                  n_nodes, NULL, <uint32_t *> stamp.data, epoch,
+                  <double *> dist.data, <uint32_t *> pred.data,
+                  <uint32_t *> heap.data,
+                  <uint32_t *> pos.data, NULL)
+
+    if stamp[t] != epoch or pos[t] != (2 ** 32) - 1:
+        return None, None
+
+    return _path(pred, s, t), dist[t]
+
+def spur(object G, size_t s, size_t t, bint directed, object banned,
+         object edge_mask, object ctx):
+    """
+    Find a shortest path from s to t avoiding some nodes and edges.
+
+    Returns the path as a uint32 array and the distances from s of its
+    nodes, or (None, None) if t is unreachable. The banned nodes are
+    stamped as settled before the search so they are never reached.
+    edge_mask is a uint8 array with an entry per edge position in the
+    forward index arrays, set for the edges to skip. ctx is a
+    TraversalContext which was reset for the query.
+
+    G         - the weighted graph
+    s         - the source node
+    t         - the target node
+    directed  - G is a directed graph
+    banned    - array of nodes to avoid
+    edge_mask - flags of the edges to avoid
+    ctx       - the traversal context
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, stamp, pred, heap, pos, ban, path
+        ndarray[float64_t] weights, dist
+        ndarray[uint8_t] mask
+        uint32_t source = s, epoch = ctx.epoch
+        size_t i, n_nodes = G.n_nodes
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    ban     = np.ascontiguousarray(banned, dtype="u4")
+    mask    = np.ascontiguousarray(edge_mask, dtype="u1")
+    if mask.shape[0] != indices.shape[0]:
+        raise ValueError("edge_mask does not match the graph")
+
+    stamp = ctx.stamp
+    dist  = ctx.weights
+    pred  = ctx.pred
+    heap  = ctx.queue
+    pos   = ctx.dist
+
+    for i in range(ban.shape[0]):
+        if ban[i] != s:
+            stamp[ban[i]] = epoch
+            pos[ban[i]] = (2 ** 32) - 1
+
+    with nogil:
+        _dijkstra(<uint64_t *> indptr.data, <uint32_t *> indices.data,
+                  <double *> weights.data, &source, 1, t, UNREACHED,
+                  n_nodes, <uint8_t *> mask.data, <uint32_t *> stamp.data,
+                  epoch, <double *> dist.data, <uint32_t *> pred.data,
+                  <uint32_t *> heap.data, <uint32_t *> pos.data, NULL)
+
+    if stamp[t] != epoch or pos[t] != (2 ** 32) - 1 or t in ban:
+        return None, None
+
+    path = _path(pred, s, t)
+    return path, dist[path]
+
+cdef inline double _lower_bound(double *fwd, double *bwd, size_t k,
+                                uint32_t v, uint32_t t) nogil:
+    """
+    Return the landmark lower bound on the distance from v to t.
+
+    fwd and bwd hold k distances per node from and to the landmarks.
+    Returns UNREACHED if the tables prove that t is unreachable from v.
+    """
+
+    cdef:
+        double *fv = fwd + v * k
+        double *ft = fwd + t * k
+        double *bv = bwd + v * k
+        double *bt = bwd + t * k
+        double h = 0
+        size_t i
+
+    for i in range(k):
+        # d(l, t) <= d(l, v) + d(v, t)
+        if fv[i] != UNREACHED:
+            if ft[i] == UNREACHED:
+                return UNREACHED
+            if ft[i] - fv[i] > h:
+                h = ft[i] - fv[i]
+
+        # d(v, l) <= d(v, t) + d(t, l)
+        if bt[i] != UNREACHED:
+            if bv[i] == UNREACHED:
+                return UNREACHED
+            if bv[i] - bt[i] > h:
+                h = bv[i] - bt[i]
+
+    return h
+
+cdef size_t _astar(uint64_t *indptr, uint32_t *indices, double *weights,
+                   uint32_t s, uint32_t t, double *fwd, double *bwd,
+                   size_t k, uint32_t *stamp, uint32_t epoch, double *dist,
+                   double *key, uint32_t *pred, uint32_t *heap,
+                   uint32_t *pos) nogil:
+    """
+    Run A* from s to t with landmark lower bounds.
+
+    The heap is ordered by key, the distance plus the lower bound to t.
+    The bounds are consistent, so every node is settled once as in
+    _dijkstra. Nodes which provably can not reach t are never touched.
+    Returns # settled nodes.
+    """
+
+    cdef:
+        uint32_t u, v, settled = (2 ** 32) - 1
+        size_t j, size, n_settled
+        double du, dv, h
+
+    h = _lower_bound(fwd, bwd, k, s, t)
+    if h == UNREACHED:
+        return 0
+
+    stamp[s] = epoch
+    dist[s] = 0
+    key[s] = h
+    pred[s] = settled
+    heap[0] = s
+    pos[s] = 0
+    size = 1
+
+    n_settled = 0
+    while size != 0:
+        u = heap[0]
+        size -= 1
+        if size != 0:
+            heap[0] = heap[size]
+            pos[heap[0]] = 0
+            _sift_down(heap, pos, key, 0, size)
+        pos[u] = settled
+
+        n_settled += 1
+        if u == t:
+            break
+
+        du = dist[u]
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            dv = du + weights[j]
+            if stamp[v] != epoch:
+                h = _lower_bound(fwd, bwd, k, v, t)
+                if h == UNREACHED:
+                    continue
+                stamp[v] = epoch
+                dist[v] = dv
+                key[v] = dv + h
+                pred[v] = u
+                heap[size] = v
+                size += 1
+                _sift_up(heap, pos, key, size - 1)
+            elif pos[v] != settled and dv < dist[v]:
+                key[v] = dv + (key[v] - dist[v])
+                dist[v] = dv
+                pred[v] = u
+                _sift_up(heap, pos, key, pos[v])
+
+    return n_settled
+
+def astar(object G, size_t s, size_t t, bint directed, object forward,
+          object backward, object ctx):
+    """
+    Find a shortest path from s to t guided by landmark distances.
+
+    Returns the path, its length and # settled nodes. The path and length
+    are None if t is unreachable. forward and backward are float64 arrays
+    of shape (n_nodes, k) with the distances from and to k landmarks,
+    (2 ** 64) - 1 marking unreachable pairs. ctx is a TraversalContext
+    which was reset for the query.
+
+    G        - the weighted graph
+    s        - the source node
+    t        - the target node
+    directed - G is a directed graph
+    forward  - distances from the landmarks
+    backward - distances to the landmarks
+    ctx      - the traversal context
+    """
+
+    cdef:
+        ndarray[uint64_t] indptr
+        ndarray[uint32_t] indices, stamp, pred, heap, pos
+        ndarray[float64_t] weights, dist, key
+        ndarray[float64_t, ndim=2] fwd, bwd
+        uint32_t epoch = ctx.epoch
+        size_t k, n_settled
+
+    indptr, indices, weights = _forward(G, directed)
+    indptr  = np.ascontiguousarray(indptr)
+    indices = np.ascontiguousarray(indices)
+    weights = np.ascontiguousarray(weights)
+    fwd     = np.ascontiguousarray(forward, dtype="f8")
+    bwd     = np.ascontiguousarray(backward, dtype="f8")
+    k       = fwd.shape[1]
+    if fwd.shape[0] != G.n_nodes or bwd.shape[0] != G.n_nodes or \
+       bwd.shape[1] != k:
+        raise ValueError("Landmark tables do not match the graph")
+
+    stamp = ctx.stamp
+    dist  = ctx.weights
+    key   = ctx.keys
+    pred  = ctx.pred
+    heap  = ctx.queue
+    pos   = ctx.dist
+
+    with nogil:
+        n_settled = _astar(<uint64_t *> indptr.data,
+                           <uint32_t *> indices.data,
+                           <double *> weights.data, s, t,
+                           <double *> fwd.data, <double *> bwd.data, k,
+                           <uint32_t *> stamp.data, epoch,
+                           <double *> dist.data, <double *> key.data,
+                           <uint32_t *> pred.data, <uint32_t *> heap.data,
+                           <uint32_t *> pos.data)
+
+    if stamp[t] != epoch or pos[t] != (2 ** 32) - 1:
+        return None, None, n_settled
+
+    return _path(pred, s, t), dist[t], n_settled
+
+cdef struct _Side:
+    uint64_t *indptr
+    uint32_t *indices
+    double *weights
+    uint32_t *stamp
+    uint32_t epoch
+    double *dist
+    uint32_t *pred
+    uint32_t *heap
+    uint32_t *pos
+    size_t size
+
+cdef void _side_init(_Side *a, object arrays, object ctx, uint32_t s):
+    """
+    Point a at the edges and the buffers of ctx and start it from s.
+    """
+
+    cdef ndarray indptr, indices, weights, stamp, dist, pred, heap, pos
+
+    indptr, indices, weights = arrays
+    stamp, dist, pred, heap, pos = (ctx.stamp, ctx.weights, ctx.pred,
+                                    ctx.queue, ctx.dist)
+
+    a.indptr  = <uint64_t *> indptr.data
+    a.indices = <uint32_t *> indices.data
+    a.weights = <double *> weights.data
+    a.stamp   = <uint32_t *> stamp.data
+    a.epoch   = ctx.epoch
+    a.dist    = <double *> dist.data
+    a.pred    = <uint32_t *> pred.data
+    a.heap    = <uint32_t *> heap.data
+    a.pos     = <uint32_t *> pos.data
+
+    a.stamp[s] = a.epoch
+    a.dist[s]  = 0
+    a.pred[s]  = (2 ** 32) - 1
+    a.heap[0]  = s
+    a.pos[s]   = 0
+    a.size     = 1
+
+cdef void _side_step(_Side *a, _Side *b, double *best, uint32_t *meet) nogil:
+    """
+    Settle the nearest node of search a and relax its edges.
+
+    best and meet are lowered whenever a node reached by a has been
+    reached by search b along a shorter combined path.
+    """
+
+    cdef:
+        uint32_t u, v, settled = (2 ** 32) - 1
+        size_t j
+        double du, dv
+
+    u = a.heap[0]
+    a.size -= 1
+    if a.size != 0:
+        a.heap[0] = a.heap[a.size]
+        a.pos[a.heap[0]] = 0
+        _sift_down(a.heap, a.pos, a.dist, 0, a.size)
+    a.pos[u] = settled
+
+    du = a.dist[u]
+    for j in range(a.indptr[u], a.indptr[u + 1]):
+        v = a.indices[j]
+        dv = du + a.weights[j]
+        if a.stamp[v] != a.epoch:
+            a.stamp[v] = a.epoch
+            a.dist[v] = dv
+            a.pred[v] = u
+            a.heap[a.size] = v
+            a.size += 1
+            _sift_up(a.heap, a.pos, a.dist, a.size - 1)
+        elif a.pos[v] != settled and dv < a.dist[v]:
+            a.dist[v] = dv
+            a.pred[v] = u
+            _sift_up(a.heap, a.pos, a.dist, a.pos[v])
+        else:
+            continue
+
+        if b.stamp[v] == b.epoch and dv + b.dist[v] < best[0]:
+            best[0] = dv + b.dist[v]
+            meet[0] = v
+
+def bidirectional(object forward, object backward, size_t s, size_t t,
+                  object ctx, object rctx, bint upward=True):
+    """
+    Find a shortest path from s to t with a search from each end.
+
+    forward and backward are (indptr, indices, weights) triples with the
+    arcs out of and into each node. The search with the nearer top node
+    is advanced. Both stop once the sum of their nearest distances is not
+    less than the best path through a node reached by both.
+
+    If upward, the arcs lead up a contraction hierarchy instead. Then
+    each search only stops once its own nearest node is not nearer than
+    the best path.
+
+    Returns the meeting node and the length of the path, or (None, None)
+    if t is unreachable. The search trees are left in the pred buffers of
+    ctx and rctx, which are TraversalContexts reset for the query.
+
+    forward  - arcs out of each node
+    backward - arcs into each node
+    s        - the source node
+    t        - the target node
+    ctx      - context of the search from s
+    rctx     - context of the search from t
+    upward   - the arcs form a contraction hierarchy
+    """
+
+    cdef:
+        _Side f, b
+        uint32_t meet = (2 ** 32) - 1
+        double best = UNREACHED
+
+    forward  = [np.ascontiguousarray(x) for x in forward]
+    backward = [np.ascontiguousarray(x) for x in backward]
+    _side_init(&f, forward, ctx, s)
+    _side_init(&b, backward, rctx, t)
+    if s == t:
+        best = 0
+        meet = s
+
+    with nogil:
+        while not upward and f.size != 0 and b.size != 0:
+            if f.dist[f.heap[0]] + b.dist[b.heap[0]] >= best:
+                break
+            if f.dist[f.heap[0]] <= b.dist[b.heap[0]]:
+                _side_step(&f, &b, &best, &meet)
+            else:
+                _side_step(&b, &f, &best, &meet)
+
+        while upward:
+            if f.size != 0 and f.dist[f.heap[0]] < best:
+                if b.size != 0 and b.dist[b.heap[0]] < f.dist[f.heap[0]]:
+                    _side_step(&b, &f, &best, &meet)
+                else:
+                    _side_step(&f, &b, &best, &meet)
+            elif b.size != 0 and b.dist[b.heap[0]] < best:
+                _side_step(&b, &f, &best, &meet)
+            else:
+                break
+
+    if best == UNREACHED:
+        return None, None
+    return meet, best
@@ -0,0 +1,85 @@
+"""
+Tests for the landmark A* index.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy.testing import assert_equal
+from random import randint, uniform
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for directed in (False, True):
+            # 100 vertex random graph, sparse enough to be disconnected
+            a = nx.gnp_random_graph(100, 0.03, directed = directed)
+            for u, v in a.edges_iter():
+                a[u][v]["weight"] = uniform(0, 100)
+            edges = [(u, v, w["weight"]) for u, v, w in
+                     a.edges_iter(data = True)]
+            make = sg.wdigraph if directed else sg.wgraph
+            deg = make.make_deg(a.order(), iter(edges))
+            b = make.make(a.order(), a.size(), iter(edges), deg)
+            testgraphs.append((a, b, directed))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_build(testgraph):
+    """
+    Test the landmark distance tables.
+    """
+
+    a, b, directed = testgraph
+    L = sg.alt.build(b, 4, directed)
+
+    assert 0 < L.n_landmarks <= 4
+    for i, l in enumerate(L.landmarks):
+        nx_dist = nx.single_source_dijkstra_path_length(a, l)
+        for v in a.nodes_iter():
+            if v in nx_dist:
+                assert abs(L.forward[v, i] - nx_dist[v]) < 1e-9
+            else:
+                assert L.forward[v, i] == (2 ** 64) - 1
+
+def test_alt_search(testgraph):
+    """
+    Test landmark A* against networkx.
+    """
+
+    a, b, directed = testgraph
+    L = sg.alt.build(b, 8, directed)
+    ctx = sg.context.TraversalContext(b.order())
+
+    for _ in xrange(50):
+        s = randint(0, 99)
+        t = randint(0, 99)
+        path, dist = sg.alt.alt_search(b, L, s, t, directed, ctx)
+        try:
+            nx_dist = nx.dijkstra_path_length(a, s, t)
+        except nx.NetworkXNoPath:
+            assert path is None and dist is None
+            continue
+        assert abs(dist - nx_dist) < 1e-9
+        assert path[0] == s and path[-1] == t
+        length = sum(a[u][v]["weight"] for u, v in zip(path, path[1:]))
+        assert abs(length - nx_dist) < 1e-9
+
+def test_load_save(tmpdir, testgraph):
+    """
+    Test landmark persistance.
+    """
+
+    a, b, directed = testgraph
+    L = sg.alt.build(b, 4, directed)
+
+    sg.alt.save(tmpdir.strpath, L)
+    M = sg.alt.load(tmpdir.strpath)
+
+    assert_equal(L.landmarks, M.landmarks)
+    assert_equal(L.forward, M.forward)
+    assert_equal(L.backward, M.backward)
@@ -0,0 +1,77 @@
+"""
+Tests for the HyperANF distance statistics.
+"""
+
+import numpy as np
+import networkx as nx
+import staticgraph as sg
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # 500 vertex sparse random graphs
+        a = nx.gnp_random_graph(500, 0.008)
+        deg = sg.graph.make_deg(a.order(), a.edges_iter())
+        b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        a = nx.gnp_random_graph(500, 0.006, directed = True)
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def exact(a):
+    """
+    Return the exact neighbourhood function and harmonic centrality.
+    """
+
+    counts = np.zeros(a.order() + 1)
+    harmonic = np.zeros(a.order())
+    for x, dist in nx.all_pairs_shortest_path_length(a).iteritems():
+        for y, d in dist.iteritems():
+            counts[d] += 1
+            if d:
+                harmonic[y] += 1.0 / d
+    nf = np.cumsum(counts)
+    return nf[:np.flatnonzero(counts)[-1] + 1], harmonic
+
+def test_neighbourhood_function(testgraph):
+    """
+    Test the estimates against exact all pairs distances.
+    """
+
+    a, b = testgraph
+    nf, harmonic = exact(a)
+    sg_nf, _ = sg.anf.neighbourhood_function(b, 10, seed = 1)
+
+    # The last few far pairs may not change any register
+    assert nf.size - 3 <= sg_nf.size <= nf.size
+    assert np.allclose(sg_nf, nf[:sg_nf.size], rtol = 0.1)
+    assert abs(sg.anf.effective_diameter(sg_nf) -
+               sg.anf.effective_diameter(nf)) < 0.5
+    assert abs(sg.anf.average_distance(sg_nf) -
+               sg.anf.average_distance(nf)) < 0.1 * \
+           sg.anf.average_distance(nf)
+
+    sg_harmonic = sg.anf.harmonic_centrality(b, 10, seed = 1)
+    err = np.abs(sg_harmonic - harmonic) / np.maximum(harmonic, 1)
+    assert err.mean() < 0.1
+
+def test_statistics():
+    """
+    Test the statistics of an exact neighbourhood function.
+    """
+
+    # Path of 4 nodes
+    nf = np.array([4.0, 10.0, 14.0, 16.0])
+    assert np.allclose(sg.anf.distance_distribution(nf), [4, 6, 4, 2])
+    assert abs(sg.anf.average_distance(nf) - 20.0 / 12) < 1e-9
+    assert abs(sg.anf.effective_diameter(nf, 0.5) - 2.0 / 3) < 1e-9
+    assert sg.anf.effective_diameter(nf, 1.0) == 3.0
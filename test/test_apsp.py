@@ -0,0 +1,132 @@
+"""
+Tests for all pairs shortest paths.
+"""
+
+import numpy as np
+import networkx as nx
+import staticgraph as sg
+from numpy.testing import assert_equal
+from random import uniform
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for p in (0.03, 0.3):
+            # 100 vertex random unweighted graphs
+            a = nx.gnp_random_graph(100, p)
+            deg = sg.graph.make_deg(a.order(), a.edges_iter())
+            b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b, False, False))
+
+            a = nx.gnp_random_graph(100, p, directed = True)
+            deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+            b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b, False, True))
+
+            # 100 vertex random weighted graphs
+            for directed in (False, True):
+                a = nx.gnp_random_graph(100, p, directed = directed)
+                for u, v in a.edges_iter():
+                    a[u][v]["weight"] = uniform(0, 100)
+                edges = [(u, v, w["weight"]) for u, v, w in
+                         a.edges_iter(data = True)]
+                make = sg.wdigraph if directed else sg.wgraph
+                deg = make.make_deg(a.order(), iter(edges))
+                b = make.make(a.order(), a.size(), iter(edges), deg)
+                testgraphs.append((a, b, True, directed))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def check(a, weighted, dist, pred):
+    """
+    Compare the matrices with networkx
+    """
+
+    if weighted:
+        nx_dist = nx.all_pairs_dijkstra_path_length(a)
+        unreached = (2 ** 64) - 1
+    else:
+        nx_dist = nx.all_pairs_shortest_path_length(a)
+        unreached = (2 ** 32) - 1
+
+    for u in a.nodes_iter():
+        for v in a.nodes_iter():
+            if v not in nx_dist[u]:
+                assert dist[u, v] == unreached
+                if pred is not None:
+                    assert pred[u, v] == (2 ** 32) - 1
+                continue
+            assert abs(dist[u, v] - nx_dist[u][v]) < 1e-9
+            if pred is None or u == v:
+                continue
+            w = pred[u, v]
+            assert a.has_edge(w, v)
+            step = a[w][v]["weight"] if weighted else 1
+            assert abs(dist[u, w] + step - dist[u, v]) < 1e-9
+
+def test_all_pairs_shortest_paths(testgraph):
+    """
+    Test every method with and without predecessors
+    """
+
+    a, b, weighted, directed = testgraph
+    methods = ("dijkstra", "floyd") if weighted else ("bfs",)
+
+    for method in methods:
+        for predecessors in (False, True):
+            for threads in (1, 3):
+                dist, pred = sg.apsp.all_pairs_shortest_paths(b, directed,
+                                None, predecessors, method, threads, 16)
+                check(a, weighted, dist, pred)
+
+def test_workers(testgraph):
+    """
+    Test rows computed by thread and process workers
+    """
+
+    a, b, weighted, directed = testgraph
+    for predecessors in (False, True):
+        for processes in (False, True):
+            dist, pred = sg.apsp.all_pairs_shortest_paths(b, directed,
+                            None, predecessors, workers = 3,
+                            processes = processes)
+            check(a, weighted, dist, pred)
+
+def test_store(tmpdir, testgraph):
+    """
+    Test that the matrices are memory mapped into the store
+    """
+
+    a, b, weighted, directed = testgraph
+    dist, pred = sg.apsp.all_pairs_shortest_paths(b, directed,
+                                                  tmpdir.strpath, True)
+
+    mdist = np.load(tmpdir.join("dist.npy").strpath, "r")
+    mpred = np.load(tmpdir.join("pred.npy").strpath, "r")
+    assert_equal(dist, mdist)
+    assert_equal(pred, mpred)
+
+def test_auto_method(monkeypatch):
+    """
+    Test that dense weighted graphs pick Floyd-Warshall.
+    """
+
+    calls = []
+    floyd = sg.apsp.floyd_warshall
+    monkeypatch.setattr(sg.apsp, "floyd_warshall",
+                        lambda *args: calls.append(1) or floyd(*args))
+
+    a = nx.complete_graph(30)
+    edges = [(u, v, uniform(0, 10)) for u, v in a.edges_iter()]
+    deg = sg.wgraph.make_deg(30, iter(edges))
+    b = sg.wgraph.make(30, len(edges), iter(edges), deg)
+    dist, _ = sg.apsp.all_pairs_shortest_paths(b)
+    assert calls == [1]
+
+    d, _ = sg.apsp.all_pairs_shortest_paths(b, method = "dijkstra")
+    assert abs(d - dist).max() < 1e-9
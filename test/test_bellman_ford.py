@@ -0,0 +1,148 @@
+"""
+Tests for Bellman-Ford with negative weights.
+"""
+
+import pytest
+import networkx as nx
+import staticgraph as sg
+from staticgraph.exceptions import StaticGraphNegativeCycleException
+from random import randint, uniform
+
+def make_graph(a):
+    """
+    Return the WDiGraph of the weighted networkx digraph a.
+    """
+
+    edges = [(u, v, w["weight"]) for u, v, w in a.edges_iter(data = True)]
+    deg = sg.wdigraph.make_deg(a.order(), iter(edges))
+    return sg.wdigraph.make(a.order(), a.size(), iter(edges), deg)
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for p in (0.03, 0.1):
+            # Weights reduced by node potentials, negative edges but no
+            # negative cycles
+            a = nx.gnp_random_graph(100, p, directed = True)
+            pot = [uniform(0, 50) for _ in xrange(a.order())]
+            for u, v in a.edges_iter():
+                a[u][v]["weight"] = uniform(0, 10) + pot[u] - pot[v]
+            testgraphs.append((a, make_graph(a)))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+    if "cyclegraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for _ in xrange(3):
+            a = nx.gnp_random_graph(100, 0.03, directed = True)
+            for u, v in a.edges_iter():
+                a[u][v]["weight"] = uniform(0, 10)
+            cycle = range(randint(40, 60), randint(70, 90))
+            for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+                a.add_edge(u, v, weight = uniform(-1, 0.5))
+            a.add_edge(cycle[-1], cycle[0], weight = -len(cycle))
+            testgraphs.append((a, make_graph(a), cycle))
+
+        metafunc.parametrize("cyclegraph", testgraphs)
+
+def check_cycle(a, cycle):
+    """
+    Check that cycle is a negative cycle of a.
+    """
+
+    cycle = list(cycle)
+    assert len(set(cycle)) == len(cycle) > 0
+    total = 0.0
+    for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+        assert a.has_edge(u, v)
+        total += a[u][v]["weight"]
+    assert total < 0
+
+def test_bellman_ford(testgraph):
+    """
+    Test bellman_ford against networkx.
+    """
+
+    a, b = testgraph
+    for _ in xrange(10):
+        s = randint(0, 99)
+        nx_pred, nx_dist = nx.bellman_ford(a, s)
+        for vectorized in (False, True):
+            dist, pred = sg.bellman_ford.bellman_ford(b, s, True, vectorized)
+            for v in a.nodes_iter():
+                if v not in nx_dist:
+                    assert dist[v] == (2 ** 64) - 1
+                    assert pred[v] == (2 ** 32) - 1
+                    continue
+                assert abs(dist[v] - nx_dist[v]) < 1e-9
+                if v == s:
+                    assert pred[v] == (2 ** 32) - 1
+                else:
+                    w = a[pred[v]][v]["weight"]
+                    assert abs(dist[pred[v]] + w - dist[v]) < 1e-9
+
+def test_negative_cycle(testgraph, cyclegraph):
+    """
+    Test negative cycle detection and extraction.
+    """
+
+    a, b = testgraph
+    for vectorized in (False, True):
+        assert sg.bellman_ford.negative_cycle(b, True, vectorized) is None
+
+    a, b, cycle = cyclegraph
+    assert nx.negative_edge_cycle(a)
+    for vectorized in (False, True):
+        check_cycle(a, sg.bellman_ford.negative_cycle(b, True, vectorized))
+
+        s = cycle[randint(0, len(cycle) - 1)]
+        with pytest.raises(StaticGraphNegativeCycleException) as e:
+            sg.bellman_ford.bellman_ford(b, s, True, vectorized)
+        check_cycle(a, e.value.cycle)
+
+def test_last_round():
+    """
+    Test a graph with active edges but no improvement in the last round.
+    """
+
+    a = nx.DiGraph()
+    a.add_weighted_edges_from([(0, 1, 1.0), (1, 2, 1.0), (2, 0, 1.0)])
+    b = make_graph(a)
+    for vectorized in (False, True):
+        dist, pred = sg.bellman_ford.bellman_ford(b, 0, True, vectorized)
+        assert list(dist) == [0, 1, 2]
+        assert list(pred) == [(2 ** 32) - 1, 0, 1]
+        assert sg.bellman_ford.negative_cycle(b, True, vectorized) is None
+
+def test_pred_cycle():
+    """
+    Test the search for cycles of the predecessor graph.
+    """
+
+    none = (2 ** 32) - 1
+    assert sg.sssp.pred_cycle([none, 0, 1, 1, none]) is None
+    cycle = sg.sssp.pred_cycle([none, 0, 4, 2, 3, 3])
+    assert sorted(cycle) == [2, 3, 4]
+    for u, v in zip(cycle, list(cycle[1:]) + [cycle[0]]):
+        assert [none, 0, 4, 2, 3, 3][v] == u
+
+def test_short_cycle_large_graph():
+    """
+    Test a negative 2-cycle in a large graph, found without paths of
+    n_nodes edges.
+    """
+
+    a = nx.gnp_random_graph(3000, 0.002, directed = True)
+    for u, v in a.edges_iter():
+        a[u][v]["weight"] = uniform(1, 10)
+    a.add_edge(5, 7, weight = -50.0)
+    a.add_edge(7, 5, weight = 1.0)
+    b = make_graph(a)
+    for vectorized in (False, True):
+        check_cycle(a, sg.bellman_ford.negative_cycle(b, True, vectorized))
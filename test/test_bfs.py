@@ -0,0 +1,95 @@
+"""
+Tests for the compiled BFS kernels.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy import arange, uint32
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs.
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # 100 vertex sparse random graph
+        a = nx.gnp_random_graph(100, 0.03)
+        deg = sg.graph.make_deg(a.order(), a.edges_iter())
+        b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        # 100 vertex sparse random directed graph
+        a = nx.gnp_random_graph(100, 0.03, directed = True)
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_ms_distances(testgraph):
+    """
+    Testing bit parallel BFS distances.
+    """
+
+    a, b = testgraph
+    sources = arange(a.order(), dtype = uint32)
+    dist = sg.bfs.ms_distances(b, sources)
+    for s in sources:
+        nx_dist = nx.single_source_shortest_path_length(a, s)
+        for u in a.nodes_iter():
+            assert dist[s, u] == nx_dist.get(u, (2 ** 32) - 1)
+
+def test_ms_eccentricity(testgraph):
+    """
+    Testing bit parallel BFS eccentricities.
+    """
+
+    a, b = testgraph
+    sources = arange(a.order(), dtype = uint32)[::-1]
+    ecc, reached = sg.bfs.ms_eccentricity(b, sources)
+    for i, s in enumerate(sources):
+        nx_dist = nx.single_source_shortest_path_length(a, s)
+        assert ecc[i] == max(nx_dist.values())
+        assert reached[i] == len(nx_dist)
+
+def test_ms_eccentricity_grid():
+    """
+    Testing bit parallel BFS eccentricities on a long grid, with small
+    and large frontiers.
+    """
+
+    a = nx.convert_node_labels_to_integers(nx.grid_2d_graph(20, 500))
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+
+    sources = arange(0, a.order(), 97, dtype = uint32)
+    ecc, reached = sg.bfs.ms_eccentricity(b, sources)
+    for i, s in enumerate(sources):
+        nx_dist = nx.single_source_shortest_path_length(a, s)
+        assert ecc[i] == max(nx_dist.values())
+        assert reached[i] == a.order()
+
+def test_parallel_large_frontier():
+    """
+    Testing the level synchronous BFS on levels larger than the local
+    queues of the threads.
+    """
+
+    # A hub with 3000 leaves, each leading to a node of its own
+    a = nx.Graph()
+    for i in xrange(1, 3001):
+        a.add_edge(0, i)
+        a.add_edge(i, i + 3000)
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+
+    nx_dist = nx.single_source_shortest_path_length(a, 0)
+    for threads in (1, 3):
+        bfs_indptr, bfs_indices = sg.bfs.parallel(b, 0, threads = threads)
+        assert list(bfs_indptr) == [0, 1, 3001, 6001]
+        assert sorted(bfs_indices) == range(6001)
+        for d in xrange(3):
+            level = bfs_indices[bfs_indptr[d]:bfs_indptr[d + 1]]
+            assert all(nx_dist[u] == d for u in level)
@@ -0,0 +1,119 @@
+"""
+Tests for contraction hierarchies.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy.testing import assert_equal
+from random import randint, uniform
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for directed in (False, True):
+            # 100 vertex random graph, sparse enough to be disconnected
+            a = nx.gnp_random_graph(100, 0.04, directed = directed)
+            for u, v in a.edges_iter():
+                a[u][v]["weight"] = uniform(0, 100)
+            edges = [(u, v, w["weight"]) for u, v, w in
+                     a.edges_iter(data = True)]
+            make = sg.wdigraph if directed else sg.wgraph
+            deg = make.make_deg(a.order(), iter(edges))
+            b = make.make(a.order(), a.size(), iter(edges), deg)
+            testgraphs.append((a, b, directed))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_build(testgraph):
+    """
+    Test that arcs only lead upwards and keep the distances.
+    """
+
+    a, b, directed = testgraph
+    H = sg.ch.build(b, directed)
+
+    assert sorted(H.rank) == range(100)
+    for u in xrange(100):
+        for j in xrange(H.s_indptr[u], H.s_indptr[u + 1]):
+            v = H.s_indices[j]
+            assert H.rank[u] < H.rank[v]
+            assert H.s_weights[j] >= nx.dijkstra_path_length(a, u, v) - 1e-9
+        for j in xrange(H.p_indptr[u], H.p_indptr[u + 1]):
+            v = H.p_indices[j]
+            assert H.rank[u] < H.rank[v]
+            assert H.p_weights[j] >= nx.dijkstra_path_length(a, v, u) - 1e-9
+
+def test_ch_search(testgraph):
+    """
+    Test hierarchy queries against networkx.
+    """
+
+    a, b, directed = testgraph
+    H = sg.ch.build(b, directed)
+    ctx = sg.context.TraversalContext(b.order())
+    rctx = sg.context.TraversalContext(b.order())
+
+    for _ in xrange(50):
+        s = randint(0, 99)
+        t = randint(0, 99)
+        path, dist = sg.ch.ch_search(H, s, t, ctx, rctx)
+        try:
+            nx_dist = nx.dijkstra_path_length(a, s, t)
+        except nx.NetworkXNoPath:
+            assert path is None and dist is None
+            continue
+        assert abs(dist - nx_dist) < 1e-9
+        assert path[0] == s and path[-1] == t
+        length = sum(a[u][v]["weight"] for u, v in zip(path, path[1:]))
+        assert abs(length - nx_dist) < 1e-9
+
+def test_load_save(tmpdir, testgraph):
+    """
+    Test hierarchy persistance.
+    """
+
+    a, b, directed = testgraph
+    H = sg.ch.build(b, directed)
+
+    sg.ch.save(tmpdir.strpath, H)
+    I = sg.ch.load(tmpdir.strpath)
+
+    assert H.n_nodes == I.n_nodes
+    assert H.n_edges == I.n_edges
+    assert_equal(H.rank, I.rank)
+    assert_equal(H.s_indptr, I.s_indptr)
+    assert_equal(H.s_indices, I.s_indices)
+    assert_equal(H.s_weights, I.s_weights)
+    assert_equal(H.s_middle, I.s_middle)
+    assert_equal(H.p_indptr, I.p_indptr)
+    assert_equal(H.p_indices, I.p_indices)
+    assert_equal(H.p_weights, I.p_weights)
+    assert_equal(H.p_middle, I.p_middle)
+
+    s = randint(0, 99)
+    for t in xrange(100):
+        assert sg.ch.ch_search(H, s, t)[1] == sg.ch.ch_search(I, s, t)[1]
+
+def test_shared_store(tmpdir, testgraph):
+    """
+    Test saving the graph and its hierarchy to the same store.
+    """
+
+    a, b, directed = testgraph
+    H = sg.ch.build(b, directed)
+    make = sg.wdigraph if directed else sg.wgraph
+
+    make.save(tmpdir.strpath, b)
+    sg.ch.save(tmpdir.strpath, H)
+    c = make.load(tmpdir.strpath)
+    I = sg.ch.load(tmpdir.strpath)
+
+    assert c.n_nodes == b.n_nodes and c.n_edges == b.n_edges
+    assert_equal(sorted(c.edges(True)), sorted(b.edges(True)))
+    assert I.n_edges == H.n_edges
+    assert_equal(I.s_indices, H.s_indices)
@@ -22,6 +22,18 @@ def pytest_generate_tests(metafunc):
 
         metafunc.parametrize("testgraph", testgraphs)
 
+    if "undirectedgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for _ in xrange(10):
+            # Sparse random graph of 100 vertices
+            a = nx.gnp_random_graph(100, 0.02)
+            deg = sg.graph.make_deg(a.order(), a.edges_iter())
+            b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b))
+
+        metafunc.parametrize("undirectedgraph", testgraphs)
+
 def assert_components_equal(comps0, comps1):
     """
     Check if the two components are the same
@@ -71,3 +83,13 @@ def test_weakly_connected_components(testgraph):
 
     assert_components_equal(comps0, comps1)
 
+
+def test_connected_components(undirectedgraph):
+    """
+    Test connected components
+    """
+
+    comps0 = nx.connected_components(undirectedgraph[0])
+    comps1 = sg.components.connected(undirectedgraph[1])
+
+    assert_components_equal(comps0, comps1)
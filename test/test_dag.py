@@ -0,0 +1,74 @@
+"""
+Tests for topological ordering of directed graphs.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from random import shuffle
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for _ in xrange(5):
+            # Random DAG of 100 vertices with shuffled labels
+            a = nx.gnp_random_graph(100, 0.1, directed=True)
+            labels = range(100)
+            shuffle(labels)
+            a = nx.DiGraph([(labels[u], labels[v]) for u, v in a.edges_iter()
+                                                   if u < v])
+            a.add_nodes_from(range(100))
+            deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+            b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b))
+
+            # Random graph of 100 vertices
+            a = nx.gnp_random_graph(100, 0.02, directed=True)
+            deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+            b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_topological_sort(testgraph):
+    """
+    Test topological sort and the witness cycle
+    """
+
+    a, b = testgraph
+    order, cycle = sg.dag.topological_sort(b)
+
+    assert sg.dag.is_dag(b) == nx.is_directed_acyclic_graph(a)
+    if nx.is_directed_acyclic_graph(a):
+        assert cycle is None
+        assert sorted(order) == range(100)
+        position = dict((u, i) for i, u in enumerate(order))
+        for u, v in a.edges_iter():
+            assert position[u] < position[v]
+    else:
+        assert order is None
+        assert len(set(cycle)) == len(cycle)
+        for i in xrange(len(cycle)):
+            assert a.has_edge(cycle[i - 1], cycle[i])
+
+def test_topological_levels(testgraph):
+    """
+    Test longest path levels
+    """
+
+    a, b = testgraph
+    level, cycle = sg.dag.topological_levels(b)
+
+    if not nx.is_directed_acyclic_graph(a):
+        assert level is None and cycle is not None
+        return
+
+    nx_level = {}
+    for v in nx.topological_sort(a):
+        nx_level[v] = max([nx_level[u] + 1 for u in a.predecessors(v)] + [0])
+    for v in a.nodes_iter():
+        assert level[v] == nx_level[v]
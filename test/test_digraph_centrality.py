@@ -0,0 +1,64 @@
+"""
+Tests for different centrality measures for directed graphs.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy.testing import assert_allclose
+from random import randint
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs.
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # Sparse 60 vertex random digraph, unweighted and with integer weights
+        a = nx.gnp_random_graph(60, 0.06, directed = True)
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b, None))
+
+        a = nx.gnp_random_graph(60, 0.06, directed = True)
+        for u, v in a.edges_iter():
+            a[u][v]["weight"] = float(randint(1, 4))
+        edges = [(u, v, w["weight"]) for u, v, w in a.edges_iter(data = True)]
+        deg = sg.wdigraph.make_deg(a.order(), iter(edges))
+        b = sg.wdigraph.make(a.order(), a.size(), iter(edges), deg)
+        testgraphs.append((a, b, "weight"))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_betweenness_centrality(testgraph):
+    """
+    Testing betweenness centrality functions for directed graphs.
+    """
+
+    a, b, weight = testgraph
+    for normalized in (True, False):
+        nx_bc = nx.betweenness_centrality(a, normalized = normalized,
+                                          weight = weight)
+        sg_bc = sg.digraph_centrality.betweenness_centrality(b,
+                    normalized = normalized)
+        assert_allclose(sg_bc, [nx_bc[i] for i in a.nodes()], atol = 1e-12)
+
+    nx_ebc = nx.edge_betweenness_centrality(a, weight = weight)
+    sg_ebc = sg.digraph_centrality.edge_betweenness_centrality(b)
+    for u, v in a.edges_iter():
+        for j in xrange(b.s_indptr[u], b.s_indptr[u + 1]):
+            if b.s_indices[j] == v:
+                assert abs(sg_ebc[j] - nx_ebc[(u, v)]) < 1e-12
+
+    # Threads, workers and sampling all the sources. Process workers
+    # are forked after the threaded runs.
+    sg_bc = sg.digraph_centrality.betweenness_centrality(b)
+    for kwargs in (dict(threads = 3), dict(workers = 3),
+                   dict(workers = 3, processes = True),
+                   dict(threads = 2, workers = 2, processes = True),
+                   dict(k = 60)):
+        bc = sg.digraph_centrality.betweenness_centrality(b, **kwargs)
+        assert_allclose(bc, sg_bc, atol = 1e-12)
+        ebc = sg.digraph_centrality.edge_betweenness_centrality(b, **kwargs)
+        assert_allclose(ebc, sg_ebc, atol = 1e-12)
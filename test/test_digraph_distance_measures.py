@@ -3,6 +3,7 @@ Tests for different distance measures for digraphs.
 """
 
 import networkx as nx
+from time import time
 import staticgraph as sg
 from numpy import array, uint32
 from numpy.testing import assert_equal
@@ -23,6 +24,20 @@ def pytest_generate_tests(metafunc):
 
         metafunc.parametrize("testgraph", testgraphs)
 
+    if "sparsegraph" in metafunc.funcargnames:
+        testgraphs = []
+
+    # Largest strongly connected component of sparse random digraphs
+        for p in (0.02, 0.03, 0.05):
+            a = nx.gnp_random_graph(200, p, directed = True)
+            nodes = max(nx.strongly_connected_components(a), key = len)
+            a = nx.convert_node_labels_to_integers(a.subgraph(nodes))
+            deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+            b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b))
+
+        metafunc.parametrize("sparsegraph", testgraphs)
+
 def test_eccentricity(testgraph):
     """
     Testing eccentricity function for graphs.
@@ -34,6 +49,20 @@ def test_eccentricity(testgraph):
     for i in range(sg_ecc[0].size):
         assert sg_ecc[1, i] == nx_ecc[sg_ecc[0, i]]
 
+def test_eccentricity_workers(testgraph):
+    """
+    Testing eccentricity function with thread and process workers.
+    """
+
+    a, b = testgraph
+    nx_ecc = nx.eccentricity(a)
+    for processes in (False, True):
+        sg_ecc = sg.digraph_distance_measures.eccentricity(b, b.order(),
+                                                      workers = 3,
+                                                      processes = processes)
+        for i in range(sg_ecc[0].size):
+            assert sg_ecc[1, i] == nx_ecc[sg_ecc[0, i]]
+
 def test_diameter(testgraph):
     """
     Testing diameter function for graphs.
@@ -79,3 +108,42 @@ def test_center(testgraph):
     nx_center.sort()
     sg_center.sort()
     assert_equal(nx_center, sg_center)
+
+def test_exact_diameter(testgraph, sparsegraph):
+    """
+    Testing exact_diameter function for digraphs.
+    """
+
+    for a, b in (testgraph, sparsegraph):
+        nx_dia = nx.diameter(a)
+        sg_dia = sg.digraph_distance_measures.exact_diameter(b)
+        assert nx_dia == sg_dia
+
+        sg_dia, (u, v) = sg.digraph_distance_measures.exact_diameter(b, True)
+        assert nx_dia == sg_dia
+        assert nx.shortest_path_length(a, u, v) == sg_dia
+
+def test_exact_diameter_large_fringe():
+    """
+    Testing exact_diameter on fringes spanning several 64 node batches.
+    """
+
+    a = nx.barabasi_albert_graph(514, 3, seed = 389).to_directed()
+    deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+    b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+    assert sg.digraph_distance_measures.exact_diameter(b) == nx.diameter(a)
+
+def test_exact_diameter_long_grid():
+    """
+    Testing exact_diameter on a high diameter grid, where every fringe
+    costs a BFS.
+    """
+
+    a = nx.grid_2d_graph(10, 5000).to_directed()
+    a = nx.convert_node_labels_to_integers(a)
+    deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+    b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+
+    start = time()
+    assert sg.digraph_distance_measures.exact_diameter(b) == 9 + 4999
+    assert time() - start < 2
@@ -0,0 +1,175 @@
+"""
+Tests for traversal techniques for directed graphs.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy.testing import assert_equal
+from random import randint
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs.
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # 100 vertex random directed graph
+        a = nx.gnp_random_graph(100, 0.1, directed = True)
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        # 100 vertex sparse random directed graph
+        a = nx.gnp_random_graph(100, 0.02, directed = True)
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        # Path graph of 100 vertices
+        a = nx.path_graph(100, create_using = nx.DiGraph())
+        deg = sg.digraph.make_deg(a.order(), a.edges_iter())
+        b = sg.digraph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def assert_levels_equal(a, s, bfs_indptr, bfs_indices, maxdepth = None):
+    """
+    Check the levels of a BFS against the networkx distances.
+    """
+
+    nx_dist = nx.single_source_shortest_path_length(a, s, maxdepth)
+    assert bfs_indptr[-1] == len(nx_dist)
+    assert bfs_indices.size == len(nx_dist)
+    for depth in xrange(bfs_indptr.size - 1):
+        start = bfs_indptr[depth]
+        stop = bfs_indptr[depth + 1]
+        for u in bfs_indices[start:stop]:
+            assert nx_dist[u] == depth
+
+def test_bfs_all(testgraph):
+    """
+    Testing bfs_all function for directed graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    bfs_indptr, bfs_indices = sg.digraph_traversal.bfs_all(b, s)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices)
+
+def test_bfs_all_direction_optimizing(testgraph):
+    """
+    Testing direction optimizing bfs_all function for directed graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    bfs_indptr, bfs_indices = sg.digraph_traversal.bfs_all(b, s,
+                                        direction_optimizing = True)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices)
+
+    td = sg.digraph_traversal.bfs_all(b, s, 2)
+    do = sg.digraph_traversal.bfs_all(b, s, 2, direction_optimizing = True)
+    assert list(td[0]) == list(do[0])
+    assert sorted(td[1]) == sorted(do[1])
+    assert_levels_equal(a, s, do[0], do[1], 2)
+
+def test_bfs_all_threads(testgraph):
+    """
+    Testing multi-threaded bfs_all function for directed graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    bfs_indptr, bfs_indices = sg.digraph_traversal.bfs_all(b, s, threads = 4)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices)
+
+    bfs_indptr, bfs_indices = sg.digraph_traversal.bfs_all(b, s, 2,
+                                                           threads = 4)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices, 2)
+
+def test_bidirectional_bfs_search(testgraph):
+    """
+    Testing bidirectional_bfs_search function for directed graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    nx_dist = nx.single_source_shortest_path_length(a, s)
+    ctx = sg.context.TraversalContext(b.order())
+    rctx = sg.context.TraversalContext(b.order())
+    for t in a.nodes_iter():
+        path = sg.digraph_traversal.bidirectional_bfs_search(b, s, t)
+        assert_equal(sg.digraph_traversal.bidirectional_bfs_search(b, s, t,
+                     ctx = ctx, rctx = rctx), path)
+        if t not in nx_dist:
+            assert path is None
+            continue
+        assert len(path) == nx_dist[t] + 1
+        assert path[0] == s and path[-1] == t
+        for u, v in zip(path[:-1], path[1:]):
+            assert a.has_edge(u, v)
+
+def test_search_context(testgraph):
+    """
+    Testing bfs_search and dfs_search reusing a context for directed graphs.
+    """
+
+    a, b = testgraph
+    ctx = sg.context.TraversalContext(b.order())
+    s = randint(0, 99)
+    nx_dist = nx.single_source_shortest_path_length(a, s)
+    for t in a.nodes_iter():
+        path = sg.digraph_traversal.bfs_search(b, s, t, ctx = ctx)
+        if t not in nx_dist:
+            assert path is None
+            continue
+        assert len(path) == nx_dist[t] + 1
+
+        path = sg.digraph_traversal.dfs_search(b, s, t, ctx = ctx)
+        assert path[0] == s and path[-1] == t
+        for u, v in zip(path[:-1], path[1:]):
+            assert a.has_edge(u, v)
+
+def test_dfs_all(testgraph):
+    """
+    Testing dfs_all function for directed graphs.
+    """
+
+    a, b = testgraph
+    pre, post, parent, disc, fin = sg.digraph_traversal.dfs_all(b)
+    assert sorted(pre) == sorted(a.nodes())
+    assert sorted(post) == sorted(a.nodes())
+    assert list(disc[pre]) == sorted(disc)
+    assert list(fin[post]) == sorted(fin)
+
+    for v in a.nodes_iter():
+        u = parent[v]
+        if u != (2 ** 32) - 1:
+            assert a.has_edge(u, v)
+            assert disc[u] < disc[v] < fin[v] < fin[u]
+
+    # No edge may lead to a node discovered later outside the subtree
+    for u, v in a.edges_iter():
+        if disc[u] < disc[v]:
+            assert fin[v] < fin[u]
+
+def test_khop(testgraph):
+    """
+    Testing khop function for directed graphs.
+    """
+
+    a, b = testgraph
+    seeds = [randint(0, 99) for _ in xrange(20)]
+    views = (("out", a), ("in", a.reverse()), ("both", a.to_undirected()))
+    for direction, g in views:
+        indptr, indices, hop = sg.digraph_traversal.khop(b, seeds, 2,
+                                                         direction,
+                                                         threads = 4)
+        for i, s in enumerate(seeds):
+            nx_dist = nx.single_source_shortest_path_length(g, s, 2)
+            start, stop = indptr[i], indptr[i + 1]
+            assert indices[start] == s
+            assert dict(zip(indices[start:stop], hop[start:stop])) == nx_dist
@@ -92,3 +92,167 @@ def test_dijkstra_search_digraph(testgraph):
     sg_dijk = sg.dijkstra.dijkstra_search(b, s, t, directed = True)
     assert nx_dijk == sg_dijk[1]
 
+
+def test_dijkstra_search_context(testgraph):
+    """
+    Testing dijkstra_search function reusing a context.
+    """
+
+    a, b, c, d = testgraph
+    ctx = sg.context.TraversalContext(b.order())
+    s = randint(0, 99)
+    for g, h, directed in ((a, b, False), (c, d, True)):
+        nx_dist = nx.single_source_dijkstra_path_length(g, s)
+        for t in g.nodes_iter():
+            path, dist = sg.dijkstra.dijkstra_search(h, s, t, directed, ctx)
+            if t not in nx_dist:
+                assert path is None
+                continue
+            assert abs(dist - nx_dist[t]) < 1e-9
+            assert path[0] == s and path[-1] == t
+
+def test_dijkstra_all_integer(testgraph):
+    """
+    Testing dijkstra_all function with the bucket queue.
+    """
+
+    a, b, c, d = testgraph
+    for g, directed in ((a, False), (c, True)):
+        g = g.copy()
+        for u, v in g.edges_iter():
+            g[u][v]["weight"] = randint(0, 20)
+        edges = [(u, v, w["weight"]) for u, v, w in g.edges_iter(data = True)]
+        make = sg.wdigraph if directed else sg.wgraph
+        deg = make.make_deg(g.order(), iter(edges))
+        h = make.make(g.order(), g.size(), iter(edges), deg)
+        assert sg.dijkstra.integral_weights(h, directed)
+
+        s = randint(0, 99)
+        nx_dist = nx.single_source_dijkstra_path_length(g, s)
+        nodes, weights = sg.dijkstra.dijkstra_all(h, s, directed, True)
+        for u, w in zip(nodes, weights):
+            if u in nx_dist:
+                assert w == nx_dist[u]
+            else:
+                assert w == (2 ** 64) - 1
+
+def test_delta_stepping(testgraph):
+    """
+    Testing delta_stepping function against dijkstra_all.
+    """
+
+    a, b, c, d = testgraph
+    s = randint(0, 99)
+    for g, h, directed in ((a, b, False), (c, d, True)):
+        nx_dist = nx.single_source_dijkstra_path_length(g, s)
+        for delta in (None, 1.0, 25.0, 1000.0):
+            for threads in (1, 4):
+                nodes, weights = sg.dijkstra.delta_stepping(h, s, directed,
+                                                            delta, threads)
+                assert sorted(nodes) == range(100)
+                for u, w in zip(nodes, weights):
+                    if u in nx_dist:
+                        assert abs(w - nx_dist[u]) < 1e-9
+                    else:
+                        assert w == (2 ** 64) - 1
+
+def test_delta_stepping_large_frontier():
+    """
+    Testing delta_stepping on buckets larger than the local buffers of
+    the threads.
+    """
+
+    # A hub with 3000 leaves, each leading to a node of its own
+    edges = [(0, i, 1.0) for i in xrange(1, 3001)]
+    edges += [(i, i + 3000, 2.0) for i in xrange(1, 3001)]
+    deg = sg.wgraph.make_deg(6001, iter(edges))
+    b = sg.wgraph.make(6001, len(edges), iter(edges), deg)
+
+    for threads in (1, 3):
+        nodes, weights = sg.dijkstra.delta_stepping(b, 0, False, 10.0,
+                                                    threads)
+        dist = dict(zip(nodes, weights))
+        assert sorted(dist) == range(6001)
+        assert dist[0] == 0
+        assert all(dist[i] == 1 and dist[i + 3000] == 3
+                   for i in xrange(1, 3001))
+
+def test_bidirectional_dijkstra_search(testgraph):
+    """
+    Testing bidirectional_dijkstra_search function against networkx.
+    """
+
+    a, b, c, d = testgraph
+    ctx = sg.context.TraversalContext(b.order())
+    rctx = sg.context.TraversalContext(b.order())
+    s = randint(0, 99)
+    for g, h, directed in ((a, b, False), (c, d, True)):
+        nx_dist = nx.single_source_dijkstra_path_length(g, s)
+        for t in g.nodes_iter():
+            path, dist = sg.dijkstra.bidirectional_dijkstra_search(h, s, t,
+                                                directed, ctx, rctx)
+            if t not in nx_dist:
+                assert path is None
+                continue
+            assert abs(dist - nx_dist[t]) < 1e-9
+            assert path[0] == s and path[-1] == t
+            length = sum(g[u][v]["weight"] for u, v in zip(path, path[1:]))
+            assert abs(length - nx_dist[t]) < 1e-9
+
+def test_multi_source_dijkstra(testgraph):
+    """
+    Testing multi_source_dijkstra function against per source runs.
+    """
+
+    a, b, c, d = testgraph
+    sources = [randint(0, 99) for _ in xrange(5)]
+    for g, h, directed in ((a, b, False), (c, d, True)):
+        dist, owner, pred = sg.dijkstra.multi_source_dijkstra(h, sources,
+                                                              directed)
+        nx_dist = [nx.single_source_dijkstra_path_length(g, s)
+                   for s in sources]
+        for v in g.nodes_iter():
+            best = min([dd[v] for dd in nx_dist if v in dd] or [None])
+            if best is None:
+                assert dist[v] == (2 ** 64) - 1
+                assert owner[v] == pred[v] == (2 ** 32) - 1
+                continue
+            assert abs(dist[v] - best) < 1e-9
+            assert owner[v] in sources
+            assert abs(nx_dist[sources.index(owner[v])][v] - best) < 1e-9
+            if v in sources:
+                assert owner[v] == v and pred[v] == (2 ** 32) - 1
+            else:
+                assert owner[pred[v]] == owner[v]
+                w = g[pred[v]][v]["weight"]
+                assert abs(dist[pred[v]] + w - dist[v]) < 1e-9
+
+def test_dijkstra_all_bounded(testgraph):
+    """
+    Testing the cutoff and k parameters of dijkstra_all.
+    """
+
+    a, b, c, d = testgraph
+    for g, h, directed in ((a, b, False), (c, d, True)):
+        ctx = sg.context.TraversalContext(h.order())
+        for _ in xrange(5):
+            s = randint(0, 99)
+            nx_dist = nx.single_source_dijkstra_path_length(g, s)
+            ranked = sorted(nx_dist.values())
+
+            cutoff = uniform(0, 100)
+            nodes, dist = sg.dijkstra.dijkstra_all(h, s, directed,
+                                                   cutoff = cutoff, ctx = ctx)
+            assert set(nodes) == set(v for v in nx_dist
+                                     if nx_dist[v] <= cutoff)
+            for v, w in zip(nodes, dist):
+                assert abs(nx_dist[v] - w) < 1e-9
+
+            k = randint(1, 20)
+            nodes, dist = sg.dijkstra.dijkstra_all(h, s, directed, k = k,
+                                                   ctx = ctx)
+            assert nodes[0] == s
+            assert len(nodes) == min(k, len(ranked))
+            for i, (v, w) in enumerate(zip(nodes, dist)):
+                assert abs(nx_dist[v] - w) < 1e-9
+                assert abs(ranked[i] - w) < 1e-9
@@ -5,7 +5,8 @@ Tests for different centrality measures for graphs.
 import networkx as nx
 import staticgraph as sg
 from numpy import array, uint32
-from numpy.testing import assert_equal
+from numpy.testing import assert_equal, assert_allclose
+from random import randint
 
 def pytest_generate_tests(metafunc):
     """
@@ -23,6 +24,25 @@ def pytest_generate_tests(metafunc):
 
         metafunc.parametrize("testgraph", testgraphs)
 
+    if "bcgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # Sparse 60 vertex random graph, unweighted and with integer weights
+        a = nx.gnp_random_graph(60, 0.08)
+        deg = sg.graph.make_deg(a.order(), a.edges_iter())
+        b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b, None))
+
+        a = nx.gnp_random_graph(60, 0.08)
+        for u, v in a.edges_iter():
+            a[u][v]["weight"] = float(randint(1, 4))
+        edges = [(u, v, w["weight"]) for u, v, w in a.edges_iter(data = True)]
+        deg = sg.wgraph.make_deg(a.order(), iter(edges))
+        b = sg.wgraph.make(a.order(), a.size(), iter(edges), deg)
+        testgraphs.append((a, b, "weight"))
+
+        metafunc.parametrize("bcgraph", testgraphs)
+
 def test_degree_centrality(testgraph):
     """
     Testing degree centrality function for graphs.
@@ -33,3 +53,73 @@ def test_degree_centrality(testgraph):
     sg_deg = sg.graph_centrality.degree_centrality(b)
     for i in a.nodes():
         assert "{0:.12f}".format(nx_deg[i]) == "{0:.12f}".format(sg_deg[i])
+
+def test_closeness_centrality(testgraph):
+    """
+    Testing closeness centrality function for graphs.
+    """
+
+    a, b = testgraph
+    nx_clo = nx.closeness_centrality(a)
+    for workers, processes in ((1, False), (3, False), (3, True)):
+        sg_clo = sg.graph_centrality.closeness_centrality(b, None, workers,
+                                                          processes)
+        for i in a.nodes():
+            assert abs(nx_clo[i] - sg_clo[i]) < 1e-12
+
+    # Sampled estimate
+    sg_clo = sg.graph_centrality.closeness_centrality(b, 64)
+    err = [abs(nx_clo[i] - sg_clo[i]) / nx_clo[i] for i in a.nodes()
+           if nx_clo[i] > 0]
+    assert sum(err) / len(err) < 0.1
+
+def test_betweenness_centrality(bcgraph):
+    """
+    Testing betweenness centrality functions for graphs.
+    """
+
+    a, b, weight = bcgraph
+    for normalized in (True, False):
+        nx_bc = nx.betweenness_centrality(a, normalized = normalized,
+                                          weight = weight)
+        sg_bc = sg.graph_centrality.betweenness_centrality(b,
+                    normalized = normalized)
+        assert_allclose(sg_bc, [nx_bc[i] for i in a.nodes()], atol = 1e-12)
+
+    nx_ebc = nx.edge_betweenness_centrality(a, weight = weight)
+    sg_ebc = sg.graph_centrality.edge_betweenness_centrality(b)
+    for u, v in a.edges_iter():
+        for j in xrange(b.n_indptr[u], b.n_indptr[u + 1]):
+            if b.n_indices[j] == v:
+                assert abs(sg_ebc[j] - nx_ebc[(u, v)]) < 1e-12
+
+    # Threads, workers and sampling all the sources. Process workers
+    # are forked after the threaded runs.
+    sg_bc = sg.graph_centrality.betweenness_centrality(b)
+    for kwargs in (dict(threads = 3), dict(workers = 3),
+                   dict(workers = 3, processes = True),
+                   dict(threads = 2, workers = 2, processes = True),
+                   dict(k = 60), dict(adaptive = 1e9)):
+        bc = sg.graph_centrality.betweenness_centrality(b, **kwargs)
+        assert_allclose(bc, sg_bc, atol = 1e-12)
+        ebc = sg.graph_centrality.edge_betweenness_centrality(b, **kwargs)
+        assert_allclose(ebc, sg_ebc, atol = 1e-12)
+
+def test_betweenness_sampled():
+    """
+    Testing betweenness centrality estimates from sampled sources.
+    """
+
+    a = nx.barabasi_albert_graph(300, 2)
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+    sg_bc = sg.graph_centrality.betweenness_centrality(b)
+    top = sg_bc.argmax()
+
+    # The most central node is estimated within a constant factor
+    _, _, used = sg.brandes.sampled(b, adaptive = 0.5)
+    assert used < a.order()
+    for kwargs in (dict(k = 100), dict(adaptive = 0.5)):
+        bc = sg.graph_centrality.betweenness_centrality(b, **kwargs)
+        assert abs(bc - sg_bc).sum() / sg_bc.sum() < 0.5
+        assert abs(bc[top] - sg_bc[top]) / sg_bc[top] < 0.5
@@ -3,6 +3,7 @@ Tests for different distance measures for graphs.
 """
 
 import networkx as nx
+from time import time
 import staticgraph as sg
 from numpy import array, uint32
 from numpy.testing import assert_equal
@@ -23,6 +24,25 @@ def pytest_generate_tests(metafunc):
 
         metafunc.parametrize("testgraph", testgraphs)
 
+    if "sparsegraph" in metafunc.funcargnames:
+        testgraphs = []
+
+    # Largest connected component of sparse random graphs and a path
+        for p in (0.01, 0.015, 0.03):
+            a = nx.gnp_random_graph(200, p)
+            a = max(nx.connected_component_subgraphs(a), key = len)
+            a = nx.convert_node_labels_to_integers(a)
+            testgraphs.append(a)
+        testgraphs.append(nx.path_graph(50))
+
+        graphs = []
+        for a in testgraphs:
+            deg = sg.graph.make_deg(a.order(), a.edges_iter())
+            b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+            graphs.append((a, b))
+
+        metafunc.parametrize("sparsegraph", graphs)
+
 def test_eccentricity(testgraph):
     """
     Testing eccentricity function for graphs.
@@ -34,6 +54,20 @@ def test_eccentricity(testgraph):
     for i in range(sg_ecc[0].size):
         assert sg_ecc[1, i] == nx_ecc[sg_ecc[0, i]]
 
+def test_eccentricity_workers(testgraph):
+    """
+    Testing eccentricity function with thread and process workers.
+    """
+
+    a, b = testgraph
+    nx_ecc = nx.eccentricity(a)
+    for processes in (False, True):
+        sg_ecc = sg.graph_distance_measures.eccentricity(b, b.order(),
+                                                      workers = 3,
+                                                      processes = processes)
+        for i in range(sg_ecc[0].size):
+            assert sg_ecc[1, i] == nx_ecc[sg_ecc[0, i]]
+
 def test_diameter(testgraph):
     """
     Testing diameter function for graphs.
@@ -80,3 +114,60 @@ def test_center(testgraph):
     sg_center.sort()
     assert_equal(nx_center, sg_center)
 
+
+def test_exact_diameter(testgraph, sparsegraph):
+    """
+    Testing exact_diameter function for graphs.
+    """
+
+    for a, b in (testgraph, sparsegraph):
+        nx_dia = nx.diameter(a)
+        sg_dia = sg.graph_distance_measures.exact_diameter(b)
+        assert nx_dia == sg_dia
+
+        sg_dia, (u, v) = sg.graph_distance_measures.exact_diameter(b, True)
+        assert nx_dia == sg_dia
+        assert nx.shortest_path_length(a, u, v) == sg_dia
+
+def test_all_eccentricities(testgraph, sparsegraph):
+    """
+    Testing all_eccentricities function for graphs.
+    """
+
+    # Also a disconnected graph with isolated nodes
+    c = nx.gnp_random_graph(200, 0.01)
+    deg = sg.graph.make_deg(c.order(), c.edges_iter())
+    d = sg.graph.make(c.order(), c.size(), c.edges_iter(), deg)
+
+    for a, b in (testgraph, sparsegraph, (c, d)):
+        sg_ecc = sg.graph_distance_measures.all_eccentricities(b)
+        assert_equal(sg_ecc[0], range(a.order()))
+        for comp in nx.connected_component_subgraphs(a):
+            nx_ecc = nx.eccentricity(comp)
+            for v in comp.nodes_iter():
+                assert sg_ecc[1, v] == nx_ecc[v]
+
+def test_exact_diameter_large_fringe():
+    """
+    Testing exact_diameter on fringes spanning several 64 node batches.
+    """
+
+    a = nx.barabasi_albert_graph(514, 3, seed = 389)
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+    assert sg.graph_distance_measures.exact_diameter(b) == nx.diameter(a)
+
+def test_exact_diameter_long_grid():
+    """
+    Testing exact_diameter on a high diameter grid, where every fringe
+    costs a BFS.
+    """
+
+    a = nx.grid_2d_graph(10, 5000)
+    a = nx.convert_node_labels_to_integers(a)
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+
+    start = time()
+    assert sg.graph_distance_measures.exact_diameter(b) == 9 + 4999
+    assert time() - start < 2
@@ -0,0 +1,186 @@
+"""
+Tests for traversal techniques for undirected graphs.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy import uint64
+from numpy.testing import assert_equal
+from random import randint
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs.
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # 100 vertex random graph
+        a = nx.gnp_random_graph(100, 0.1)
+        deg = sg.graph.make_deg(a.order(), a.edges_iter())
+        b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        # 100 vertex sparse random graph
+        a = nx.gnp_random_graph(100, 0.02)
+        deg = sg.graph.make_deg(a.order(), a.edges_iter())
+        b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+        testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def assert_levels_equal(a, s, bfs_indptr, bfs_indices, maxdepth = None):
+    """
+    Check the levels of a BFS against the networkx distances.
+    """
+
+    nx_dist = nx.single_source_shortest_path_length(a, s, maxdepth)
+    assert bfs_indptr[-1] == len(nx_dist)
+    assert bfs_indices.size == len(nx_dist)
+    for depth in xrange(bfs_indptr.size - 1):
+        start = bfs_indptr[depth]
+        stop = bfs_indptr[depth + 1]
+        for u in bfs_indices[start:stop]:
+            assert nx_dist[u] == depth
+
+def test_bfs_all(testgraph):
+    """
+    Testing bfs_all function for undirected graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    bfs_indptr, bfs_indices = sg.graph_traversal.bfs_all(b, s)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices)
+
+def test_bfs_all_threads(testgraph):
+    """
+    Testing multi-threaded bfs_all function for undirected graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    bfs_indptr, bfs_indices = sg.graph_traversal.bfs_all(b, s, threads = 4)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices)
+
+    bfs_indptr, bfs_indices = sg.graph_traversal.bfs_all(b, s, 2, threads = 4)
+    assert_levels_equal(a, s, bfs_indptr, bfs_indices, 2)
+
+def test_bidirectional_bfs_search(testgraph):
+    """
+    Testing bidirectional_bfs_search function for undirected graphs.
+    """
+
+    a, b = testgraph
+    s = randint(0, 99)
+    nx_dist = nx.single_source_shortest_path_length(a, s)
+    ctx = sg.context.TraversalContext(b.order())
+    rctx = sg.context.TraversalContext(b.order())
+    for t in a.nodes_iter():
+        path = sg.graph_traversal.bidirectional_bfs_search(b, s, t)
+        assert_equal(sg.graph_traversal.bidirectional_bfs_search(b, s, t,
+                     ctx = ctx, rctx = rctx), path)
+        if t not in nx_dist:
+            assert path is None
+            continue
+        assert len(path) == nx_dist[t] + 1
+        assert path[0] == s and path[-1] == t
+        for u, v in zip(path[:-1], path[1:]):
+            assert a.has_edge(u, v)
+
+def test_search_context(testgraph):
+    """
+    Testing bfs_search and dfs_search reusing a context for undirected graphs.
+    """
+
+    a, b = testgraph
+    ctx = sg.context.TraversalContext(b.order())
+    s = randint(0, 99)
+    nx_dist = nx.single_source_shortest_path_length(a, s)
+    for t in a.nodes_iter():
+        path = sg.graph_traversal.bfs_search(b, s, t, ctx = ctx)
+        if t not in nx_dist:
+            assert path is None
+            continue
+        assert len(path) == nx_dist[t] + 1
+
+        path = sg.graph_traversal.dfs_search(b, s, t, ctx = ctx)
+        assert path[0] == s and path[-1] == t
+        for u, v in zip(path[:-1], path[1:]):
+            assert a.has_edge(u, v)
+
+def test_dfs_all(testgraph):
+    """
+    Testing dfs_all function for undirected graphs.
+    """
+
+    a, b = testgraph
+    pre, post, parent, disc, fin = sg.graph_traversal.dfs_all(b)
+    assert sorted(pre) == sorted(a.nodes())
+    assert sorted(post) == sorted(a.nodes())
+    assert list(disc[pre]) == sorted(disc)
+    assert list(fin[post]) == sorted(fin)
+
+    for v in a.nodes_iter():
+        u = parent[v]
+        if u != (2 ** 32) - 1:
+            assert a.has_edge(u, v)
+            assert disc[u] < disc[v] < fin[v] < fin[u]
+
+    # Every edge joins a node to one of its ancestors
+    for u, v in a.edges_iter():
+        if disc[u] > disc[v]:
+            u, v = v, u
+        assert fin[v] < fin[u]
+
+    # Times are 64 bit, unvisited nodes are left at the largest one
+    s = randint(0, 99)
+    comp = nx.node_connected_component(a, s)
+    pre, post, parent, disc, fin = sg.graph_traversal.dfs_all(b, [s])
+    assert disc.dtype == fin.dtype == uint64
+    for v in a.nodes_iter():
+        if v not in comp:
+            assert disc[v] == fin[v] == (2 ** 64) - 1
+
+def test_khop(testgraph):
+    """
+    Testing khop function for undirected graphs.
+    """
+
+    a, b = testgraph
+    seeds = [randint(0, 99) for _ in xrange(20)]
+    for threads in (1, 4):
+        indptr, indices, hop = sg.graph_traversal.khop(b, seeds, 2,
+                                                       threads = threads)
+        for i, s in enumerate(seeds):
+            nx_dist = nx.single_source_shortest_path_length(a, s, 2)
+            start, stop = indptr[i], indptr[i + 1]
+            assert indices[start] == s
+            assert dict(zip(indices[start:stop], hop[start:stop])) == nx_dist
+
+    indptr, indices, hop = sg.graph_traversal.khop(b, seeds, 2, union = True)
+    nx_dist = {}
+    for s in seeds:
+        for u, d in nx.single_source_shortest_path_length(a, s, 2).items():
+            nx_dist[u] = min(nx_dist.get(u, d), d)
+    assert list(indptr) == [0, len(nx_dist)]
+    assert dict(zip(indices, hop)) == nx_dist
+
+def test_khop_large():
+    """
+    Testing khop on neighbourhoods larger than the initial buffers.
+    """
+
+    a = nx.gnp_random_graph(3000, 0.002)
+    deg = sg.graph.make_deg(a.order(), a.edges_iter())
+    b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+    seeds = [randint(0, 2999) for _ in xrange(40)]
+    for threads in (1, 3):
+        indptr, indices, hop = sg.graph_traversal.khop(b, seeds, 5,
+                                                       threads = threads)
+        assert (indptr[1:] - indptr[:-1]).max() > 1024
+        for i, s in enumerate(seeds):
+            nx_dist = nx.single_source_shortest_path_length(a, s, 5)
+            start, stop = indptr[i], indptr[i + 1]
+            assert dict(zip(indices[start:stop], hop[start:stop])) == nx_dist
@@ -0,0 +1,57 @@
+"""
+Tests for the k shortest loopless paths.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from random import randint, uniform
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        for directed in (False, True):
+            # 12 vertex random graph, small enough to list all paths
+            a = nx.gnp_random_graph(12, 0.35, directed = directed)
+            for u, v in a.edges_iter():
+                a[u][v]["weight"] = uniform(0, 100)
+            edges = [(u, v, w["weight"]) for u, v, w in
+                     a.edges_iter(data = True)]
+            make = sg.wdigraph if directed else sg.wgraph
+            deg = make.make_deg(a.order(), iter(edges))
+            b = make.make(a.order(), a.size(), iter(edges), deg)
+            testgraphs.append((a, b, directed))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_k_shortest_paths(testgraph):
+    """
+    Test k_shortest_paths against all simple paths listed by networkx.
+    """
+
+    a, b, directed = testgraph
+    ctx = sg.context.TraversalContext(b.order())
+
+    for _ in xrange(10):
+        s = randint(0, 11)
+        t = randint(0, 11)
+        if s == t:
+            continue
+
+        costs = sorted(sum(a[u][v]["weight"] for u, v in zip(p, p[1:]))
+                       for p in nx.all_simple_paths(a, s, t))
+        k = randint(1, 20)
+        paths = sg.ksp.k_shortest_paths(b, s, t, k, directed, ctx)
+
+        assert len(paths) == min(k, len(costs))
+        assert len(set(tuple(p) for p, _ in paths)) == len(paths)
+        for (path, dist), cost in zip(paths, costs):
+            assert path[0] == s and path[-1] == t
+            assert len(set(path)) == len(path)
+            total = sum(a[u][v]["weight"] for u, v in zip(path, path[1:]))
+            assert abs(total - dist) < 1e-9
+            assert abs(dist - cost) < 1e-9
@@ -0,0 +1,78 @@
+"""
+Tests for the landmark distance oracle.
+"""
+
+import networkx as nx
+import staticgraph as sg
+from numpy import array
+from numpy.testing import assert_equal
+from random import randint
+
+def pytest_generate_tests(metafunc):
+    """
+    Generate the arguments for test funcs
+    """
+
+    if "testgraph" in metafunc.funcargnames:
+        testgraphs = []
+
+        # 100 vertex random graphs, the sparse one is disconnected
+        for p in (0.02, 0.05):
+            a = nx.gnp_random_graph(100, p)
+            deg = sg.graph.make_deg(a.order(), a.edges_iter())
+            b = sg.graph.make(a.order(), a.size(), a.edges_iter(), deg)
+            testgraphs.append((a, b))
+
+        metafunc.parametrize("testgraph", testgraphs)
+
+def test_build(testgraph):
+    """
+    Test the landmark distance table.
+    """
+
+    a, b = testgraph
+    O = sg.oracle.build(b, 70)
+
+    assert 0 < O.n_landmarks <= 70
+    assert len(set(O.landmarks)) == O.n_landmarks
+    for i, l in enumerate(O.landmarks):
+        nx_dist = nx.single_source_shortest_path_length(a, l)
+        for v in a.nodes_iter():
+            assert O.table[v, i] == nx_dist.get(v, sg.oracle.FAR)
+
+def test_bounds(testgraph):
+    """
+    Test the bounds and the refined distances against networkx.
+    """
+
+    a, b = testgraph
+    O = sg.oracle.build(b, 4)
+    nx_dist = nx.all_pairs_shortest_path_length(a)
+
+    sources = array([randint(0, 99) for _ in xrange(200)])
+    targets = array([randint(0, 99) for _ in xrange(200)])
+    lower, upper = sg.oracle.bounds(O, sources, targets)
+    ctx = sg.context.TraversalContext(b.order())
+    rctx = sg.context.TraversalContext(b.order())
+
+    for i, (s, t) in enumerate(zip(sources, targets)):
+        d = nx_dist[s].get(t, (2 ** 32) - 1)
+        assert lower[i] <= d <= upper[i]
+        assert_equal(sg.oracle.bounds(O, s, t), (lower[i], upper[i]))
+        assert sg.oracle.distance(b, O, s, t) == (d, d)
+        assert sg.oracle.distance(b, O, s, t, True, ctx, rctx) == (d, d)
+
+def test_load_save(tmpdir, testgraph):
+    """
+    Test oracle persistance.
+    """
+
+    a, b = testgraph
+    O = sg.oracle.build(b, 4)
+
+    sg.oracle.save(tmpdir.strpath, O)
+    O1 = sg.oracle.load(tmpdir.strpath)
+
+    assert_equal(O.landmarks, O1.landmarks)
+    assert_equal(O.table, O1.table)
+    assert O.nbytes == O1.nbytes